@@ -0,0 +1,93 @@
+"""
+Import time of the package modules, measured in fresh interpreters with `python -X importtime`.
+
+Short lived worker processes import the data package once per instance, so the import time of the modules they
+need should stay small. The results of a run are appended as one JSON line to `--output` to track them across
+releases.
+
+    python benchmarks/import_time.py --repeat 20 --output benchmarks/results/import_time.jsonl
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+MODULES = [
+    "energy_aware_production_data",
+    "energy_aware_production_data.data_package",
+    "energy_aware_production_data.arrays",
+    "energy_aware_production_data.models",
+]
+
+# modules which must not be imported together with the module (only checked for the listed modules)
+FORBIDDEN = {
+    "energy_aware_production_data": ["pydantic"],
+    "energy_aware_production_data.data_package": ["pydantic"],
+    "energy_aware_production_data.arrays": ["pydantic"],
+}
+
+
+def import_time(module: str) -> tuple[float, list[str]]:
+    """Returns the cumulative import time of the module in seconds and the forbidden modules it imported."""
+    forbidden = FORBIDDEN.get(module, [])
+    code = f"import sys, {module}; print(','.join(m for m in {forbidden!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    # lines look like `import time: self [us] | cumulative | imported package`
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            imported = [name for name in result.stdout.strip().split(",") if name]
+            return int(parts[1]) / 1e6, imported
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def run(modules: list[str], repeat: int) -> dict:
+    results = {}
+    for module in modules:
+        times, imported = [], []
+        for _ in range(repeat):
+            seconds, imported = import_time(module)
+            times.append(seconds)
+        results[module] = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "max": max(times),
+            "forbidden_imports": imported,
+        }
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "modules": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path, default=None, help="JSON lines file the results are appended to")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    report = run(args.modules, args.repeat)
+    for module, result in report["modules"].items():
+        forbidden = f"  imports {', '.join(result['forbidden_imports'])}" if result["forbidden_imports"] else ""
+        print(f"{module:<50} {result['median'] * 1000:8.1f} ms{forbidden}")
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "a") as file:
+            file.write(json.dumps(report) + "\n")
+
+    if any(result["forbidden_imports"] for result in report["modules"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
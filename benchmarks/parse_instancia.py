@@ -0,0 +1,42 @@
+"""
+Parse time of raw instances (`instancia_*.txt`) of growing size, compared with splitting the lines in Python.
+
+    python -m benchmarks.parse_instancia
+"""
+
+import time
+
+import numpy as np
+
+from energy_aware_production_data.instancia import (
+    RawInstance,
+    format_instancia,
+    parse_instancia,
+)
+
+SIZES = [(100, 20), (1_000, 50), (10_000, 100), (50_000, 200)]
+
+
+def split_lines(text: str) -> np.ndarray:
+    lines = text.strip().split("\n")
+    return np.array([list(map(int, line.split())) for line in lines[2:]]).T
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for jobs, stages in SIZES:
+        raw = RawInstance(jobs, stages, rng.integers(1, 5, stages), rng.integers(1, 99, (jobs, stages)))
+        text = format_instancia(raw)
+        timings = {}
+        for name, parse in [("parse_instancia", parse_instancia), ("split_lines", split_lines)]:
+            start = time.perf_counter()
+            parse(text)
+            timings[name] = time.perf_counter() - start
+        print(
+            f"{jobs:>6} x {stages:<4} {len(text) / 1e6:7.1f} MB  "
+            + "  ".join(f"{name} {seconds * 1000:8.1f} ms" for name, seconds in timings.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
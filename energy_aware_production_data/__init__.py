@@ -1 +1,30 @@
 """hgb-ai-data-energy-aware-production package."""
+
+# public names and the modules defining them, modules are only imported on first access (importing the package
+# itself stays cheap, pydantic is only loaded together with the models)
+_LAZY_ATTRIBUTES = {
+    "LocalPaths": "data_package",
+    "EnergyAwareSchedulingDataPackage": "data_package",
+    "InstanceArrays": "arrays",
+    "Task": "models",
+    "Job": "models",
+    "Machine": "models",
+    "Stage": "models",
+    "ProblemInstance": "models",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+
+        value = getattr(import_module(f"{__name__}.{_LAZY_ATTRIBUTES[name]}"), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
@@ -0,0 +1,161 @@
+"""
+Precomputed daily, weekly and monthly aggregates of the PVGIS series of all cities.
+
+The hourly values of all cities are loaded once (see `load_pvgis`) and reduced to days with a single
+`reduceat` per statistic. Weeks (starting on Monday) and months are reduced from the days, so the hourly rows are
+only touched once. Every resolution stores `sum`, `min`, `max` and `count` per column, city and bucket, means are
+derived on query. Hours missing in the series of a city (see `PvgisSet.missing`) are left out of all statistics,
+buckets without any value have a count of 0 and NaN as minimum, maximum and mean. The whole cube is a few MB for
+all cities and years and is stored as compressed `npz`.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.pvgis import load_pvgis
+
+RESOLUTIONS = ("day", "week", "month")
+COLUMNS = ("power", "global_irradiance", "temperature_at_2_m")
+STATISTICS = ("sum", "min", "max", "count", "mean")
+
+
+@dataclass
+class AggregateLevel:
+    """
+    The buckets of one resolution, `count`, `sum`, `min` and `max` have the shape `(columns, cities, buckets)`.
+
+    Aggregates saved before missing hours were tracked have a `(buckets,)` count shared by all columns and cities.
+    """
+
+    starts: np.ndarray
+    count: np.ndarray
+    sum: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+
+    def reduce(self, codes: np.ndarray) -> "AggregateLevel":
+        """Merges consecutive buckets with the same code (codes have to be sorted)."""
+        first = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+        return AggregateLevel(
+            starts=codes[first],
+            count=np.add.reduceat(self.count, first, axis=-1),
+            sum=np.add.reduceat(self.sum, first, axis=-1),
+            # `fmin` and `fmax` ignore the NaN of buckets without values
+            min=np.fmin.reduceat(self.min, first, axis=-1),
+            max=np.fmax.reduceat(self.max, first, axis=-1),
+        )
+
+
+@dataclass
+class PvAggregates:
+    cities: List[str]
+    columns: List[str]
+    levels: Dict[str, AggregateLevel]
+
+    def query(
+        self,
+        resolution: str,
+        column: str = "power",
+        statistic: str = "sum",
+        *,
+        cities: Iterable[str] | None = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """
+        The aggregates of the buckets starting in `[start, end)` with one column per city.
+
+        Args:
+            resolution: One of `RESOLUTIONS`.
+            column: One of the aggregated PVGIS columns.
+            statistic: One of `STATISTICS`.
+            cities: The cities to return, all by default.
+            start: First bucket (inclusive), e.g. `"2010-01-01"`.
+            end: Last bucket (exclusive).
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown statistic {statistic}, expected one of {STATISTICS}")
+        level = self.levels[resolution]
+        first = 0 if start is None else np.searchsorted(level.starts, np.datetime64(pd.Timestamp(start)), "left")
+        last = len(level.starts) if end is None else np.searchsorted(level.starts, np.datetime64(pd.Timestamp(end)))
+        cities = self.cities if cities is None else list(cities)
+        rows = [self.cities.index(city) for city in cities]
+
+        count = np.broadcast_to(level.count, level.sum.shape)[self.columns.index(column), rows, first:last]
+        if statistic == "count":
+            values = count
+        elif statistic == "mean":
+            with np.errstate(invalid="ignore"):
+                values = level.sum[self.columns.index(column), rows, first:last] / count
+        else:
+            values = getattr(level, statistic)[self.columns.index(column), rows, first:last]
+        return pd.DataFrame(values.T, index=pd.DatetimeIndex(level.starts[first:last], name=resolution), columns=cities)
+
+    def save(self, path: Path):
+        arrays = {"cities": np.array(self.cities), "columns": np.array(self.columns)}
+        for resolution, level in self.levels.items():
+            for field in ("starts", "count", "sum", "min", "max"):
+                arrays[f"{resolution}/{field}"] = getattr(level, field)
+        np.savez_compressed(path, **arrays)
+
+
+def load_pv_aggregates(path: Path) -> PvAggregates:
+    with np.load(path) as data:
+        levels = {
+            resolution: AggregateLevel(
+                **{field: data[f"{resolution}/{field}"] for field in AggregateLevel.__annotations__}
+            )
+            for resolution in RESOLUTIONS
+            if f"{resolution}/starts" in data
+        }
+        return PvAggregates(cities=data["cities"].tolist(), columns=data["columns"].tolist(), levels=levels)
+
+
+def build_pv_aggregates(
+    data_package,
+    columns: Iterable[str] = COLUMNS,
+    *,
+    max_workers: int | None = None,
+    save: bool = True,
+) -> PvAggregates:
+    """
+    Aggregates the PVGIS series of all cities to days, weeks and months.
+
+    Args:
+        data_package: The `EnergyAwareSchedulingDataPackage`.
+        columns: The PVGIS columns to aggregate.
+        max_workers: Number of threads reading the csv files.
+        save: Store the result in `EnergyAwareSchedulingDataPackage.pv_pvgis_aggregates`.
+    """
+    columns = list(columns)
+    pvgis = load_pvgis(data_package, columns=columns, max_workers=max_workers)
+    values = np.stack([pvgis[column] for column in columns])
+    values[:, pvgis.missing] = np.nan
+    present = ~np.isnan(values)
+    hours = AggregateLevel(
+        starts=pvgis.timestamps.to_numpy(dtype="datetime64[s]"),
+        count=present.astype(np.int64),
+        sum=np.where(present, values, 0.0),
+        min=values,
+        max=values,
+    )
+
+    days = hours.reduce(hours.starts.astype("datetime64[D]"))
+    # 1970-01-01 was a Thursday, shifting by 3 days makes the weeks start on Monday
+    week_codes = ((days.starts.astype(np.int64) + 3) // 7 * 7 - 3).astype("datetime64[D]")
+    levels = {
+        "day": days,
+        "week": days.reduce(week_codes),
+        "month": days.reduce(days.starts.astype("datetime64[M]")),
+    }
+    for level in levels.values():
+        level.starts = level.starts.astype("datetime64[s]")
+
+    aggregates = PvAggregates(cities=pvgis.cities, columns=columns, levels=levels)
+    if save:
+        aggregates.save(data_package.pv_pvgis_aggregates)
+    return aggregates
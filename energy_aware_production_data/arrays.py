@@ -0,0 +1,121 @@
+"""
+Compact array form of a `ProblemInstance`.
+
+Validating an instance with pydantic creates one object per task and one dict per speed up table, which is
+convenient but slow for large instances and numeric work. `InstanceArrays` holds the same information as a
+handful of numpy arrays and can be loaded straight from the JSON without building the pydantic models.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+
+
+@dataclass
+class InstanceArrays:
+    """
+    A problem instance as numpy arrays. Jobs and stages are addressed by their position, i.e. the task of job
+    `j` at stage `s` is `processing_times[j, s]`.
+
+    The speed up tables are padded to the number of amplifiers. Tables which are shorter (see the FAQ on
+    clashing speed ups) repeat their last (fastest) option, so the padded entries never change the result
+    of a minimum or maximum over the options. `speed_up_counts` holds the number of real options per task.
+    """
+
+    number_of_jobs: int
+    number_of_stages: int
+    instance: int
+    alpha: float
+    beta: float
+    pv_scaling_factor: float | None
+    best_known_makespan: int
+    best_known_energy: int
+    # (amplifiers,) speed factors and energy amplifiers, sorted by speed factor
+    amplifier_speeds: np.ndarray
+    amplifier_values: np.ndarray
+    # (stages,) number of machines per stage
+    machines_per_stage: np.ndarray
+    # (jobs, stages) nominal processing times
+    processing_times: np.ndarray
+    # (jobs, stages, amplifiers) sped up processing times and the energy cost per time unit (i.e. power)
+    speed_up_times: np.ndarray
+    speed_up_power: np.ndarray
+    # (jobs, stages) number of valid entries in the speed up tables
+    speed_up_counts: np.ndarray
+
+    @property
+    def number_of_machines(self) -> int:
+        return int(self.machines_per_stage.sum())
+
+    @property
+    def speed_up_energy(self) -> np.ndarray:
+        """(jobs, stages, amplifiers) total energy of each speed up option."""
+        return self.speed_up_times * self.speed_up_power
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "InstanceArrays":
+        """Creates the arrays from a parsed instance JSON (keys as defined by the aliases of `ProblemInstance`)."""
+        amplifiers = sorted((float(k), float(v)) for k, v in data["Amplifiers"].items())
+        number_of_options = max(len(amplifiers), 1)
+
+        job_list = data["JobList"]
+        number_of_jobs = len(job_list)
+        number_of_stages = len(data["StageList"])
+
+        processing_times = np.zeros((number_of_jobs, number_of_stages), dtype=np.int64)
+        speed_up_times = np.zeros((number_of_jobs, number_of_stages, number_of_options), dtype=np.int64)
+        speed_up_power = np.zeros((number_of_jobs, number_of_stages, number_of_options), dtype=np.float64)
+        speed_up_counts = np.zeros((number_of_jobs, number_of_stages), dtype=np.int64)
+
+        for j, job in enumerate(job_list):
+            for task in job["Tasks"]:
+                s = task["Stage"]
+                processing_times[j, s] = task["ProcessingTime"]
+                # keep the order of the table (slowest first), json forces the keys to be strings
+                times = [int(float(k)) for k in task["SpeedUp"]]
+                power = list(task["SpeedUp"].values())
+                count = len(times)
+                if count == 0:
+                    times, power, count = [task["ProcessingTime"]], [0.0], 1
+                speed_up_counts[j, s] = count
+                speed_up_times[j, s, :count] = times
+                speed_up_power[j, s, :count] = power
+                speed_up_times[j, s, count:] = times[-1]
+                speed_up_power[j, s, count:] = power[-1]
+
+        return cls(
+            number_of_jobs=data["NumberOfJobs"],
+            number_of_stages=data["NumberOfStages"],
+            instance=int(data["Instance"]),
+            alpha=float(data["Alpha"]),
+            beta=float(data["Beta"]),
+            pv_scaling_factor=data.get("PvScalingFactor"),
+            best_known_makespan=data["BestKnownMakespan"],
+            best_known_energy=data["BestKnownEnergy"],
+            amplifier_speeds=np.array([k for k, _ in amplifiers], dtype=np.float64),
+            amplifier_values=np.array([v for _, v in amplifiers], dtype=np.float64),
+            machines_per_stage=np.array([len(stage["Machines"]) for stage in data["StageList"]], dtype=np.int64),
+            processing_times=processing_times,
+            speed_up_times=speed_up_times,
+            speed_up_power=speed_up_power,
+            speed_up_counts=speed_up_counts,
+        )
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "InstanceArrays":
+        """Creates the arrays from the raw instance JSON."""
+        return cls.from_dict(json.loads(data))
+
+    @classmethod
+    def from_problem_instance(cls, problem_instance) -> "InstanceArrays":
+        """Creates the arrays from an already validated `ProblemInstance`."""
+        return cls.from_dict(problem_instance.model_dump(by_alias=True))
+
+    def amplifier_index(self, speed: float | str) -> int:
+        """Returns the position of a speed factor (e.g. `"1.8"` as used in the JSON keys) in `amplifier_speeds`."""
+        matches = np.flatnonzero(np.isclose(self.amplifier_speeds, float(speed)))
+        if len(matches) == 0:
+            raise KeyError(f"Amplifier {speed} not defined for instance {self.instance}")
+        return int(matches[0])
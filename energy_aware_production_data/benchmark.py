@@ -0,0 +1,397 @@
+"""
+Running solvers over the instances of the data package with time and memory limits.
+
+Every run (solver, instance, repetition) is executed in its own process, at most `max_workers` at a time. A run is
+killed once it exceeds its time limit by `kill_grace` seconds and its address space is limited with
+`setrlimit`, so a single run can neither block the sweep nor take down the node.
+
+A solver is either
+
+- a callable `solver(arrays, time_limit)` receiving the `InstanceArrays` and returning a `Schedule`, a
+  `(makespan, energy)` tuple or a dict with the keys `makespan` and `energy`, or
+- a command (list of arguments) with the placeholders `{instance}` (path of the instance JSON), `{instance_id}`
+  and `{time_limit}`, which prints a JSON object with `makespan` and `energy` as last line to stdout.
+
+Results are appended to a store of parquet parts (see `ResultStore`) together with the gap to the best known
+bounds (`BoundsRegistry`, falling back to the values of the instance). Runs already in the store are skipped, so
+an interrupted sweep continues where it stopped.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from multiprocessing import connection, get_context
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.bounds import BoundsRegistry
+from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage
+from energy_aware_production_data.schedule import Schedule
+
+RESULT_COLUMNS = [
+    "solver",
+    "instance_id",
+    "repeat",
+    "status",
+    "makespan",
+    "energy",
+    "best_known_makespan",
+    "best_known_energy",
+    "makespan_gap",
+    "energy_gap",
+    "wall_time",
+    "max_rss",
+    "error",
+    "finished",
+]
+
+# statuses of runs which are not repeated when a sweep is resumed
+FINISHED_STATUSES = ("ok", "timeout", "memory_limit")
+
+
+class ResultStore:
+    """
+    Append-only store of run results, one parquet file per written batch. Parts are written to a temporary file
+    and renamed, so readers never see incomplete parts.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def parts(self) -> List[Path]:
+        return sorted(self.directory.glob("part-*.parquet"))
+
+    def read(self) -> pd.DataFrame:
+        parts = self.parts()
+        if not parts:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        return pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+
+    def append(self, rows: List[Dict]) -> Path | None:
+        if not rows:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        path = self.directory / f"part-{timestamp}-{os.getpid()}.parquet"
+        temporary = path.with_suffix(".tmp")
+        pd.DataFrame(rows, columns=RESULT_COLUMNS).to_parquet(temporary, index=False)
+        os.replace(temporary, path)
+        return path
+
+    def finished(self, solver: str, statuses: Sequence[str] = FINISHED_STATUSES) -> Set[Tuple[str, int]]:
+        """The `(instance_id, repeat)` of all runs of a solver with one of the given statuses."""
+        results = self.read()
+        done = results[(results["solver"] == solver) & results["status"].isin(statuses)]
+        return set(zip(done["instance_id"], done["repeat"].astype(int)))
+
+
+def _objectives(result) -> Tuple[float | None, float | None]:
+    if isinstance(result, Schedule):
+        return result.makespan, result.energy
+    if isinstance(result, dict):
+        return result.get("makespan"), result.get("energy")
+    makespan, energy = result
+    return makespan, energy
+
+
+# sets the memory limit and replaces itself with the command, instead of a `preexec_fn` which is not safe in
+# processes with threads
+_LIMIT_MEMORY = (
+    "import os, resource, sys; m = int(sys.argv[1]); resource.setrlimit(resource.RLIMIT_AS, (m, m)); "
+    "os.execvp(sys.argv[2], sys.argv[2:])"
+)
+
+
+def _limit_memory(memory_limit: int | None):
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _temporary_path(suffix: str) -> Path:
+    file, path = tempfile.mkstemp(suffix=suffix)
+    os.close(file)
+    return Path(path)
+
+
+def _limited_command(arguments: List[str], memory_limit: int | None) -> List[str]:
+    if memory_limit is None:
+        return arguments
+    return [sys.executable, "-c", _LIMIT_MEMORY, str(memory_limit), *arguments]
+
+
+def _redirect_output(output: Tuple[Path, Path]):
+    for stream, path in zip((sys.stdout, sys.stderr), output):
+        stream.flush()
+        with open(path, "w") as file:
+            os.dup2(file.fileno(), stream.fileno())
+
+
+def _run_callable(
+    sender, output: Tuple[Path, Path], data_package, instance_id: str, solver: Callable, time_limit: float, memory_limit
+):
+    # runs in the forked child process, other exceptions of the solver end the process with their traceback in the
+    # error output, which becomes the error of the run
+    _redirect_output(output)
+    _limit_memory(memory_limit)
+    start = time.perf_counter()
+    try:
+        makespan, energy = _objectives(solver(data_package.read_instance_arrays(instance_id), time_limit))
+        payload = {"status": "ok", "makespan": makespan, "energy": energy}
+    except MemoryError:
+        payload = {"status": "memory_limit"}
+    payload["wall_time"] = time.perf_counter() - start
+    payload["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    sender.send(payload)
+    sender.close()
+
+
+@dataclass
+class _Run:
+    instance_id: str
+    repeat: int
+    deadline: float
+    started: float = field(default_factory=time.perf_counter)
+    process: object = None
+    receiver: object = None
+    temporary: Path | None = None
+    # files with the stdout and stderr of the process
+    output: Tuple[Path, Path] | None = None
+
+    def sentinel(self):
+        return self.process.sentinel if self.receiver is not None else None
+
+    def poll(self, now: float) -> Dict | None:
+        """The payload of a finished run, `None` while it is still running."""
+        if self.receiver is not None:
+            return self._poll_callable(now)
+        return self._poll_command(now)
+
+    def _poll_callable(self, now: float) -> Dict | None:
+        if self.receiver.poll():
+            try:
+                payload = self.receiver.recv()
+            except EOFError:
+                payload = None
+            self.process.join()
+            if payload is not None:
+                return payload
+        elif self.process.is_alive():
+            if now < self.deadline:
+                return None
+            self.process.kill()
+            self.process.join()
+            return {"status": "timeout", "wall_time": now - self.started}
+        self.process.join()
+        # the process died without reporting, e.g. with an exception of the solver or killed when exceeding its memory
+        error = self.output[1].read_text(errors="replace").strip()[-500:] or f"exit code {self.process.exitcode}"
+        return {"status": "error", "error": error, "wall_time": now - self.started}
+
+    def _poll_command(self, now: float) -> Dict | None:
+        pid, status, usage = os.wait4(self.process.pid, os.WNOHANG)
+        if pid == 0:
+            if now < self.deadline:
+                return None
+            self.process.kill()
+            pid, status, usage = os.wait4(self.process.pid, 0)
+            payload = {"status": "timeout"}
+        else:
+            payload = self._parse_output(os.waitstatus_to_exitcode(status))
+        self.process.returncode = os.waitstatus_to_exitcode(status)
+        payload["wall_time"] = now - self.started
+        payload["max_rss"] = usage.ru_maxrss * 1024
+        return payload
+
+    def _parse_output(self, exit_code: int) -> Dict:
+        stdout, stderr = (path.read_text(errors="replace") for path in self.output)
+        if exit_code != 0:
+            memory = "MemoryError" in stderr or "bad_alloc" in stderr
+            return {"status": "memory_limit"} if memory else {"status": "error", "error": stderr.strip()[-500:]}
+        lines = [line for line in stdout.splitlines() if line.strip()]
+        try:
+            result = json.loads(lines[-1])
+            return {"status": "ok", "makespan": result.get("makespan"), "energy": result.get("energy")}
+        except (IndexError, ValueError):
+            return {"status": "error", "error": f"no JSON result in the output: {stdout.strip()[-200:]!r}"}
+
+    def kill(self):
+        self.process.kill()
+        if self.receiver is not None:
+            self.process.join()
+        else:
+            self.process.wait()
+
+    def cleanup(self):
+        for path in self.output or ():
+            path.unlink(missing_ok=True)
+        if self.receiver is not None:
+            self.receiver.close()
+        if self.temporary is not None:
+            self.temporary.unlink(missing_ok=True)
+
+
+def _select_instances(data_package, instances) -> List[str]:
+    instance_ids = data_package.instance_ids()
+    if instances is None:
+        return instance_ids
+    if callable(instances):
+        return [instance_id for instance_id in instance_ids if instances(instance_id)]
+    known = set(instance_ids)
+    selected = list(instances)
+    unknown = [instance_id for instance_id in selected if instance_id not in known]
+    if unknown:
+        raise KeyError(f"Unknown instances: {', '.join(unknown)}")
+    return selected
+
+
+def _gap(value, best) -> float:
+    if value is None or best is None or not np.isfinite(best) or best == 0:
+        return np.nan
+    return (float(value) - best) / best
+
+
+def run_benchmark(
+    data_package: EnergyAwareSchedulingDataPackage,
+    solver: Callable | Sequence[str],
+    *,
+    name: str,
+    instances: Iterable[str] | Callable[[str], bool] | None = None,
+    time_limit: float = 60.0,
+    memory_limit: int | None = None,
+    repeats: int = 1,
+    max_workers: int | None = None,
+    kill_grace: float = 5.0,
+    results: Path | None = None,
+    flush_every: int = 32,
+) -> pd.DataFrame:
+    """
+    Runs a solver over the selected instances and stores the results.
+
+    Args:
+        data_package: The data package.
+        solver: The solver callable or command, see the module documentation.
+        name: Name of the solver in the results, runs of the same name are resumed.
+        instances: Instance ids or a predicate on the instance id, all instances by default.
+        time_limit: Time limit in seconds passed to the solver.
+        memory_limit: Limit of the address space of a run in bytes.
+        repeats: Number of runs per instance.
+        max_workers: Maximum number of concurrent runs, the number of CPUs by default.
+        kill_grace: Seconds after the time limit until a run is killed.
+        results: Directory of the result store, defaults to `EnergyAwareSchedulingDataPackage.scheduling_benchmarks`.
+        flush_every: Number of finished runs written as one part of the store.
+
+    Returns:
+        All results of the solver in the store (including those of earlier sweeps).
+    """
+    store = ResultStore(data_package.scheduling_benchmarks if results is None else results)
+    max_workers = max_workers or os.cpu_count() or 1
+    finished = store.finished(name)
+    pending = deque(
+        (instance_id, repeat)
+        for instance_id in _select_instances(data_package, instances)
+        for repeat in range(repeats)
+        if (instance_id, repeat) not in finished
+    )
+
+    bounds = BoundsRegistry.from_data_package(data_package)
+    context = get_context("fork")
+    running: List[_Run] = []
+    rows: List[Dict] = []
+
+    def start(instance_id: str, repeat: int) -> _Run:
+        run = _Run(instance_id, repeat, deadline=time.perf_counter() + time_limit + kill_grace)
+        if callable(solver):
+            run.receiver, sender = context.Pipe(duplex=False)
+            run.output = (_temporary_path(".out"), _temporary_path(".err"))
+            run.process = context.Process(
+                target=_run_callable,
+                args=(sender, run.output, data_package, instance_id, solver, time_limit, memory_limit),
+                daemon=True,
+            )
+            run.process.start()
+            sender.close()
+        else:
+            path = data_package.scheduling_json_instances / f"{instance_id}.json"
+            if not path.exists():
+                # compressed or archived instances are passed as temporary file
+                path = run.temporary = _temporary_path(".json")
+                path.write_bytes(data_package.read_instance_bytes(instance_id))
+            placeholders = {"{instance}": str(path), "{instance_id}": instance_id, "{time_limit}": str(time_limit)}
+            arguments = []
+            for argument in solver:
+                for placeholder, value in placeholders.items():
+                    argument = argument.replace(placeholder, value)
+                arguments.append(argument)
+            # the output goes to files, a full pipe would block the solver; the child keeps its own descriptors
+            run.output = (_temporary_path(".out"), _temporary_path(".err"))
+            with open(run.output[0], "w") as stdout, open(run.output[1], "w") as stderr:
+                run.process = subprocess.Popen(
+                    _limited_command(arguments, memory_limit), stdout=stdout, stderr=stderr, text=True
+                )
+        return run
+
+    def result_row(run: _Run, payload: Dict) -> Dict:
+        key = tuple(int(part) for part in run.instance_id.split("_"))
+        best_makespan, best_energy = bounds.get(key, (None, None))
+        if best_makespan is None or best_energy is None:
+            instance = json.loads(data_package.read_instance_bytes(run.instance_id))
+            best_makespan = instance["BestKnownMakespan"] if best_makespan is None else best_makespan
+            best_energy = instance["BestKnownEnergy"] if best_energy is None else best_energy
+        makespan, energy = payload.get("makespan"), payload.get("energy")
+        return {
+            "solver": name,
+            "instance_id": run.instance_id,
+            "repeat": run.repeat,
+            "status": payload["status"],
+            "makespan": np.nan if makespan is None else float(makespan),
+            "energy": np.nan if energy is None else float(energy),
+            "best_known_makespan": float(best_makespan),
+            "best_known_energy": float(best_energy),
+            "makespan_gap": _gap(makespan, best_makespan),
+            "energy_gap": _gap(energy, best_energy),
+            "wall_time": payload.get("wall_time", np.nan),
+            "max_rss": payload.get("max_rss", -1),
+            "error": payload.get("error"),
+            "finished": datetime.now(timezone.utc),
+        }
+
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers:
+                running.append(start(*pending.popleft()))
+
+            sentinels = [sentinel for run in running if (sentinel := run.sentinel()) is not None]
+            if sentinels and len(sentinels) == len(running):
+                timeout = max(0.0, min(run.deadline for run in running) - time.perf_counter())
+                connection.wait(sentinels, timeout=timeout)
+            else:
+                time.sleep(0.01)
+
+            now = time.perf_counter()
+            for run in list(running):
+                payload = run.poll(now)
+                if payload is not None:
+                    running.remove(run)
+                    run.cleanup()
+                    rows.append(result_row(run, payload))
+
+            if len(rows) >= flush_every:
+                store.append(rows)
+                rows = []
+    finally:
+        for run in running:
+            run.kill()
+            run.cleanup()
+        store.append(rows)
+
+    results = store.read()
+    return results[results["solver"] == name].reset_index(drop=True)
@@ -0,0 +1,283 @@
+"""
+Registry of the best known bounds (makespan and energy) of the scheduling instances.
+
+The literature bounds in `best_makespans.txt` are read once into numpy arrays keyed by
+`(number_of_jobs, number_of_stages, instance)`. Improvements found by solvers are appended to a log file
+(`best_bounds.log`), one line per report. Appends are serialized with a lock file, so many solver processes
+can report concurrently. `BoundsRegistry.compact` folds the log into one line per instance.
+"""
+
+import fcntl
+import math
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+InstanceKey = Tuple[int, int, int]
+
+
+class Bounds(NamedTuple):
+    """Best known bounds of a single instance, `None` if unknown."""
+
+    makespan: int | None
+    energy: float | None
+
+
+class SizeClass(NamedTuple):
+    """Bounds of all instances with the same number of jobs and stages, sorted by instance."""
+
+    instances: np.ndarray
+    makespans: np.ndarray
+    energies: np.ndarray
+
+
+def _parse_line(line: str, source: Path, line_number: int) -> Tuple[InstanceKey, int | None, float | None] | None:
+    parts = line.split()
+    if not parts:
+        return None
+    if len(parts) not in (4, 5):
+        raise ValueError(f"{source}:{line_number}: expected 'jobs stages instance makespan [energy]', got {line!r}")
+
+    try:
+        key = (int(parts[0]), int(parts[1]), int(parts[2]))
+        makespan = None if parts[3] == "-" else int(parts[3])
+        energy = None if len(parts) == 4 or parts[4] == "-" else float(parts[4])
+    except ValueError:
+        raise ValueError(f"{source}:{line_number}: malformed bounds {line!r}") from None
+    return key, makespan, energy
+
+
+def _format_line(key: InstanceKey, makespan: int | None, energy: float | None) -> str:
+    return " ".join(
+        [*map(str, key), "-" if makespan is None else str(makespan), "-" if energy is None else repr(float(energy))]
+    )
+
+
+class BoundsRegistry:
+    """
+    Indexed best known makespans and energies. Missing makespans are stored as `-1`, missing energies as `nan`.
+
+    Args:
+        bounds_file: The literature bounds (`jobs stages instance makespan` per line).
+        log_file: Append only log of improvements. Created on the first report.
+    """
+
+    def __init__(self, bounds_file: Path, log_file: Path | None = None):
+        self.bounds_file = bounds_file
+        self.log_file = log_file
+
+        self.keys = np.empty((0, 3), dtype=np.int64)
+        self.makespans = np.empty(0, dtype=np.int64)
+        self.energies = np.empty(0, dtype=np.float64)
+        self._index: Dict[InstanceKey, int] = {}
+        self._size_classes: Dict[Tuple[int, int], np.ndarray] | None = None
+        # position (bytes and lines) and identity of the log file up to which we have read
+        self._log_position = 0
+        self._log_lines = 0
+        self._log_inode = None
+
+        with open(bounds_file, "r") as file:
+            self._merge(
+                record
+                for line_number, line in enumerate(file, start=1)
+                if (record := _parse_line(line, bounds_file, line_number)) is not None
+            )
+        self.refresh()
+
+    @classmethod
+    def from_data_package(cls, data_package) -> "BoundsRegistry":
+        return cls(data_package.scheduling_bounds, data_package.scheduling_bounds_log)
+
+    def _merge(self, records) -> int:
+        """Merges `(key, makespan, energy)` records, keeping the smaller value. Returns the number of improvements."""
+        new_keys: List[InstanceKey] = []
+        new_makespans: List[int] = []
+        new_energies: List[float] = []
+        improvements = 0
+
+        for key, makespan, energy in records:
+            row = self._index.get(key)
+            if row is None:
+                self._index[key] = len(self._index)
+                new_keys.append(key)
+                new_makespans.append(-1 if makespan is None else makespan)
+                new_energies.append(math.nan if energy is None else energy)
+                improvements += 1
+            elif row >= len(self.makespans):
+                # instance which was only added in this batch
+                row -= len(self.makespans)
+                if makespan is not None and (new_makespans[row] < 0 or makespan < new_makespans[row]):
+                    new_makespans[row] = makespan
+                    improvements += 1
+                if energy is not None and not energy >= new_energies[row]:
+                    new_energies[row] = energy
+                    improvements += 1
+            else:
+                if makespan is not None and (self.makespans[row] < 0 or makespan < self.makespans[row]):
+                    self.makespans[row] = makespan
+                    improvements += 1
+                if energy is not None and not energy >= self.energies[row]:
+                    self.energies[row] = energy
+                    improvements += 1
+
+        if new_keys:
+            self.keys = np.concatenate([self.keys, np.array(new_keys, dtype=np.int64).reshape(-1, 3)])
+            self.makespans = np.concatenate([self.makespans, np.array(new_makespans, dtype=np.int64)])
+            self.energies = np.concatenate([self.energies, np.array(new_energies, dtype=np.float64)])
+            self._size_classes = None
+        return improvements
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: InstanceKey) -> bool:
+        return tuple(key) in self._index
+
+    def __getitem__(self, key: InstanceKey) -> Bounds:
+        row = self._index[tuple(key)]
+        makespan = int(self.makespans[row])
+        energy = float(self.energies[row])
+        return Bounds(None if makespan < 0 else makespan, None if math.isnan(energy) else energy)
+
+    def get(self, key: InstanceKey, default=None) -> Bounds | None:
+        """The bounds of an instance, `default` if it is not in the registry."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def makespan(self, number_of_jobs: int, number_of_stages: int, instance: int) -> int | None:
+        """Returns the best known makespan or `None` if the instance or its makespan is unknown."""
+        row = self._index.get((number_of_jobs, number_of_stages, instance))
+        if row is None or self.makespans[row] < 0:
+            return None
+        return int(self.makespans[row])
+
+    def energy(self, number_of_jobs: int, number_of_stages: int, instance: int) -> float | None:
+        """Returns the best known energy or `None` if the instance or its energy is unknown."""
+        row = self._index.get((number_of_jobs, number_of_stages, instance))
+        if row is None or math.isnan(self.energies[row]):
+            return None
+        return float(self.energies[row])
+
+    def size_classes(self) -> List[Tuple[int, int]]:
+        """Returns all `(number_of_jobs, number_of_stages)` combinations."""
+        return sorted(self._groups())
+
+    def size_class(self, number_of_jobs: int, number_of_stages: int) -> SizeClass:
+        """Returns the bounds of all instances of a size class."""
+        rows = self._groups().get((number_of_jobs, number_of_stages), np.empty(0, dtype=np.int64))
+        return SizeClass(self.keys[rows, 2], self.makespans[rows], self.energies[rows])
+
+    def _groups(self) -> Dict[Tuple[int, int], np.ndarray]:
+        if self._size_classes is None:
+            order = np.lexsort((self.keys[:, 2], self.keys[:, 1], self.keys[:, 0]))
+            sorted_keys = self.keys[order, :2]
+            boundaries = np.flatnonzero(np.any(np.diff(sorted_keys, axis=0) != 0, axis=1)) + 1
+            self._size_classes = {
+                (int(rows_keys[0, 0]), int(rows_keys[0, 1])): rows
+                for rows, rows_keys in zip(np.split(order, boundaries), np.split(sorted_keys, boundaries))
+                if len(rows)
+            }
+        return self._size_classes
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if self.log_file is None:
+            raise RuntimeError("The registry has no log file to report to")
+
+        lock_file = self.log_file.with_name(self.log_file.name + ".lock")
+        with open(lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def report(
+        self,
+        number_of_jobs: int,
+        number_of_stages: int,
+        instance: int,
+        *,
+        makespan: int | None = None,
+        energy: float | None = None,
+    ) -> bool:
+        """
+        Reports a (possibly) improved makespan and/or energy. Only improvements are written to the log.
+
+        Returns:
+            `True` if the report improved one of the bounds.
+        """
+        if makespan is None and energy is None:
+            raise ValueError("Either a makespan or an energy has to be reported")
+
+        key = (number_of_jobs, number_of_stages, instance)
+        with self._locked():
+            # other processes may have reported better values in the meantime
+            self.refresh()
+            improved = self._merge([(key, makespan, energy)]) > 0
+            if improved:
+                with open(self.log_file, "a") as log:
+                    log.write(_format_line(key, makespan, energy) + "\n")
+        return improved
+
+    def refresh(self) -> int:
+        """
+        Reads the reports appended to the log since the last call.
+
+        Returns:
+            The number of improvements.
+        """
+        if self.log_file is None or not self.log_file.exists():
+            return 0
+
+        with open(self.log_file, "r") as log:
+            inode = os.fstat(log.fileno()).st_ino
+            if inode != self._log_inode:
+                # the log was compacted, compacted logs only contain values we have already seen or better
+                self._log_inode = inode
+                self._log_position = 0
+                self._log_lines = 0
+            log.seek(self._log_position)
+            content = log.read()
+
+        # ignore an incomplete last line, it is read on the next refresh
+        complete = content.rfind("\n") + 1
+        lines = content[:complete].splitlines()
+        # line numbers in errors count from the start of the file
+        first_line = self._log_lines + 1
+        self._log_position += len(content[:complete].encode("utf-8"))
+        self._log_lines += len(lines)
+        return self._merge(
+            record
+            for line_number, line in enumerate(lines, start=first_line)
+            if (record := _parse_line(line, self.log_file, line_number)) is not None
+        )
+
+    def compact(self):
+        """Rewrites the log with a single line per improved instance."""
+        with self._locked():
+            self.refresh()
+
+            literature = BoundsRegistry(self.bounds_file)
+            lines = []
+            for key, row in self._index.items():
+                makespan = int(self.makespans[row])
+                energy = float(self.energies[row])
+                base = literature[key] if key in literature else Bounds(None, None)
+                makespan = makespan if makespan >= 0 and makespan != base.makespan else None
+                energy = None if math.isnan(energy) else energy
+                if makespan is not None or energy is not None:
+                    lines.append(_format_line(key, makespan, energy) + "\n")
+
+            temporary = self.log_file.with_name(self.log_file.name + ".tmp")
+            with open(temporary, "w") as file:
+                file.writelines(lines)
+            os.replace(temporary, self.log_file)
+            self._log_inode = os.stat(self.log_file).st_ino
+            self._log_position = self.log_file.stat().st_size
+            self._log_lines = len(lines)
@@ -0,0 +1,246 @@
+"""
+Zstandard compressed layouts of the data package.
+
+Two layouts are supported, both are read transparently by `EnergyAwareSchedulingDataPackage`:
+
+- **files**: every file is compressed on its own and stored next to the original with a `.zst` suffix
+  (e.g. `scheduling/instances/50_10_1.json.zst`).
+- **archive**: all files of a directory are stored as independent zstd frames in a single `.zpack` file.
+  The frames can share a trained dictionary, which pays off for the many small and very similar instance files.
+  An index at the end of the archive allows random access to a single member without unpacking the others.
+
+The archive is structured as follows (all integers are unsigned 64 bit little endian):
+
+    MAGIC | dictionary | frame 0 | frame 1 | ... | index (json) | index offset | index length | MAGIC
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+import zstandard as zstd
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+ZSTD_SUFFIX = ".zst"
+ARCHIVE_SUFFIX = ".zpack"
+ARCHIVE_MAGIC = b"EASDPZ01"
+
+_FOOTER = struct.Struct("<QQ8s")
+
+# zstd needs a couple of samples to train a meaningful dictionary
+_MIN_DICTIONARY_SAMPLES = 8
+
+
+def compress_bytes(data: bytes, *, level: int = 19) -> bytes:
+    """Compresses data into a single zstd frame, as stored in a `.zst` file."""
+    return zstd.ZstdCompressor(level=level, write_content_size=True).compress(data)
+
+
+def compress_file(source: Path, *, level: int = 19, remove_source: bool = False) -> Path:
+    """
+    Compresses a single file and stores it next to the original with a `.zst` suffix.
+
+    Args:
+        source: The file to compress.
+        level: The zstd compression level.
+        remove_source: Delete the uncompressed file afterwards.
+
+    Returns:
+        The path of the compressed file.
+    """
+    target = source.with_name(source.name + ZSTD_SUFFIX)
+    target.write_bytes(compress_bytes(source.read_bytes(), level=level))
+
+    if remove_source:
+        source.unlink()
+    return target
+
+
+def decompress_file(path: Path) -> bytes:
+    """Reads a `.zst` file and returns its decompressed content."""
+    return zstd.ZstdDecompressor().decompress(path.read_bytes())
+
+
+def write_archive(
+    target: Path,
+    members: Iterable[Tuple[str, bytes]],
+    *,
+    level: int = 19,
+    dictionary_size: int | None = 112_640,
+) -> Path:
+    """
+    Writes the given members as independent zstd frames into a single archive.
+
+    Args:
+        target: Path of the archive (usually ending in `.zpack`).
+        members: `(name, content)` tuples, names have to be unique.
+        level: The zstd compression level.
+        dictionary_size: Maximum size of the dictionary trained on the members. `None` disables training.
+            The dictionary is also skipped if there are too few members to train on.
+
+    Returns:
+        The path of the archive.
+
+    The archive is written to a temporary file which then replaces the target, so readers which still have the
+    previous archive mapped keep a consistent file.
+    """
+    members = list(members)
+    names = [name for name, _ in members]
+    if len(set(names)) != len(names):
+        raise ValueError("Archive member names must be unique")
+
+    dictionary = None
+    if dictionary_size and len(members) >= _MIN_DICTIONARY_SAMPLES:
+        try:
+            dictionary = zstd.train_dictionary(dictionary_size, [content for _, content in members])
+        except zstd.ZstdError:
+            # too little or too homogeneous data, fall back to plain frames
+            dictionary = None
+
+    compressor = zstd.ZstdCompressor(level=level, dict_data=dictionary, write_content_size=True)
+
+    index: Dict[str, object] = {"dictionary": None, "members": {}}
+    temporary = target.with_name(target.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(ARCHIVE_MAGIC)
+
+        if dictionary is not None:
+            raw_dictionary = dictionary.as_bytes()
+            index["dictionary"] = [file.tell(), len(raw_dictionary)]
+            file.write(raw_dictionary)
+
+        for name, content in members:
+            frame = compressor.compress(content)
+            index["members"][name] = [file.tell(), len(frame), len(content)]
+            file.write(frame)
+
+        index_offset = file.tell()
+        raw_index = json.dumps(index).encode("utf-8")
+        file.write(raw_index)
+        file.write(_FOOTER.pack(index_offset, len(raw_index), ARCHIVE_MAGIC))
+
+    os.replace(temporary, target)
+    return target
+
+
+class ZstdArchive:
+    """
+    Read only access to an archive written by `write_archive`. The file is memory mapped, so reading a
+    single member only touches its own frame (and the shared dictionary).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < len(ARCHIVE_MAGIC) + _FOOTER.size or self._buffer[: len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a data package archive")
+
+        index_offset, index_length, magic = _FOOTER.unpack(self._buffer[-_FOOTER.size :])
+        if magic != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        index = json.loads(self._buffer[index_offset : index_offset + index_length])
+        self._members: Dict[str, List[int]] = index["members"]
+
+        dictionary = None
+        if index["dictionary"] is not None:
+            offset, length = index["dictionary"]
+            dictionary = zstd.ZstdCompressionDict(self._buffer[offset : offset + length])
+        self._dictionary = dictionary
+
+    def names(self) -> List[str]:
+        """Returns the names of all members in the order they were written."""
+        return list(self._members)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def read(self, name: str) -> bytes:
+        """Decompresses a single member."""
+        try:
+            offset, length, size = self._members[name]
+        except KeyError:
+            raise KeyError(f"{name} not found in {self.path}") from None
+
+        # decompressors are cheap and not thread safe, so we create one per call
+        decompressor = zstd.ZstdDecompressor(dict_data=self._dictionary)
+        return decompressor.decompress(self._buffer[offset : offset + length], max_output_size=size)
+
+    def close(self):
+        self._buffer.close()
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def compress_data_package(
+    data_package,
+    *,
+    layout: str = "files",
+    level: int = 19,
+    remove_source: bool = False,
+) -> List[Path]:
+    """
+    Compresses the scheduling instances and the PVGIS data of a data package.
+
+    Args:
+        data_package: The `EnergyAwareSchedulingDataPackage` to compress.
+        layout: Either `"files"` (one `.zst` per file) or `"archive"` (one `.zpack` per directory, the
+            instances are compressed with a trained dictionary).
+        level: The zstd compression level.
+        remove_source: Delete the uncompressed files afterwards.
+
+    Returns:
+        The paths of all written files.
+    """
+    if layout not in ("files", "archive"):
+        raise ValueError(f"Unknown layout {layout}, expected 'files' or 'archive'")
+
+    # the parameters and the profiling report stay plain files, the profiler updates its report in place
+    excluded = {data_package.scheduling_parameters_json.name, data_package.scheduling_profile_json.name}
+    groups = [
+        (
+            sorted(p for p in data_package.scheduling_json_instances.glob("*.json") if p.name not in excluded),
+            data_package.scheduling_instances_archive,
+            112_640,
+        ),
+        # the csv files are large and few, a dictionary would not help
+        (sorted(data_package.pv_pvgis_data.glob("*.csv")), data_package.pv_pvgis_archive, None),
+    ]
+
+    written = []
+    for sources, archive, dictionary_size in groups:
+        if not sources:
+            continue
+
+        if layout == "files":
+            written.extend(compress_file(source, level=level, remove_source=remove_source) for source in sources)
+        else:
+            # plain files replace the members of an existing archive, all other members are kept
+            plain = {source.name for source in sources}
+            kept = []
+            if archive.exists():
+                with ZstdArchive(archive) as existing:
+                    kept = [(name, existing.read(name)) for name in existing.names() if name not in plain | excluded]
+            members = [*kept, *((source.name, source.read_bytes()) for source in sources)]
+            written.append(write_archive(archive, members, level=level, dictionary_size=dictionary_size))
+            if remove_source:
+                for source in sources:
+                    source.unlink()
+
+    return written
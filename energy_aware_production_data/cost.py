@@ -0,0 +1,164 @@
+"""
+Time of use electricity costs based on `energy_prices_2024.csv`.
+
+The prices are held as an evenly spaced array together with their prefix sums, so the cost of a constant load
+over any window is O(1). The grid cost of a whole power profile (net of PV) is evaluated for all start offsets
+at once with sliding correlations (see `energy_aware_production_data.profiles`).
+
+Units: prices in EUR/MWh, power in W, costs in EUR.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.profiles import sliding_covered, sliding_dot
+
+
+@dataclass
+class PriceSeries:
+    """Evenly spaced electricity prices starting at `start`, one price per `step`."""
+
+    start: pd.Timestamp
+    step: pd.Timedelta
+    prices: np.ndarray
+
+    def __post_init__(self):
+        self.prices = np.asarray(self.prices, dtype=np.float64)
+        self.prefix = np.concatenate([[0.0], np.cumsum(self.prices)])
+
+    @classmethod
+    def from_csv(
+        cls,
+        path: Path,
+        *,
+        time_column: str | None = None,
+        price_column: str | None = None,
+        step: str = "1h",
+        **read_csv_kwargs,
+    ) -> "PriceSeries":
+        """
+        Loads a price export and resamples it to `step` (mean price per step, gaps are interpolated).
+
+        Args:
+            path: The csv file, e.g. `EnergyAwareSchedulingDataPackage.pv_energy_prices`.
+            time_column: Column with the start of each price interval, defaults to the first date like column.
+            price_column: Column with the price, defaults to the first numeric column.
+            step: Resolution of the series, hourly to match the PVGIS data.
+        """
+        data = pd.read_csv(path, **read_csv_kwargs)
+        if time_column is None:
+            time_column = next(c for c in data.columns if _is_datetime_column(data[c]))
+        if price_column is None:
+            price_column = next(c for c in data.columns if c != time_column and pd.api.types.is_numeric_dtype(data[c]))
+
+        prices = pd.Series(
+            pd.to_numeric(data[price_column], errors="coerce").to_numpy(),
+            index=pd.to_datetime(data[time_column]),
+        ).sort_index()
+        prices = prices.resample(step).mean().interpolate(limit_direction="both")
+        return cls(start=prices.index[0], step=pd.Timedelta(step), prices=prices.to_numpy())
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def step_hours(self) -> float:
+        return self.step / pd.Timedelta(hours=1)
+
+    def timestamps(self) -> pd.DatetimeIndex:
+        return pd.date_range(self.start, periods=len(self), freq=self.step)
+
+    def index_of(self, timestamp) -> int:
+        """Position of the step containing the timestamp."""
+        index = int((pd.Timestamp(timestamp) - self.start) // self.step)
+        if not 0 <= index < len(self):
+            raise IndexError(f"{timestamp} is outside of the price series")
+        return index
+
+    def window_cost(self, first: int, steps: int, power: float = 1.0) -> float:
+        """Cost of a constant load of `power` W during `steps` steps starting at position `first`, O(1)."""
+        if first < 0 or first + steps > len(self):
+            raise IndexError("Window is outside of the price series")
+        return power * (self.prefix[first + steps] - self.prefix[first]) * self.step_hours / 1e6
+
+    def profile_cost(self, profile: np.ndarray, first: int, pv: np.ndarray | None = None) -> float:
+        """
+        Grid cost of a power profile (one value per step) starting at position `first`. Only the load not covered
+        by `pv` (aligned with the prices, see `pv_for_prices`) is bought from the grid.
+        """
+        profile = np.asarray(profile, dtype=np.float64)
+        window = slice(first, first + len(profile))
+        grid = profile if pv is None else np.maximum(profile - np.asarray(pv)[window], 0.0)
+        return float(np.dot(grid, self.prices[window]) * self.step_hours / 1e6)
+
+    def costs_by_offset(self, profile: np.ndarray, pv: np.ndarray | None = None) -> np.ndarray:
+        """
+        Grid cost of the power profile for every start position, `out[s] == profile_cost(profile, s, pv)`.
+
+        The cost of the total load is a single correlation with the prices, the part covered by PV is subtracted
+        with `sliding_covered` weighted by the prices.
+        """
+        profile = np.asarray(profile, dtype=np.float64)
+        cost = sliding_dot(self.prices, profile)
+        if pv is not None:
+            cost -= sliding_covered(profile, pv, self.prices)
+        return cost * self.step_hours / 1e6
+
+    def cheapest_start(self, profile: np.ndarray, pv: np.ndarray | None = None) -> Tuple[pd.Timestamp, float]:
+        """Start timestamp with the lowest grid cost of the profile and that cost."""
+        costs = self.costs_by_offset(profile, pv)
+        if len(costs) == 0:
+            raise ValueError("The profile is longer than the price series")
+        best = int(np.argmin(costs))
+        return self.start + best * self.step, float(costs[best])
+
+
+def _is_datetime_column(column: pd.Series) -> bool:
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return True
+    if not pd.api.types.is_object_dtype(column) and not pd.api.types.is_string_dtype(column):
+        return False
+    parsed = pd.to_datetime(column.head(20), errors="coerce", format="mixed")
+    return bool(parsed.notna().all())
+
+
+def load_energy_prices(data_package, **kwargs) -> PriceSeries:
+    """Loads `energy_prices_2024.csv` of a data package, see `PriceSeries.from_csv` for the arguments."""
+    return PriceSeries.from_csv(data_package.pv_energy_prices, **kwargs)
+
+
+def pv_for_prices(pvgis: pd.DataFrame, prices: PriceSeries, year: int, scaling_factor: float = 1.0) -> np.ndarray:
+    """
+    Maps the PV power of one PVGIS year onto the hourly steps of the price series by month, day and hour
+    (a missing 29th of February falls back to the 28th), scaled by e.g. the `PvScalingFactor` of an instance.
+
+    Args:
+        pvgis: A normalized PVGIS frame with the columns `ds` and `power`.
+        prices: The (hourly) price series.
+        year: The PVGIS year to use.
+        scaling_factor: Factor applied to the (1 kWp) PV power.
+    """
+    ds = pd.to_datetime(pvgis["ds"])
+    selected = ds.dt.year == year
+    if not selected.any():
+        raise ValueError(f"No PVGIS data for {year}")
+    power = pd.Series(
+        pvgis.loc[selected, "power"].to_numpy(),
+        index=pd.MultiIndex.from_arrays([ds[selected].dt.month, ds[selected].dt.day, ds[selected].dt.hour]),
+    )
+    power = power[~power.index.duplicated()]
+
+    timestamps = prices.timestamps()
+    keys = pd.MultiIndex.from_arrays([timestamps.month, timestamps.day, timestamps.hour])
+    mapped = power.reindex(keys).to_numpy(dtype=np.float64, copy=True)
+    leap_day = np.isnan(mapped) & (timestamps.month == 2) & (timestamps.day == 29)
+    if leap_day.any():
+        fallback = pd.MultiIndex.from_arrays(
+            [timestamps.month[leap_day], np.full(leap_day.sum(), 28), timestamps.hour[leap_day]]
+        )
+        mapped[leap_day] = power.reindex(fallback).to_numpy()
+    return np.nan_to_num(mapped) * scaling_factor
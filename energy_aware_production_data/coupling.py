@@ -0,0 +1,205 @@
+"""
+Coupling of the scheduling instances with the PV data.
+
+For every instance the average number of running machines (total processing time over the best known makespan)
+is used to estimate a typical load for a given speed up. Dividing it by the peak power of the PVGIS series gives
+the `PvScalingFactor`, i.e. by how much the (1 kWp) PV data has to be scaled up to match the instance.
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.bounds import BoundsRegistry
+from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage
+from energy_aware_production_data.profiling import (
+    Profiler,
+    StageMetrics,
+    active_profiler,
+    stage,
+)
+
+# the columns identifying a row of `stats.csv`
+STATS_KEY = ["number_of_jobs", "number_of_stages", "instance", "typical_amplifier", "assumed_Wp_of_pv"]
+
+
+def instance_stats(
+    arrays: InstanceArrays,
+    best_known_makespan: int,
+    typical_amplifiers: Sequence[str],
+    assumed_Wp_of_pv: Sequence[float],
+) -> List[Dict]:
+    """
+    Calculates the coupling statistics of a single instance for every combination of typical amplifier and
+    assumed peak power of the PV system.
+    """
+    total_processing_time = int(arrays.processing_times.sum())
+    number_of_total_machines = arrays.number_of_machines
+    average_running_machines = total_processing_time / best_known_makespan
+
+    # all combinations at once: (amplifiers, peak powers)
+    amplifier_values = arrays.amplifier_values[[arrays.amplifier_index(a) for a in typical_amplifiers]]
+    typical_load = amplifier_values * average_running_machines
+    pv_scaling_factor = typical_load[:, None] / np.asarray(assumed_Wp_of_pv, dtype=np.float64)[None, :]
+
+    rows = []
+    for (a, amplifier), (w, wp) in product(enumerate(typical_amplifiers), enumerate(assumed_Wp_of_pv)):
+        rows.append(
+            {
+                "instance": arrays.instance,
+                "number_of_jobs": arrays.number_of_jobs,
+                "number_of_stages": arrays.number_of_stages,
+                "total_instance_size": arrays.number_of_jobs * arrays.number_of_stages,
+                "number_of_available_machines": number_of_total_machines,
+                "average_running_machines": average_running_machines,
+                "typical_load": float(typical_load[a]),
+                "assumed_Wp_of_pv": wp,
+                "pv_scaling_factor": float(pv_scaling_factor[a, w]),
+                "best_known_makespan": best_known_makespan,
+                "best_known_energy": arrays.best_known_energy,
+                "alpha": arrays.alpha,
+                "beta": arrays.beta,
+                "typical_amplifier": str(amplifier),
+                "total_processing_time": total_processing_time,
+            }
+        )
+    return rows
+
+
+def _couple_instance(args: Tuple[Path, str, BoundsRegistry, Sequence[str], Sequence[float]]) -> List[Dict]:
+    root, instance_id, bounds, typical_amplifiers, assumed_Wp_of_pv = args
+    dp = EnergyAwareSchedulingDataPackage(root)
+
+    with stage("read"):
+        data = json.loads(dp.read_instance_bytes(instance_id))
+        arrays = InstanceArrays.from_dict(data)
+
+    best_known_makespan = bounds.makespan(arrays.number_of_jobs, arrays.number_of_stages, arrays.instance)
+    if best_known_makespan is None:
+        raise ValueError(f"Instance {instance_id} not found in best known makespans.")
+
+    with stage("stats"):
+        rows = instance_stats(arrays, best_known_makespan, typical_amplifiers, assumed_Wp_of_pv)
+
+    # the first combination defines the scaling factor stored in the instance
+    pv_scaling_factor = round(rows[0]["pv_scaling_factor"], 3)
+    if data.get("PvScalingFactor") != pv_scaling_factor:
+        data["PvScalingFactor"] = pv_scaling_factor
+        with stage("write"):
+            dp.write_instance_bytes(instance_id, json.dumps(data).encode("utf-8"))
+
+    return rows
+
+
+def _profiled_couple_instance(args: Tuple) -> Tuple[List[Dict], Dict[str, StageMetrics]]:
+    # runs in a worker process, the metrics are merged into the profiler of the main process
+    *task, trace_memory = args
+    with Profiler(trace_memory=trace_memory) as profiler, profiler.stage("coupling"):
+        rows = _couple_instance(tuple(task))
+    return rows, profiler.stages
+
+
+def upsert_stats(stats_csv: Path, rows: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """
+    Merges the given rows into `stats.csv` (identified by `STATS_KEY`). Existing rows keep their position,
+    the file is only rewritten if at least one row was added or changed.
+
+    Returns:
+        The merged statistics and the number of added or changed rows.
+    """
+    if not stats_csv.exists():
+        rows = rows.reset_index(drop=True)
+        rows.to_csv(stats_csv)
+        return rows, len(rows)
+
+    existing = pd.read_csv(stats_csv, index_col=0)
+    # older files only contain a single combination and may miss key columns or use other dtypes
+    for column in rows.columns:
+        if column not in existing.columns:
+            existing[column] = np.nan
+    existing["typical_amplifier"] = existing["typical_amplifier"].astype(str)
+    rows = rows.astype({"typical_amplifier": str})
+
+    existing_keyed = existing.set_index(STATS_KEY)
+    rows_keyed = rows.set_index(STATS_KEY)[existing_keyed.columns.intersection(rows.columns)]
+
+    known = rows_keyed.index.isin(existing_keyed.index)
+    added = rows_keyed[~known]
+    updates = rows_keyed[known]
+
+    current = existing_keyed.loc[updates.index, updates.columns]
+    differs = ~np.isclose(
+        current.to_numpy(dtype=np.float64), updates.to_numpy(dtype=np.float64), rtol=1e-9, equal_nan=True
+    ).all(axis=1)
+    updates = updates[differs]
+
+    if len(added) == 0 and len(updates) == 0:
+        return existing, 0
+
+    existing_keyed.loc[updates.index, updates.columns] = updates
+    merged = pd.concat([existing_keyed, added]).reset_index()[existing.columns]
+    merged.to_csv(stats_csv)
+    return merged, len(added) + len(updates)
+
+
+def couple_with_pv(
+    data_package: EnergyAwareSchedulingDataPackage,
+    *,
+    typical_amplifiers: Iterable[str] = ("1.8",),
+    assumed_Wp_of_pv: Iterable[float] = (1000,),
+    max_workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Calculates the PV coupling statistics of all instances in parallel, stores the `PvScalingFactor` in the
+    instances and updates `stats.csv`.
+
+    Instance files are only rewritten if their `PvScalingFactor` changes and `stats.csv` only if a row changes.
+    The scaling factor stored in the instances is based on the first typical amplifier and peak power.
+
+    Args:
+        data_package: The data package to update.
+        typical_amplifiers: Speed factors (keys of `Amplifiers`) used to estimate the typical load.
+        assumed_Wp_of_pv: Assumed peak power of the PV system (in W) the PVGIS series is based on.
+        max_workers: Number of worker processes, `1` calculates everything in the current process.
+
+    Returns:
+        The statistics of all instances and combinations.
+    """
+    typical_amplifiers = [str(a) for a in typical_amplifiers]
+    assumed_Wp_of_pv = list(assumed_Wp_of_pv)
+    if not typical_amplifiers or not assumed_Wp_of_pv:
+        raise ValueError("At least one typical amplifier and assumed peak power is required")
+
+    # the literature bounds, improvements reported by solvers must not change the scaling factor
+    bounds = BoundsRegistry(data_package.scheduling_bounds)
+    tasks = [
+        (data_package.root, instance_id, bounds, typical_amplifiers, assumed_Wp_of_pv)
+        for instance_id in data_package.instance_ids()
+    ]
+
+    profiler = active_profiler()
+    if max_workers == 1:
+        with stage("coupling"):
+            results = [_couple_instance(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            chunksize = max(1, len(tasks) // 64)
+            if profiler is None:
+                results = list(executor.map(_couple_instance, tasks, chunksize=chunksize))
+            else:
+                tasks = [(*task, profiler.trace_memory) for task in tasks]
+                results = []
+                for rows, stages in executor.map(_profiled_couple_instance, tasks, chunksize=chunksize):
+                    results.append(rows)
+                    profiler.merge(stages)
+
+    rows = pd.DataFrame([row for instance_rows in results for row in instance_rows])
+    with stage("coupling/stats_csv"):
+        stats, _ = upsert_stats(data_package.scheduling_stats_csv, rows)
+    return stats
@@ -0,0 +1,105 @@
+"""
+PV coverage of power profiles for every city and start day of the PVGIS data in one call.
+
+For a profile `load` (hourly average power in W) started at day `d` in city `c` the following is computed:
+
+- `covered_energy`: `sum_t min(load[t], pv[c, start + t])`, the energy (Wh) of the load supplied by PV
+- `grid_import`: `sum_t load[t] - covered_energy`, the energy (Wh) bought from the grid
+- `pv_energy`: the energy (Wh) produced by PV while the profile runs
+- `self_consumption`: `covered_energy / pv_energy`, the share of the PV production used by the schedule
+- `coverage`: `covered_energy / sum_t load[t]`, the share of the load supplied by PV
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.profiles import sliding_covered
+from energy_aware_production_data.pvgis import PvgisSet
+
+
+@dataclass
+class CoverageMatrix:
+    """Coverage metrics, all arrays have the shape `(profiles, cities, start days)`."""
+
+    cities: List[str]
+    start_days: pd.DatetimeIndex
+    load_energy: np.ndarray
+    covered_energy: np.ndarray
+    pv_energy: np.ndarray
+
+    @property
+    def grid_import(self) -> np.ndarray:
+        return self.load_energy[:, None, None] - self.covered_energy
+
+    @property
+    def self_consumption(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.pv_energy > 0, self.covered_energy / self.pv_energy, 0.0)
+
+    @property
+    def coverage(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                self.load_energy[:, None, None] > 0, self.covered_energy / self.load_energy[:, None, None], 0.0
+            )
+
+    def to_frame(self, profile: int = 0) -> pd.DataFrame:
+        """The metrics of one profile as long table with one row per city and start day."""
+        index = pd.MultiIndex.from_product([self.cities, self.start_days], names=["city", "start"])
+        return pd.DataFrame(
+            {
+                "covered_energy": self.covered_energy[profile].ravel(),
+                "grid_import": self.grid_import[profile].ravel(),
+                "pv_energy": self.pv_energy[profile].ravel(),
+                "self_consumption": self.self_consumption[profile].ravel(),
+                "coverage": self.coverage[profile].ravel(),
+            },
+            index=index,
+        )
+
+
+def pv_coverage(
+    profiles: np.ndarray,
+    pvgis: PvgisSet,
+    *,
+    scaling_factor: float = 1.0,
+    start_hour: int = 0,
+) -> CoverageMatrix:
+    """
+    Evaluates one or more hourly power profiles against the PV production of every city, starting on every day of
+    the PVGIS series.
+
+    Args:
+        profiles: `(hours,)` or `(profiles, hours)` average power in W, e.g. `Schedule.power_profile(60)`.
+        pvgis: The PVGIS series (column `power`) of the cities, see `load_pvgis`.
+        scaling_factor: Factor applied to the (1 kWp) PV power, e.g. the `PvScalingFactor` of the instance.
+        start_hour: Hour of the day the profiles start at.
+
+    Returns:
+        The metrics for every profile, city and start day.
+    """
+    profiles = np.atleast_2d(np.asarray(profiles, dtype=np.float64))
+    pv = pvgis["power"][:, start_hour:] * scaling_factor
+    hours = profiles.shape[1]
+    days = max(0, (pv.shape[1] - hours) // 24 + 1)
+
+    # PV energy in every window from prefix sums
+    prefix = np.concatenate([np.zeros((len(pv), 1)), np.cumsum(pv, axis=1)], axis=1)
+    starts = np.arange(days) * 24
+    pv_energy = prefix[:, starts + hours] - prefix[:, starts]
+
+    covered = np.empty((len(profiles), len(pv), days))
+    for p, profile in enumerate(profiles):
+        for c, city_pv in enumerate(pv):
+            covered[p, c] = sliding_covered(profile, city_pv, stride=24)[:days]
+
+    return CoverageMatrix(
+        cities=list(pvgis.cities),
+        start_days=pvgis.days(start_hour)[:days],
+        load_energy=profiles.sum(axis=1),
+        covered_energy=covered,
+        pv_energy=np.broadcast_to(pv_energy, covered.shape),
+    )
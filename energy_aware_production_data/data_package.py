@@ -1,8 +1,31 @@
+"""
+Paths and file access of the data package.
+
+This module is imported by short lived worker processes which only need paths or the array form of the
+instances, so it must not import pydantic. The pydantic models of an instance are defined in
+`energy_aware_production_data.models` and are still accessible from here as lazy attributes.
+"""
+
+import io
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, BinaryIO, List
+
+if TYPE_CHECKING:
+    from energy_aware_production_data.models import ProblemInstance
+
+# pydantic models which are loaded on first access, see `__getattr__`
+_MODELS = ("Task", "Job", "Machine", "Stage", "ProblemInstance")
+
 
-from pydantic import BaseModel, Field
+def __getattr__(name: str):
+    if name in _MODELS:
+        from energy_aware_production_data import models
+
+        value = getattr(models, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @dataclass
@@ -19,10 +42,15 @@ class EnergyAwareSchedulingDataPackage:
     """
     This represents the structure of the data package. It is used to access the
     data files and directories. Generally, the data is split into two parts: PV and scheduling
+
+    The instances and PVGIS files may also be shipped zstd compressed, either file by file (`<name>.zst`)
+    or as a single archive per directory (`*.zpack`, see `energy_aware_production_data.compression`).
+    Use `read_instance_bytes` and `open_pvgis_csv` to access them regardless of the layout.
     """
 
     def __init__(self, root: Path):
         self.root = root
+        self._archives = {}
 
         # pv related fields
         self.pv = root / "pv"
@@ -34,6 +62,9 @@ class EnergyAwareSchedulingDataPackage:
         self.pv_mastr_industrial_solar = self.pv_meta / "mastr_industrial_solar.csv"
 
         self.pv_pvgis_data = self.pv / "pvgis_data"
+        self.pv_pvgis_archive = self.pv / "pvgis_data.zpack"
+        # daily, weekly and monthly aggregates of all cities (see `energy_aware_production_data.aggregates`)
+        self.pv_pvgis_aggregates = self.pv / "pvgis_aggregates.npz"
         self.pv_energy_prices = self.pv / "energy_prices_2024.csv"
 
         # scheduling
@@ -41,93 +72,117 @@ class EnergyAwareSchedulingDataPackage:
         self.scheduling_raw_input = self.scheduling / "raw_input"
         self.scheduling_instances = self.scheduling_raw_input / "instances"
         self.scheduling_bounds = self.scheduling_raw_input / "best_makespans.txt"
+        # improved bounds reported by solvers (see `energy_aware_production_data.bounds`)
+        self.scheduling_bounds_log = self.scheduling / "best_bounds.log"
         self.scheduling_json_instances = self.scheduling / "instances"
+        self.scheduling_instances_archive = self.scheduling / "instances.zpack"
+
+        # pareto fronts found for the instances, one `<instance id>.npz` each (see `energy_aware_production_data.pareto`)
+        self.scheduling_fronts = self.scheduling / "fronts"
 
         # schema for generating class files for different programming languages
         self.scheduling_schema_json = self.scheduling / "schema.json"
 
         # statistic about instance sizes and calculated parameters
         self.scheduling_stats_csv = self.scheduling / "stats.csv"
+        # results of solver runs (see `energy_aware_production_data.benchmark`)
+        self.scheduling_benchmarks = self.scheduling / "benchmarks"
+        # features of the instances for algorithm selection (see `energy_aware_production_data.features`)
+        self.scheduling_features = self.scheduling / "features.parquet"
 
         # parameters for creating instances
         self.scheduling_parameters_json = self.scheduling_json_instances / "parameters.json"
-
-
-class Task(BaseModel):
-    """
-    The Attributes of a single Task. The speed up is a dictionary where the keys represent processing times
-     and their associated energy costs.
-    """
-
-    id: int = Field(alias="Id")
-    stage: int = Field(alias="Stage")
-    processing_time: int = Field(alias="ProcessingTime")
-    # this keys will be strings (json enforces keys to be strings)
-    speed_up: Dict[Any, float] = Field(alias="SpeedUp")
-
-    class Config:
-        populate_by_name = True
-
-
-class Job(BaseModel):
-    """
-    The Attributes of a single Job. The tasks are represented as a list of Task objects.
-    """
-
-    id: int = Field(alias="Id")
-    tasks: List[Task] = Field(alias="Tasks")
-
-    class Config:
-        populate_by_name = True
-
-
-class Machine(BaseModel):
-    """
-    A machine is represented by its ID and the stage it belongs to.
-    The stage number is used to identify the machine's position in the production process.
-    """
-
-    machine_id: int = Field(alias="MachineId")
-    stage_number: int = Field(alias="StageNumber")
-
-    class Config:
-        populate_by_name = True
-
-
-class Stage(BaseModel):
-    """
-    A stage is represented by its ID and the list of machines that belong to it.
-    For the flow shop problem it is assumed a stage with an id smaller than another one
-    must be passed before getting to the next stage.
-    """
-
-    machines: List[Machine] = Field(alias="Machines")
-
-    class Config:
-        populate_by_name = True
-
-
-class ProblemInstance(BaseModel):
-    """
-    The whole problem instance. It contains meta data from the original
-    scheduling problem (number_of_jobs, number_of_stages, best_known_makespan, instance id) and the list of jobs and stages.
-    Additionally, it contains the amplifiers, alpha and beta values, which are used to
-    generate the energy consumption of the tasks. Finally, it contains a pv scaling factor
-    which tells you how many kWp of PV are expected to used for this instance.
-    """
-
-    number_of_jobs: int = Field(alias="NumberOfJobs")
-    number_of_stages: int = Field(alias="NumberOfStages")
-    instance: int = Field(alias="Instance")
-    # this keys will be strings (json enforces keys to be strings)
-    amplifiers: dict[Any, float] = Field(alias="Amplifiers")
-    alpha: float = Field(alias="Alpha")
-    beta: float = Field(alias="Beta")
-    pv_scaling_factor: float | None = Field(alias="PvScalingFactor", default=None)
-    best_known_makespan: int = Field(alias="BestKnownMakespan")
-    best_known_energy: int = Field(alias="BestKnownEnergy")
-    stage_list: List[Stage] = Field(alias="StageList")
-    job_list: List[Job] = Field(alias="JobList")
-
-    class Config:
-        populate_by_name = True
+        # timing and memory reports of the pipeline runs (see `energy_aware_production_data.profiling`)
+        self.scheduling_profile_json = self.scheduling_json_instances / "profile.json"
+
+    def _archive(self, path: Path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stat = None
+        # archives are replaced as a whole when they are rebuilt, a changed file is opened again
+        identity = None if stat is None else (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._archives.get(path)
+        if cached is not None and cached[0] != identity:
+            cached[1].close()
+            del self._archives[path]
+            cached = None
+        if identity is None:
+            return None
+        if cached is None:
+            from energy_aware_production_data.compression import ZstdArchive
+
+            cached = self._archives[path] = (identity, ZstdArchive(path))
+        return cached[1]
+
+    def _read_member(self, directory: Path, archive: Path, name: str) -> bytes:
+        plain = directory / name
+        if plain.exists():
+            return plain.read_bytes()
+
+        compressed = directory / (name + ".zst")
+        if compressed.exists():
+            from energy_aware_production_data.compression import decompress_file
+
+            return decompress_file(compressed)
+
+        opened = self._archive(archive)
+        if opened is not None and name in opened:
+            return opened.read(name)
+
+        raise FileNotFoundError(f"{name} not found in {directory} or {archive}")
+
+    def _member_names(self, directory: Path, archive: Path, suffix: str) -> List[str]:
+        names = {p.name for p in directory.glob(f"*{suffix}")}
+        names.update(p.name[: -len(".zst")] for p in directory.glob(f"*{suffix}.zst"))
+        opened = self._archive(archive)
+        if opened is not None:
+            names.update(name for name in opened.names() if name.endswith(suffix))
+        return sorted(names)
+
+    def instance_ids(self) -> List[str]:
+        """Returns the ids (file names without suffix) of all scheduling instances, independent of the layout."""
+        names = self._member_names(self.scheduling_json_instances, self.scheduling_instances_archive, ".json")
+        excluded = {self.scheduling_parameters_json.name, self.scheduling_profile_json.name}
+        return [name[: -len(".json")] for name in names if name not in excluded]
+
+    def read_instance_bytes(self, instance_id: str) -> bytes:
+        """Returns the raw JSON of a single instance, decompressing it if necessary."""
+        return self._read_member(
+            self.scheduling_json_instances, self.scheduling_instances_archive, f"{instance_id}.json"
+        )
+
+    def read_instance(self, instance_id: str) -> "ProblemInstance":
+        """Reads and validates a single instance."""
+        from energy_aware_production_data.models import ProblemInstance
+
+        return ProblemInstance.model_validate_json(self.read_instance_bytes(instance_id))
+
+    def read_instance_arrays(self, instance_id: str):
+        """Reads a single instance into the compact `InstanceArrays` form, skipping the pydantic validation."""
+        from energy_aware_production_data.arrays import InstanceArrays
+
+        return InstanceArrays.from_json(self.read_instance_bytes(instance_id))
+
+    def write_instance_bytes(self, instance_id: str, data: bytes):
+        """
+        Writes the raw JSON of a single instance. A per file compressed instance stays compressed, otherwise a
+        plain JSON file is written (which takes precedence over an archived version of the instance).
+        """
+        plain = self.scheduling_json_instances / f"{instance_id}.json"
+        compressed = plain.with_name(plain.name + ".zst")
+        if compressed.exists() and not plain.exists():
+            from energy_aware_production_data.compression import compress_bytes
+
+            compressed.write_bytes(compress_bytes(data))
+        else:
+            plain.write_bytes(data)
+
+    def pvgis_cities(self) -> List[str]:
+        """Returns the names of all cities with PVGIS data, independent of the layout."""
+        names = self._member_names(self.pv_pvgis_data, self.pv_pvgis_archive, ".csv")
+        return [name[: -len(".csv")] for name in names]
+
+    def open_pvgis_csv(self, city: str) -> BinaryIO:
+        """Returns the (decompressed) PVGIS csv of a city as binary stream, e.g. for `pd.read_csv`."""
+        return io.BytesIO(self._read_member(self.pv_pvgis_data, self.pv_pvgis_archive, f"{city}.csv"))
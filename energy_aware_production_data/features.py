@@ -0,0 +1,187 @@
+"""
+Instance features for algorithm selection and learning guided search.
+
+Every instance is described by the same fixed feature vector (see `FEATURE_NAMES`), calculated from the array
+form. The features of all instances are stored as a parquet table keyed by instance id next to `stats.csv`,
+together with a hash of the instance JSON, so only new or changed instances are recalculated.
+"""
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage
+
+FEATURE_NAMES = [
+    # size
+    "number_of_jobs",
+    "number_of_stages",
+    "number_of_machines",
+    "machines_per_job",
+    "machines_per_stage_mean",
+    "machines_per_stage_min",
+    "machines_per_stage_max",
+    # processing times
+    "processing_time_mean",
+    "processing_time_std",
+    "processing_time_min",
+    "processing_time_max",
+    "processing_time_cv",
+    "stage_mean_cv",
+    "job_total_cv",
+    # load per machine of each stage, the bottleneck is the stage with the highest load
+    "stage_load_mean",
+    "stage_load_max",
+    "bottleneck_ratio",
+    "bottleneck_position",
+    "lower_bound",
+    "best_known_makespan",
+    "makespan_over_lower_bound",
+    # speed up table
+    "alpha",
+    "beta",
+    "max_speed",
+    "max_energy_ratio",
+    "amplifier_log_slope",
+    "amplifier_curvature",
+    "clashing_speed_ups",
+    # pv
+    "pv_scaling_factor",
+]
+
+
+def _coefficient_of_variation(values: np.ndarray) -> float:
+    mean = values.mean()
+    return float(values.std() / mean) if mean else 0.0
+
+
+def instance_features(arrays: InstanceArrays) -> np.ndarray:
+    """Calculates the feature vector (ordered as `FEATURE_NAMES`) of a single instance."""
+    pt = arrays.processing_times.astype(np.float64)
+    machines = arrays.machines_per_stage.astype(np.float64)
+    J, S = pt.shape
+
+    stage_load = pt.sum(axis=0) / machines
+    bottleneck = int(np.argmax(stage_load))
+
+    # every stage has to process all jobs, at least one job has to reach it and leave it afterwards
+    head = np.concatenate([np.zeros((J, 1)), np.cumsum(pt, axis=1)[:, :-1]], axis=1)
+    tail = np.concatenate([np.cumsum(pt[:, ::-1], axis=1)[:, ::-1][:, 1:], np.zeros((J, 1))], axis=1)
+    lower_bound = float(np.max(stage_load + head.min(axis=0) + tail.min(axis=0)))
+
+    speeds, amplifiers = arrays.amplifier_speeds, arrays.amplifier_values
+    if len(speeds) > 1:
+        slope = float(np.polyfit(np.log(speeds), np.log(amplifiers), 1)[0])
+        curvature = float(np.diff(amplifiers, 2).mean() / amplifiers[0]) if len(speeds) > 2 else 0.0
+    else:
+        slope, curvature = 0.0, 0.0
+
+    features = {
+        "number_of_jobs": J,
+        "number_of_stages": S,
+        "number_of_machines": machines.sum(),
+        "machines_per_job": machines.sum() / J,
+        "machines_per_stage_mean": machines.mean(),
+        "machines_per_stage_min": machines.min(),
+        "machines_per_stage_max": machines.max(),
+        "processing_time_mean": pt.mean(),
+        "processing_time_std": pt.std(),
+        "processing_time_min": pt.min(),
+        "processing_time_max": pt.max(),
+        "processing_time_cv": _coefficient_of_variation(pt),
+        "stage_mean_cv": _coefficient_of_variation(pt.mean(axis=0)),
+        "job_total_cv": _coefficient_of_variation(pt.sum(axis=1)),
+        "stage_load_mean": stage_load.mean(),
+        "stage_load_max": stage_load[bottleneck],
+        "bottleneck_ratio": stage_load[bottleneck] / stage_load.mean(),
+        "bottleneck_position": bottleneck / (S - 1) if S > 1 else 0.0,
+        "lower_bound": lower_bound,
+        "best_known_makespan": arrays.best_known_makespan,
+        "makespan_over_lower_bound": arrays.best_known_makespan / lower_bound,
+        "alpha": arrays.alpha,
+        "beta": arrays.beta,
+        "max_speed": speeds[-1] / speeds[0],
+        "max_energy_ratio": amplifiers[-1] / amplifiers[0],
+        "amplifier_log_slope": slope,
+        "amplifier_curvature": curvature,
+        "clashing_speed_ups": 1 - arrays.speed_up_counts.mean() / arrays.speed_up_times.shape[2],
+        "pv_scaling_factor": np.nan if arrays.pv_scaling_factor is None else arrays.pv_scaling_factor,
+    }
+    return np.array([features[name] for name in FEATURE_NAMES], dtype=np.float64)
+
+
+def _signature(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _features_of_instances(args: Tuple[Path, List[str]]) -> List[Tuple[str, str, np.ndarray]]:
+    root, instance_ids = args
+    dp = EnergyAwareSchedulingDataPackage(root)
+    results = []
+    for instance_id in instance_ids:
+        data = dp.read_instance_bytes(instance_id)
+        results.append((instance_id, _signature(data), instance_features(InstanceArrays.from_json(data))))
+    return results
+
+
+def compute_features(
+    data_package: EnergyAwareSchedulingDataPackage,
+    *,
+    use_cache: bool = True,
+    max_workers: int | None = None,
+    chunk_size: int = 16,
+) -> pd.DataFrame:
+    """
+    Calculates the features of all instances in parallel and updates the feature table
+    (`EnergyAwareSchedulingDataPackage.scheduling_features`).
+
+    Args:
+        data_package: The data package.
+        use_cache: Reuse the stored features of instances whose JSON did not change.
+        max_workers: Number of worker processes, `1` calculates everything in the current process.
+        chunk_size: Number of instances handled by a worker at once.
+
+    Returns:
+        The features indexed by instance id (and the `signature` of the instance JSON).
+    """
+    instance_ids = data_package.instance_ids()
+    cache_path = data_package.scheduling_features
+
+    cached = None
+    outdated = instance_ids
+    if use_cache and cache_path.exists():
+        cached = pd.read_parquet(cache_path)
+        if list(cached.columns) != ["signature", *FEATURE_NAMES]:
+            # the feature set changed, everything has to be recalculated
+            cached = None
+        else:
+            known = cached["signature"].to_dict()
+            outdated = [i for i in instance_ids if known.get(i) != _signature(data_package.read_instance_bytes(i))]
+
+    chunks = [(data_package.root, outdated[i : i + chunk_size]) for i in range(0, len(outdated), chunk_size)]
+    if max_workers == 1:
+        results = [row for chunk in chunks for row in _features_of_instances(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = [row for rows in executor.map(_features_of_instances, chunks) for row in rows]
+
+    computed = pd.DataFrame(
+        np.array([vector for _, _, vector in results]).reshape(len(results), len(FEATURE_NAMES)),
+        index=pd.Index([instance_id for instance_id, _, _ in results], name="instance_id"),
+        columns=FEATURE_NAMES,
+    )
+    computed.insert(0, "signature", [signature for _, signature, _ in results])
+
+    if cached is not None:
+        if not results and cached.index.equals(pd.Index(instance_ids)):
+            return cached
+        computed = pd.concat([cached.drop(index=outdated, errors="ignore"), computed])
+
+    features = computed.loc[instance_ids]
+    features.to_parquet(cache_path)
+    return features
@@ -1,15 +1,22 @@
+import warnings
 from pathlib import Path
 
 
 def read_makespan_file(filepath: Path):
+    """
+    Reads the best known makespans keyed by `(jobs, stages, instance)` string tuples.
+    See `energy_aware_production_data.bounds.BoundsRegistry` for an indexed version which also tracks improvements.
+    """
     best_known_makespans = {}
 
     with open(filepath, "r") as file:
-        for line in file:
+        for line_number, line in enumerate(file, start=1):
             parts = line.strip().split()
             if len(parts) == 4:
                 key = (parts[0], parts[1], parts[2])
                 value = int(parts[3])
                 best_known_makespans[key] = value
+            elif parts:
+                warnings.warn(f"{filepath}:{line_number}: skipping malformed line {line.strip()!r}")
 
     return best_known_makespans
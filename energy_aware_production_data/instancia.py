@@ -0,0 +1,114 @@
+"""
+Parser of the raw benchmark instances (`scheduling/raw_input/instances/instancia_<jobs>_<stages>_<instance>.txt`).
+
+The files consist of
+
+- a line with the number of jobs and the number of stages,
+- a line with the number of machines of every stage,
+- one line per stage with the processing times of all jobs.
+
+All numbers after the header lines are parsed in one call (`np.fromstring`) and only reshaped afterwards, so the
+parser does not create Python objects per number and handles instances far bigger than the shipped ones. The
+layout of the rows is checked on the raw bytes as well.
+"""
+
+import re
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+_FILE_NAME = re.compile(r"instancia_(\d+)_(\d+)_(\d+)\.txt$")
+
+
+@dataclass
+class RawInstance:
+    number_of_jobs: int
+    number_of_stages: int
+    # (stages,) number of machines per stage
+    machines_per_stage: np.ndarray
+    # (jobs, stages) nominal processing times
+    processing_times: np.ndarray
+
+
+def instance_id_from_path(path: Path) -> str:
+    """The instance id (`<jobs>_<stages>_<instance>`) of a raw instance file."""
+    match = _FILE_NAME.search(Path(path).name)
+    if match is None:
+        raise ValueError(f"{path} is not named like instancia_<jobs>_<stages>_<instance>.txt")
+    return "_".join(match.groups())
+
+
+def _values_per_row(body: str) -> np.ndarray:
+    """Number of values in every non-empty line, counted on the raw bytes without splitting the lines."""
+    characters = np.frombuffer(body.encode("ascii"), dtype=np.uint8)
+    space = np.isin(characters, np.frombuffer(b" \t\r\n\v\f", dtype=np.uint8))
+    value_starts = ~space & np.concatenate([[True], space[:-1]])
+    line = np.cumsum(characters == ord("\n"))
+    per_line = np.bincount(line[value_starts], minlength=line[-1] + 1 if len(line) else 0)
+    return per_line[per_line > 0]
+
+
+def parse_instancia(text: str | bytes, source: str = "<string>") -> RawInstance:
+    """
+    Parses the content of a raw instance file.
+
+    Raises:
+        ValueError: If the header does not match the layout of the processing times (one row of all jobs per stage)
+            or a value is not an integer.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("ascii")
+    first, second, body = (text.lstrip().split("\n", 2) + ["", ""])[:3]
+
+    header = first.split()
+    if len(header) != 2:
+        raise ValueError(f"{source}: expected the number of jobs and stages in the first line, got {first!r}")
+    number_of_jobs, number_of_stages = int(header[0]), int(header[1])
+    machines_per_stage = np.array(second.split(), dtype=np.int64)
+    if len(machines_per_stage) != number_of_stages:
+        raise ValueError(
+            f"{source}: expected the machines of {number_of_stages} stages in the second line, "
+            f"got {len(machines_per_stage)} values"
+        )
+    if (machines_per_stage <= 0).any():
+        raise ValueError(f"{source}: every stage needs at least one machine")
+
+    try:
+        with warnings.catch_warnings():
+            # `fromstring` stops at the first value it can not parse, older numpy versions only warn
+            warnings.simplefilter("error", DeprecationWarning)
+            values = np.fromstring(body, dtype=np.int64, sep=" ") if body.strip() else np.empty(0, dtype=np.int64)
+    except (DeprecationWarning, ValueError):
+        raise ValueError(f"{source}: the processing times have to be integers") from None
+    if len(values) != number_of_jobs * number_of_stages:
+        raise ValueError(
+            f"{source}: expected {number_of_stages} x {number_of_jobs} processing times, got {len(values)} values"
+        )
+    values_per_row = _values_per_row(body)
+    if len(values_per_row) != number_of_stages or (values_per_row != number_of_jobs).any():
+        raise ValueError(
+            f"{source}: expected {number_of_stages} rows of {number_of_jobs} processing times, "
+            f"got rows of {values_per_row.tolist()} values"
+        )
+
+    # the rows of the file are the stages
+    return RawInstance(
+        number_of_jobs=number_of_jobs,
+        number_of_stages=number_of_stages,
+        machines_per_stage=machines_per_stage,
+        processing_times=np.ascontiguousarray(values.reshape(number_of_stages, number_of_jobs).T),
+    )
+
+
+def read_instancia(path: Path) -> RawInstance:
+    """Reads and parses a raw instance file."""
+    return parse_instancia(Path(path).read_bytes(), source=str(path))
+
+
+def format_instancia(raw: RawInstance) -> str:
+    """Formats an instance in the raw format, e.g. to write synthetic instances."""
+    lines = [f"{raw.number_of_jobs} {raw.number_of_stages}", " ".join(map(str, raw.machines_per_stage.tolist()))]
+    lines.extend(" ".join(map(str, row)) for row in raw.processing_times.T.tolist())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,343 @@
+"""
+Reference MILP of the energy aware hybrid flow shop (disjunctive formulation).
+
+Variables (`j` job, `s` stage, `m` machine of stage `s`, `k` speed up option of the task):
+
+- `z[j, s, k]` binary, the speed up option chosen for the task
+- `y[j, s, m]` binary, the machine the task is processed on
+- `o[i, j, s]` binary for `i < j`, job `i` is processed before job `j` at stage `s` (if on the same machine)
+- `S[j, s]` continuous start time and `C` the makespan
+
+Constraints:
+
+- one speed and one machine per task
+- `S[j, s + 1] >= S[j, s] + P[j, s]` with `P[j, s] = sum_k z[j, s, k] * d[j, s, k]`
+- `C >= S[j, last] + P[j, last]`
+- for each pair of jobs `i < j` and each machine `m` of a stage, either `i` precedes `j` or the other way round,
+  relaxed with a big M when they are not both assigned to `m`
+
+The objective is `makespan_weight * C + energy_weight * sum z * d * power`, optionally with an upper bound on
+the makespan. All constraints are generated with vectorized index arithmetic into a sparse matrix, which can be
+solved directly with HiGHS (via `scipy.optimize.milp`) or written as a free MPS file for other solvers.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+
+from energy_aware_production_data.arrays import InstanceArrays
+
+
+@dataclass
+class MilpModel:
+    """
+    A MILP in the form `min c @ x` subject to `row_lower <= A @ x <= row_upper`, `lower <= x <= upper`.
+    `integrality` is `1` for binary/integer variables and `0` for continuous ones.
+    """
+
+    c: np.ndarray
+    A: sp.csr_matrix
+    row_lower: np.ndarray
+    row_upper: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    integrality: np.ndarray
+    # name -> slice of the variables in `x`, e.g. "z", "y", "o", "S", "C"
+    blocks: Dict[str, slice]
+    # shapes of the variable blocks (the order pairs "o" are flattened)
+    shapes: Dict[str, tuple]
+
+    @property
+    def number_of_variables(self) -> int:
+        return len(self.c)
+
+    @property
+    def number_of_constraints(self) -> int:
+        return self.A.shape[0]
+
+    def variable(self, name: str, x: np.ndarray) -> np.ndarray:
+        """Extracts and reshapes a block of variables from a solution vector."""
+        return x[self.blocks[name]].reshape(self.shapes[name])
+
+    def solve(self, *, time_limit: float | None = None, mip_rel_gap: float | None = None, disp: bool = False):
+        """Solves the model with HiGHS. Returns the `scipy.optimize.OptimizeResult`."""
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        options = {"disp": disp}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+        if mip_rel_gap is not None:
+            options["mip_rel_gap"] = mip_rel_gap
+        return milp(
+            self.c,
+            constraints=LinearConstraint(self.A, self.row_lower, self.row_upper),
+            integrality=self.integrality,
+            bounds=Bounds(self.lower, self.upper),
+            options=options,
+        )
+
+    def write_mps(self, path: Path, name: str = "EASP"):
+        """Writes the model as free MPS file (ranged rows are expressed with `RANGES`)."""
+        lower, upper = self.row_lower, self.row_upper
+        equal = lower == upper
+        has_lower, has_upper = np.isfinite(lower), np.isfinite(upper)
+        row_types = np.where(equal, "E", np.where(has_lower, "G", np.where(has_upper, "L", "N")))
+        rhs = np.where(has_lower, lower, np.where(has_upper, upper, 0.0))
+        ranged = has_lower & has_upper & ~equal
+
+        rows = np.char.add("R", np.arange(self.number_of_constraints).astype(str))
+        columns = np.char.add("X", np.arange(self.number_of_variables).astype(str))
+
+        def join(*parts) -> np.ndarray:
+            result = parts[0]
+            for part in parts[1:]:
+                result = np.char.add(result, part)
+            return result
+
+        lines: List[str] = [f"NAME {name}", "ROWS", " N OBJ"]
+        lines.extend(join(" ", row_types, " ", rows).tolist())
+
+        # matrix and objective entries, grouped by column
+        A = self.A.tocsc()
+        entry_columns = np.repeat(np.arange(self.number_of_variables), np.diff(A.indptr))
+        objective = np.flatnonzero(self.c)
+        entry_columns = np.concatenate([objective, entry_columns])
+        entries = np.concatenate(
+            [
+                join(" ", columns[objective], " OBJ ", self.c[objective].astype(str)),
+                join(" ", columns[entry_columns[len(objective) :]], " ", rows[A.indices], " ", A.data.astype(str)),
+            ]
+        )
+        order = np.argsort(entry_columns, kind="stable")
+        entries, entry_columns = entries[order], entry_columns[order]
+
+        # integer variables are wrapped in markers, one marker pair per consecutive run of integer columns
+        lines.append("COLUMNS")
+        integer = self.integrality.astype(bool)
+        changes = np.flatnonzero(np.diff(integer.astype(np.int8))) + 1
+        run_starts = np.concatenate([[0], changes])
+        run_ends = np.concatenate([changes, [self.number_of_variables]])
+        entry_bounds = np.searchsorted(entry_columns, np.concatenate([run_starts, run_ends[-1:]]))
+        for run, (first, last) in enumerate(zip(entry_bounds[:-1], entry_bounds[1:])):
+            is_integer = integer[run_starts[run]]
+            if is_integer:
+                lines.append(" MARKER 'MARKER' 'INTORG'")
+            lines.extend(entries[first:last].tolist())
+            if is_integer:
+                lines.append(" MARKER 'MARKER' 'INTEND'")
+
+        lines.append("RHS")
+        nonzero = np.flatnonzero(rhs != 0)
+        lines.extend(join(" RHS ", rows[nonzero], " ", rhs[nonzero].astype(str)).tolist())
+
+        if ranged.any():
+            lines.append("RANGES")
+            ranges = np.flatnonzero(ranged)
+            lines.extend(join(" RNG ", rows[ranges], " ", (upper - lower)[ranges].astype(str)).tolist())
+
+        lines.append("BOUNDS")
+        binary = integer & (self.lower == 0) & (self.upper == 1)
+        fixed = ~binary & (self.lower == self.upper)
+        free = ~binary & ~fixed
+        shifted = free & (self.lower != 0)
+        bounded = free & np.isfinite(self.upper)
+        bounds = [
+            join(" BV BND ", columns[binary]),
+            join(" FX BND ", columns[fixed], " ", self.lower[fixed].astype(str)),
+            join(" MI BND ", columns[shifted & ~np.isfinite(self.lower)]),
+            join(
+                " LO BND ",
+                columns[shifted & np.isfinite(self.lower)],
+                " ",
+                self.lower[shifted & np.isfinite(self.lower)].astype(str),
+            ),
+            join(" UP BND ", columns[bounded], " ", self.upper[bounded].astype(str)),
+        ]
+        for block in bounds:
+            lines.extend(block.tolist())
+        lines.append("ENDATA")
+
+        path.write_text("\n".join(lines) + "\n")
+
+
+class _RowBuilder:
+    """Collects constraint rows as COO triplets, one block of rows at a time."""
+
+    def __init__(self):
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.vals: List[np.ndarray] = []
+        self.lower: List[np.ndarray] = []
+        self.upper: List[np.ndarray] = []
+        self.count = 0
+
+    def add(self, terms, lower, upper, number_of_rows: int):
+        """
+        Adds `number_of_rows` rows. `terms` are `(row offsets, columns, values)` with row offsets relative to
+        the block, all arrays are broadcast against each other.
+        """
+        for rows, cols, vals in terms:
+            rows, cols, vals = np.broadcast_arrays(rows, cols, vals)
+            self.rows.append(rows.ravel() + self.count)
+            self.cols.append(cols.ravel())
+            self.vals.append(vals.ravel().astype(np.float64))
+        self.lower.append(np.broadcast_to(np.asarray(lower, dtype=np.float64), (number_of_rows,)))
+        self.upper.append(np.broadcast_to(np.asarray(upper, dtype=np.float64), (number_of_rows,)))
+        self.count += number_of_rows
+
+    def matrix(self, number_of_variables: int) -> sp.csr_matrix:
+        return sp.csr_matrix(
+            (np.concatenate(self.vals), (np.concatenate(self.rows), np.concatenate(self.cols))),
+            shape=(self.count, number_of_variables),
+        )
+
+
+def build_milp(
+    arrays: InstanceArrays,
+    *,
+    makespan_weight: float = 1.0,
+    energy_weight: float = 0.0,
+    makespan_limit: float | None = None,
+    big_m: float | None = None,
+) -> MilpModel:
+    """
+    Builds the disjunctive MILP of an instance.
+
+    Args:
+        arrays: The instance in array form.
+        makespan_weight: Weight of the makespan in the objective.
+        energy_weight: Weight of the total energy in the objective.
+        makespan_limit: Optional upper bound on the makespan (e.g. to minimize energy for a given makespan).
+        big_m: The big M of the disjunctive constraints, defaults to the sum of all nominal processing times.
+
+    Returns:
+        The model in sparse matrix form.
+    """
+    J, S, K = arrays.speed_up_times.shape
+    machines = arrays.machines_per_stage
+    M_max = int(machines.max())
+    durations = arrays.speed_up_times.astype(np.float64)
+    energy = arrays.speed_up_energy
+    big_m = float(arrays.speed_up_times.max(axis=2).sum()) if big_m is None else float(big_m)
+    horizon = big_m if makespan_limit is None else min(big_m, float(makespan_limit))
+
+    # variable layout, y is allocated for the largest stage and fixed to 0 for missing machines
+    pairs_i, pairs_j = np.triu_indices(J, k=1)
+    P = len(pairs_i)
+    sizes = {"z": J * S * K, "y": J * S * M_max, "o": P * S, "S": J * S, "C": 1}
+    shapes = {"z": (J, S, K), "y": (J, S, M_max), "o": (P, S), "S": (J, S), "C": (1,)}
+    blocks, offset = {}, 0
+    for name, size in sizes.items():
+        blocks[name] = slice(offset, offset + size)
+        offset += size
+    n = offset
+
+    z = np.arange(sizes["z"]).reshape(J, S, K) + blocks["z"].start
+    y = np.arange(sizes["y"]).reshape(J, S, M_max) + blocks["y"].start
+    o = np.arange(sizes["o"]).reshape(P, S) + blocks["o"].start
+    start = np.arange(sizes["S"]).reshape(J, S) + blocks["S"].start
+    makespan = blocks["C"].start
+
+    lower = np.zeros(n)
+    upper = np.ones(n)
+    upper[blocks["S"]] = horizon
+    upper[makespan] = horizon
+    machine_exists = np.arange(M_max)[None, :] < machines[:, None]  # (S, M_max)
+    upper[y[:, ~machine_exists]] = 0
+    # padded speed up options are duplicates, forbid them to keep the model small
+    option_exists = np.arange(K)[None, None, :] < arrays.speed_up_counts[:, :, None]
+    upper[z[~option_exists]] = 0
+    integrality = np.ones(n, dtype=np.int64)
+    integrality[blocks["S"]] = 0
+    integrality[makespan] = 0
+
+    c = np.zeros(n)
+    c[makespan] = makespan_weight
+    c[blocks["z"]] = energy_weight * energy.ravel()
+
+    rows = _RowBuilder()
+    task_rows = np.arange(J * S).reshape(J, S)
+
+    # one speed and one machine per task
+    rows.add([(task_rows[:, :, None], z, 1.0)], 1, 1, J * S)
+    rows.add([(task_rows[:, :, None], y, 1.0)], 1, 1, J * S)
+
+    # job precedences: S[j, s + 1] - S[j, s] - P[j, s] >= 0
+    if S > 1:
+        precedence_rows = np.arange(J * (S - 1)).reshape(J, S - 1)
+        rows.add(
+            [
+                (precedence_rows, start[:, 1:], 1.0),
+                (precedence_rows, start[:, :-1], -1.0),
+                (precedence_rows[:, :, None], z[:, :-1, :], -durations[:, :-1, :]),
+            ],
+            0,
+            np.inf,
+            J * (S - 1),
+        )
+
+    # makespan: C - S[j, last] - P[j, last] >= 0
+    job_rows = np.arange(J)
+    rows.add(
+        [
+            (job_rows, makespan, 1.0),
+            (job_rows, start[:, -1], -1.0),
+            (job_rows[:, None], z[:, -1, :], -durations[:, -1, :]),
+        ],
+        0,
+        np.inf,
+        J,
+    )
+
+    # disjunctions for every pair (i < j), stage and machine of that stage
+    if P:
+        stage_index, machine_index = np.nonzero(machine_exists)
+        D = len(stage_index)
+        pair_rows = np.arange(P * D).reshape(P, D)
+        si, mi = stage_index[None, :], machine_index[None, :]
+        i, j = pairs_i[:, None], pairs_j[:, None]
+        order = o[:, stage_index]
+
+        # i before j: S_j - S_i - P_i - M o - M y_i - M y_j >= -3M
+        rows.add(
+            [
+                (pair_rows, start[j, si], 1.0),
+                (pair_rows, start[i, si], -1.0),
+                (pair_rows[:, :, None], z[i, si, :], -durations[i, si, :]),
+                (pair_rows, order, -big_m),
+                (pair_rows, y[i, si, mi], -big_m),
+                (pair_rows, y[j, si, mi], -big_m),
+            ],
+            -3 * big_m,
+            np.inf,
+            P * D,
+        )
+        # j before i: S_i - S_j - P_j + M o - M y_i - M y_j >= -2M
+        rows.add(
+            [
+                (pair_rows, start[i, si], 1.0),
+                (pair_rows, start[j, si], -1.0),
+                (pair_rows[:, :, None], z[j, si, :], -durations[j, si, :]),
+                (pair_rows, order, big_m),
+                (pair_rows, y[i, si, mi], -big_m),
+                (pair_rows, y[j, si, mi], -big_m),
+            ],
+            -2 * big_m,
+            np.inf,
+            P * D,
+        )
+
+    return MilpModel(
+        c=c,
+        A=rows.matrix(n),
+        row_lower=np.concatenate(rows.lower),
+        row_upper=np.concatenate(rows.upper),
+        lower=lower,
+        upper=upper,
+        integrality=integrality,
+        blocks=blocks,
+        shapes=shapes,
+    )
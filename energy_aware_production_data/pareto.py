@@ -0,0 +1,412 @@
+"""
+Archives of non-dominated solutions (all objectives are minimized), e.g. makespan vs. energy vs. grid usage.
+
+- `ParetoFront2D` keeps the front sorted by the first objective, dominance checks are a binary search.
+- `ParetoFrontND` is an ND-Tree (Jaszkiewicz & Lust, 2018): points are clustered in a tree whose nodes store
+  the ideal and nadir point of their subtree, so most of the archive is skipped when checking dominance.
+
+Both archives can compute their hypervolume (see `hypervolume`) and are stored as `.npz` files, by convention next
+to the instances in `EnergyAwareSchedulingDataPackage.scheduling_fronts`.
+"""
+
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+
+def _weakly_dominates(a: Sequence[float], b: Sequence[float]) -> bool:
+    return all(x <= y for x, y in zip(a, b))
+
+
+def non_dominated_2d(points: np.ndarray) -> np.ndarray:
+    """Returns the non-dominated points of a `(n, 2)` array sorted by the first objective (duplicates removed)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) == 0:
+        return points
+    points = points[np.lexsort((points[:, 1], points[:, 0]))]
+    # a point survives if it is strictly better in the second objective than everything before it
+    best_before = np.minimum.accumulate(np.concatenate([[np.inf], points[:-1, 1]]))
+    return points[points[:, 1] < best_before]
+
+
+def hypervolume_2d(points: np.ndarray, reference: Sequence[float]) -> float:
+    """Hypervolume of `(n, 2)` points with respect to a reference point (points beyond it are ignored)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    points = non_dominated_2d(points[np.all(points < np.asarray(reference), axis=1)])
+    if len(points) == 0:
+        return 0.0
+    widths = np.diff(np.append(points[:, 0], reference[0]))
+    return float(np.sum(widths * (reference[1] - points[:, 1])))
+
+
+def hypervolume_3d(points: np.ndarray, reference: Sequence[float]) -> float:
+    """
+    Hypervolume of `(n, 3)` points with respect to a reference point. Sweeps along the third objective and
+    maintains the dominated area of the first two objectives incrementally, i.e. O(n log n) plus list updates.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    points = points[np.all(points < np.asarray(reference), axis=1)]
+    if len(points) == 0:
+        return 0.0
+    points = points[np.argsort(points[:, 2], kind="stable")]
+    rx, ry, rz = (float(r) for r in reference)
+
+    xs: List[float] = []
+    ys: List[float] = []
+    area = 0.0
+    volume = 0.0
+    for i, (x, y, z) in enumerate(points.tolist()):
+        if i > 0:
+            volume += area * (z - points[i - 1, 2])
+
+        position = bisect_right(xs, x)
+        if position > 0 and ys[position - 1] <= y:
+            continue
+
+        # area currently dominated within [x, x_right), replaced by the new point
+        start = bisect_left(xs, x)
+        end = start
+        while end < len(xs) and ys[end] >= y:
+            end += 1
+        x_right = xs[end] if end < len(xs) else rx
+
+        segment_start = x
+        previous_height = ry - ys[start - 1] if start > 0 else 0.0
+        before = 0.0
+        for k in range(start, end):
+            before += (xs[k] - segment_start) * previous_height
+            segment_start, previous_height = xs[k], ry - ys[k]
+        before += (x_right - segment_start) * previous_height
+
+        area += (x_right - x) * (ry - y) - before
+        xs[start:end] = [x]
+        ys[start:end] = [y]
+
+    volume += area * (rz - points[-1, 2])
+    return volume
+
+
+def hypervolume(points: np.ndarray, reference: Sequence[float]) -> float:
+    """
+    Hypervolume of `(n, d)` points with respect to a reference point for any number of objectives.
+
+    Two and three objectives use `hypervolume_2d` and `hypervolume_3d`. More objectives are sliced along the last
+    one, every slice is the hypervolume of the points below it in one objective less, so the runtime grows as
+    O(n^(d - 2) log n), which is fine for the archives of a few thousand points with four or five objectives.
+    """
+    dimensions = len(reference)
+    if dimensions == 2:
+        return hypervolume_2d(points, reference)
+    if dimensions == 3:
+        return hypervolume_3d(points, reference)
+    if dimensions < 2:
+        raise ValueError("The hypervolume needs at least two objectives")
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, dimensions)
+    points = points[np.all(points < np.asarray(reference), axis=1)]
+    points = points[np.argsort(points[:, -1], kind="stable")]
+    bounds = np.append(points[1:, -1], reference[-1])
+    volume = 0.0
+    for i, height in enumerate((bounds - points[:, -1]).tolist()):
+        if height > 0:
+            volume += hypervolume(points[: i + 1, :-1], reference[:-1]) * height
+    return volume
+
+
+class ParetoFront2D:
+    """
+    Front of two objectives, sorted by the first (and therefore descending in the second) objective.
+
+    The points are kept in blocks of at most `2 * block_size` points (like a `sortedcontainers.SortedList`), so a
+    dominance check is two binary searches and an insertion only shifts the points of one block, i.e. O(log n +
+    block_size). Removing dominated points is amortized by their insertion.
+
+    Args:
+        block_size: Target number of points per block.
+    """
+
+    dimensions = 2
+
+    def __init__(self, points: Iterable[Sequence[float]] = (), *, block_size: int = 256):
+        self.block_size = block_size
+        self._xs: List[List[float]] = []
+        self._ys: List[List[float]] = []
+        # the last (largest) first objective of every block
+        self._maxes: List[float] = []
+        self._size = 0
+        self.extend(points)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def dominated(self, point: Sequence[float]) -> bool:
+        """Checks whether the point is dominated by (or equal to) a point of the front."""
+        x, y = point
+        # the last point with a first objective <= x has the smallest second objective of all of them
+        block = bisect_right(self._maxes, x)
+        if block < len(self._xs):
+            position = bisect_right(self._xs[block], x)
+            if position > 0:
+                return self._ys[block][position - 1] <= y
+        return block > 0 and self._ys[block - 1][-1] <= y
+
+    def insert(self, point: Sequence[float]) -> bool:
+        """Adds the point if it is not dominated and removes the points it dominates. Returns `True` if added."""
+        x, y = float(point[0]), float(point[1])
+        if self.dominated((x, y)):
+            return False
+
+        if not self._xs:
+            self._xs.append([x])
+            self._ys.append([y])
+            self._maxes.append(x)
+            self._size = 1
+            return True
+
+        block = min(bisect_left(self._maxes, x), len(self._xs) - 1)
+        xs, ys = self._xs[block], self._ys[block]
+        start = bisect_left(xs, x)
+        end = start
+        while end < len(ys) and ys[end] >= y:
+            end += 1
+        removed = end - start
+        # the dominated points may continue in the following blocks
+        while end == len(ys) and block + 1 < len(self._xs):
+            following_xs, following_ys = self._xs[block + 1], self._ys[block + 1]
+            count = 0
+            while count < len(following_ys) and following_ys[count] >= y:
+                count += 1
+            removed += count
+            if count < len(following_ys):
+                del following_xs[:count], following_ys[:count]
+                break
+            del self._xs[block + 1], self._ys[block + 1], self._maxes[block + 1]
+
+        xs[start:end] = [x]
+        ys[start:end] = [y]
+        self._maxes[block] = xs[-1]
+        self._size += 1 - removed
+
+        if len(xs) > 2 * self.block_size:
+            self._xs[block : block + 1] = [xs[: self.block_size], xs[self.block_size :]]
+            self._ys[block : block + 1] = [ys[: self.block_size], ys[self.block_size :]]
+            self._maxes[block : block + 1] = [xs[self.block_size - 1], xs[-1]]
+        return True
+
+    def extend(self, points: Iterable[Sequence[float]]) -> int:
+        """Adds many points, they are filtered vectorized first. Returns the number of added points."""
+        candidates = non_dominated_2d(np.asarray(list(points), dtype=np.float64))
+        return sum(self.insert(point) for point in candidates.tolist())
+
+    def points(self) -> np.ndarray:
+        xs, ys = list(chain.from_iterable(self._xs)), list(chain.from_iterable(self._ys))
+        return np.column_stack([xs, ys]).reshape(-1, 2)
+
+    def hypervolume(self, reference: Sequence[float]) -> float:
+        return hypervolume_2d(self.points(), reference)
+
+    def save(self, path: Path, objectives: Sequence[str] = ()):
+        _save(path, self.points(), objectives)
+
+
+class _Node:
+    __slots__ = ("children", "ideal", "nadir", "points")
+
+    def __init__(self, points: List[List[float]]):
+        self.points = points
+        self.children: List["_Node"] | None = None
+        self.ideal = [min(values) for values in zip(*points)]
+        self.nadir = [max(values) for values in zip(*points)]
+
+    def is_leaf(self) -> bool:
+        return self.children is None
+
+    def include(self, point: List[float]):
+        self.ideal = [min(a, b) for a, b in zip(self.ideal, point)]
+        self.nadir = [max(a, b) for a, b in zip(self.nadir, point)]
+
+    def distance(self, point: List[float]) -> float:
+        return sum(((lo + hi) / 2 - p) ** 2 for lo, hi, p in zip(self.ideal, self.nadir, point))
+
+
+class ParetoFrontND:
+    """
+    ND-Tree archive for any number of objectives.
+
+    Args:
+        dimensions: Number of objectives.
+        max_leaf_size: Number of points in a leaf before it is split.
+        branching: Number of children created when a leaf is split (defaults to `dimensions + 1`).
+    """
+
+    def __init__(
+        self,
+        dimensions: int,
+        points: Iterable[Sequence[float]] = (),
+        *,
+        max_leaf_size: int = 20,
+        branching: int | None = None,
+    ):
+        self.dimensions = dimensions
+        self.max_leaf_size = max_leaf_size
+        self.branching = branching or dimensions + 1
+        self._root: _Node | None = None
+        self._size = 0
+        self.extend(points)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def dominated(self, point: Sequence[float]) -> bool:
+        """Checks whether the point is dominated by (or equal to) a point of the archive."""
+        point = [float(p) for p in point]
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            if _weakly_dominates(node.nadir, point):
+                return True
+            if not _weakly_dominates(node.ideal, point):
+                continue
+            if node.is_leaf():
+                if any(_weakly_dominates(q, point) for q in node.points):
+                    return True
+            else:
+                stack.extend(node.children)
+        return False
+
+    def insert(self, point: Sequence[float]) -> bool:
+        """Adds the point if it is not dominated and removes the points it dominates. Returns `True` if added."""
+        point = [float(p) for p in point]
+        if len(point) != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions} objectives, got {len(point)}")
+
+        if self._root is not None:
+            status = self._update(self._root, point)
+            if status is None:
+                return False
+            if status == "remove":
+                self._root = None
+
+        if self._root is None:
+            self._root = _Node([point])
+        else:
+            self._insert(self._root, point)
+        self._size += 1
+        return True
+
+    def extend(self, points: Iterable[Sequence[float]]) -> int:
+        """Adds many points. Returns the number of added points."""
+        return sum(self.insert(point) for point in points)
+
+    def _update(self, node: _Node, point: List[float]) -> str | None:
+        """
+        Removes the points dominated by `point` from the subtree. Returns `None` if the point itself is
+        dominated, `"remove"` if the whole subtree is dominated and `"keep"` otherwise.
+        """
+        if _weakly_dominates(node.nadir, point):
+            return None
+        if _weakly_dominates(point, node.ideal):
+            self._size -= self._count(node)
+            return "remove"
+        if not (_weakly_dominates(node.ideal, point) or _weakly_dominates(point, node.nadir)):
+            return "keep"
+
+        if node.is_leaf():
+            kept = []
+            for q in node.points:
+                if _weakly_dominates(q, point):
+                    return None
+                if not _weakly_dominates(point, q):
+                    kept.append(q)
+            self._size -= len(node.points) - len(kept)
+            node.points = kept
+            return "keep" if kept else "remove"
+
+        children = []
+        for child in node.children:
+            status = self._update(child, point)
+            if status is None:
+                return None
+            if status == "keep":
+                children.append(child)
+        node.children = children
+        if not children:
+            return "remove"
+        if len(children) == 1:
+            # collapse chains of single children, the bounds of the node stay valid
+            only = children[0]
+            node.points, node.children = only.points, only.children
+        return "keep"
+
+    def _count(self, node: _Node) -> int:
+        if node.is_leaf():
+            return len(node.points)
+        return sum(self._count(child) for child in node.children)
+
+    def _insert(self, node: _Node, point: List[float]):
+        while not node.is_leaf():
+            node.include(point)
+            node = min(node.children, key=lambda child: child.distance(point))
+
+        node.points.append(point)
+        node.include(point)
+        if len(node.points) > self.max_leaf_size:
+            self._split(node)
+
+    def _split(self, node: _Node):
+        points = np.asarray(node.points)
+        distances = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)
+
+        # seeds are the points farthest apart from each other, the rest goes to the closest seed
+        seeds = [int(np.argmax(distances.mean(axis=1)))]
+        while len(seeds) < min(self.branching, len(points)):
+            candidates = distances[:, seeds].mean(axis=1)
+            candidates[seeds] = -np.inf
+            seeds.append(int(np.argmax(candidates)))
+        assignment = np.argmin(distances[:, seeds], axis=1)
+        assignment[seeds] = np.arange(len(seeds))
+
+        node.children = [_Node(points[assignment == i].tolist()) for i in range(len(seeds))]
+        node.points = []
+
+    def points(self) -> np.ndarray:
+        collected = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            if node.is_leaf():
+                collected.extend(node.points)
+            else:
+                stack.extend(node.children)
+        return np.asarray(collected, dtype=np.float64).reshape(-1, self.dimensions)
+
+    def hypervolume(self, reference: Sequence[float]) -> float:
+        return hypervolume(self.points(), reference)
+
+    def save(self, path: Path, objectives: Sequence[str] = ()):
+        _save(path, self.points(), objectives)
+
+
+def pareto_archive(dimensions: int, points: Iterable[Sequence[float]] = ()) -> ParetoFront2D | ParetoFrontND:
+    """Creates the most suitable archive for the number of objectives."""
+    if dimensions == 2:
+        return ParetoFront2D(points)
+    return ParetoFrontND(dimensions, points)
+
+
+def _save(path: Path, points: np.ndarray, objectives: Sequence[str]):
+    if objectives and len(objectives) != points.shape[1]:
+        raise ValueError(f"Expected {points.shape[1]} objective names, got {len(objectives)}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, points=points, objectives=np.asarray(list(objectives), dtype=str))
+
+
+def load_pareto_archive(path: Path) -> tuple[ParetoFront2D | ParetoFrontND, List[str]]:
+    """Loads an archive stored with `save`. Returns the archive and the names of the objectives."""
+    with np.load(path) as data:
+        points = data["points"]
+        objectives = data["objectives"].tolist()
+    return pareto_archive(points.shape[1], points), objectives
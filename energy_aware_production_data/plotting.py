@@ -0,0 +1,126 @@
+"""
+Plots of schedules which stay fast for the largest instances.
+
+All task bars of a Gantt chart are drawn as one `PolyCollection` (one artist instead of one patch per task) and
+curves with more points than the axes has pixels are reduced with min-max downsampling, which keeps the visible
+extremes of every pixel column.
+"""
+
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+from energy_aware_production_data.schedule import Schedule
+
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray, buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces a curve to at most `2 * buckets` points, the minimum and maximum of every bucket of consecutive points
+    in their original order. Curves which are already small enough are returned unchanged.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= 2 * buckets:
+        return x, y
+
+    width = -(-len(y) // buckets)
+    buckets = -(-len(y) // width)
+    # pad the last bucket with its last value, which never changes its minimum or maximum
+    padded = np.concatenate([y, np.full(buckets * width - len(y), y[-1])]).reshape(buckets, width)
+    offsets = np.arange(buckets) * width
+    low = offsets + padded.argmin(axis=1)
+    high = offsets + padded.argmax(axis=1)
+    selected = np.minimum(np.sort(np.stack([low, high], axis=1), axis=1).ravel(), len(y) - 1)
+    return x[selected], y[selected]
+
+
+def gantt_collection(
+    schedule: Schedule,
+    *,
+    color_by: str = "stage",
+    cmap: str = "tab20",
+    height: float = 0.8,
+) -> PolyCollection:
+    """
+    All tasks of a schedule as one collection of bars, one row per machine.
+
+    Args:
+        schedule: The schedule to draw.
+        color_by: `"stage"`, `"job"` or `"power"` (the load of the task).
+        cmap: Name of the colormap.
+        height: Height of a bar relative to the row.
+    """
+    left = np.asarray(schedule.start, dtype=np.float64)
+    right = left + schedule.duration
+    bottom = np.asarray(schedule.machine, dtype=np.float64) - height / 2
+    top = bottom + height
+    vertices = np.stack(
+        [
+            np.stack([left, bottom], 1),
+            np.stack([left, top], 1),
+            np.stack([right, top], 1),
+            np.stack([right, bottom], 1),
+        ],
+        axis=1,
+    )
+
+    if color_by not in ("stage", "job", "power"):
+        raise ValueError(f"Unknown color_by {color_by}, expected stage, job or power")
+    values = np.asarray(getattr(schedule, color_by), dtype=np.float64)
+    collection = PolyCollection(vertices, cmap=cmap, edgecolors="face", linewidths=0)
+    if color_by == "power":
+        collection.set_array(values)
+    else:
+        # every stage or job index maps to its own entry of the (categorical) colormap
+        colors = plt.get_cmap(cmap).N
+        collection.set_array(values % colors)
+        collection.set_clim(0, colors - 1)
+    return collection
+
+
+def plot_schedule(
+    schedule: Schedule,
+    *,
+    pv: np.ndarray | None = None,
+    pv_resolution: int = 60,
+    color_by: str = "stage",
+    axes: tuple[Axes, Axes] | None = None,
+    figsize: tuple[float, float] = (14, 8),
+) -> Figure:
+    """
+    Draws the Gantt chart of a schedule and its power profile (optionally against the PV power).
+
+    Args:
+        schedule: The schedule to draw.
+        pv: PV power in W per `pv_resolution` time units, e.g. a PVGIS `power` series times the `PvScalingFactor`.
+        pv_resolution: Time units per PV value, 60 for the hourly PVGIS data.
+        color_by: See `gantt_collection`.
+        axes: Gantt and power axes to draw into, a new figure is created by default.
+        figsize: Size of the new figure.
+    """
+    if axes is None:
+        fig, axes = plt.subplots(2, 1, sharex=True, figsize=figsize, height_ratios=[3, 1])
+    gantt_axes, power_axes = axes
+    fig = gantt_axes.figure
+
+    makespan = max(schedule.makespan, 1.0)
+    gantt_axes.add_collection(gantt_collection(schedule, color_by=color_by))
+    gantt_axes.set_xlim(0, makespan)
+    gantt_axes.set_ylim(-1, int(schedule.machine.max()) + 1 if len(schedule) else 1)
+    gantt_axes.invert_yaxis()
+    gantt_axes.set_ylabel("Machine")
+
+    # one bucket per pixel column of the axes
+    buckets = max(1, int(power_axes.get_window_extent().width))
+    load = schedule.power_profile(1)
+    x, y = minmax_downsample(np.arange(len(load)), load, buckets)
+    power_axes.plot(x, y, drawstyle="steps-post", linewidth=0.8, label="Load")
+    if pv is not None:
+        slots = min(len(pv), -(-int(np.ceil(makespan)) // pv_resolution))
+        x, y = minmax_downsample(np.arange(slots) * pv_resolution, np.asarray(pv[:slots]), buckets)
+        power_axes.plot(x, y, drawstyle="steps-post", linewidth=0.8, label="PV")
+        power_axes.legend(loc="upper right")
+    power_axes.set_xlabel("Time")
+    power_axes.set_ylabel("Power (W)")
+    return fig
@@ -0,0 +1,69 @@
+"""
+Sliding window operations on power profiles, used to evaluate a profile for every possible start offset in a
+longer series (prices, PV production) at once.
+
+For offset `s` the profile `load[t]` is aligned with `series[s + t]`, offsets run from `0` to
+`len(series) - len(load)`.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import correlate
+
+# memory budget (number of elements) for the explicit sliding windows
+_WINDOW_CHUNK = 1 << 24
+
+
+def sliding_dot(series: np.ndarray, load: np.ndarray) -> np.ndarray:
+    """`out[s] = sum_t load[t] * series[s + t]`, computed with an FFT for long profiles."""
+    series = np.asarray(series, dtype=np.float64)
+    load = np.asarray(load, dtype=np.float64)
+    if len(load) > len(series):
+        return np.empty(0)
+    return correlate(series, load, mode="valid", method="auto")
+
+
+def sliding_covered(
+    load: np.ndarray,
+    supply: np.ndarray,
+    weights: np.ndarray | None = None,
+    *,
+    stride: int = 1,
+    max_levels: int = 32,
+) -> np.ndarray:
+    """
+    `out[s] = sum_t weights[s + t] * min(load[t], supply[s + t])`, i.e. the (weighted) part of the load covered by
+    the supply for every start offset. `load` and `supply` have to be non negative.
+
+    If the load takes at most `max_levels` distinct values (e.g. a schedule at the resolution of its time unit),
+    `min` is decomposed into layers `1[load >= u_i] * clip(supply - u_(i-1), 0, u_i - u_(i-1))`, each of which is a
+    single correlation. Otherwise the windows are evaluated explicitly in chunks. Both ways are exact.
+
+    With `stride > 1` only every `stride`-th offset is returned, e.g. `24` for daily starts in an hourly series.
+    """
+    load = np.asarray(load, dtype=np.float64)
+    supply = np.asarray(supply, dtype=np.float64)
+    weights = np.ones_like(supply) if weights is None else np.asarray(weights, dtype=np.float64)
+    offsets = len(supply) - len(load) + 1
+    if offsets <= 0:
+        return np.empty(0)
+
+    levels = np.unique(load[load > 0])
+    if len(levels) <= max_levels:
+        out = np.zeros(offsets)
+        previous = 0.0
+        for level in levels:
+            layer = weights * np.clip(supply - previous, 0.0, level - previous)
+            out += sliding_dot(layer, (load >= level).astype(np.float64))
+            previous = level
+        return out[::stride]
+
+    supply_windows = sliding_window_view(supply, len(load))[::stride]
+    weight_windows = sliding_window_view(weights, len(load))[::stride]
+    chunk = max(1, _WINDOW_CHUNK // len(load))
+    out = np.empty(len(supply_windows))
+    for first in range(0, len(out), chunk):
+        last = min(first + chunk, len(out))
+        covered = np.minimum(supply_windows[first:last], load[None, :])
+        out[first:last] = np.einsum("ij,ij->i", covered, weight_windows[first:last])
+    return out
@@ -0,0 +1,191 @@
+"""
+Optional timing and memory instrumentation of the generation and loading pipeline.
+
+Code marks the parts of its work with `stage("name")`. Without an active `Profiler` this returns a shared no-op
+context manager, so instrumented code costs a single context variable lookup per stage. Within
+`with Profiler("run") as profiler:` every stage records its number of calls, wall and CPU time and, with
+`trace_memory=True`, the memory allocated (and peak) via `tracemalloc`. Nested stages are reported as
+`outer/inner`.
+
+Work done in worker processes is profiled by a `Profiler` of the worker whose `stages` are merged into the
+profiler of the main process (see `Profiler.merge`), so times of worker stages are summed over all workers.
+
+The report of a run is stored in `EnergyAwareSchedulingDataPackage.scheduling_profile_json` (next to
+`parameters.json`), which holds the latest report of every run name.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import wraps
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_active: ContextVar["Profiler | None"] = ContextVar("energy_aware_production_data_profiler", default=None)
+_disabled = nullcontext()
+
+
+@dataclass
+class StageMetrics:
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    # bytes, only recorded with `trace_memory=True`
+    allocated_memory: int = 0
+    peak_memory: int = 0
+
+    def add(self, other: "StageMetrics"):
+        self.calls += other.calls
+        self.wall_time += other.wall_time
+        self.cpu_time += other.cpu_time
+        self.allocated_memory += other.allocated_memory
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+
+
+class _Stage:
+    __slots__ = ("child_peak", "cpu", "memory", "name", "profiler", "wall")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        if profiler._stack:
+            self.name = f"{profiler._stack[-1].name}/{self.name}"
+        profiler._stack.append(self)
+        self.child_peak = 0
+        if profiler.trace_memory:
+            self.memory, peak = tracemalloc.get_traced_memory()
+            if profiler._stack[:-1]:
+                # keep the peak reached so far by the enclosing stage
+                parent = profiler._stack[-2]
+                parent.child_peak = max(parent.child_peak, peak)
+            tracemalloc.reset_peak()
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        profiler = self.profiler
+        profiler._stack.pop()
+        metrics = profiler.stages.setdefault(self.name, StageMetrics())
+        metrics.calls += 1
+        metrics.wall_time += wall
+        metrics.cpu_time += cpu
+        if profiler.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            metrics.allocated_memory += current - self.memory
+            metrics.peak_memory = max(metrics.peak_memory, peak - self.memory)
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent.child_peak = max(parent.child_peak, peak)
+        return False
+
+
+class Profiler:
+    """Collects the metrics of all stages run while it is active (see the module documentation)."""
+
+    def __init__(self, name: str = "pipeline", *, trace_memory: bool = False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageMetrics] = {}
+        self.started: datetime | None = None
+        self.wall_time = 0.0
+        self._stack: List[_Stage] = []
+        self._token = None
+        self._started_tracing = False
+
+    def __enter__(self) -> "Self":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.started = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _active.reset(self._token)
+        self.wall_time += time.perf_counter() - self._wall
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def merge(self, stages: Dict[str, StageMetrics]):
+        """Adds the metrics of another profiler, e.g. of a worker process."""
+        for name, metrics in stages.items():
+            self.stages.setdefault(name, StageMetrics()).add(metrics)
+
+    def report(self) -> Dict:
+        try:
+            package_version = version("hgb-ai-energy-aware-production-data")
+        except PackageNotFoundError:
+            package_version = None
+        return {
+            "name": self.name,
+            "started": self.started.isoformat() if self.started else None,
+            "wall_time": self.wall_time,
+            "trace_memory": self.trace_memory,
+            "package_version": package_version,
+            "pid": os.getpid(),
+            "stages": {name: asdict(metrics) for name, metrics in sorted(self.stages.items())},
+        }
+
+    def write(self, path: Path) -> Dict:
+        """Stores the report under the name of the run in the JSON file, keeping the reports of other runs."""
+        path = Path(path)
+        reports = json.loads(path.read_text()) if path.exists() else {}
+        reports[self.name] = self.report()
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(json.dumps(reports, indent=4))
+        os.replace(tmp_path, path)
+        return reports
+
+
+def active_profiler() -> Profiler | None:
+    """The profiler of the current context, if any."""
+    return _active.get()
+
+
+def stage(name: str):
+    """Context manager recording a stage in the active profiler, does nothing if none is active."""
+    profiler = _active.get()
+    if profiler is None:
+        return _disabled
+    return _Stage(profiler, name)
+
+
+def profiled(name: str | None = None) -> Callable:
+    """Decorator recording every call of the function as stage (named after the function by default)."""
+
+    def decorator(function: Callable) -> Callable:
+        stage_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is None:
+                return function(*args, **kwargs)
+            with _Stage(profiler, stage_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,82 @@
+"""
+Loading the normalized PVGIS series of all cities into one array per column.
+
+All cities share the same hourly timestamps (PVGIS reports each hour at `HH:10`), so a column like `power` is a
+`(cities, hours)` matrix which can be processed for all cities at once. Hours a city lacks are marked in `missing`,
+they are 0 in the `ZERO_FILLED_COLUMNS` (no PV production to cover a load with) and NaN in all other columns.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.profiling import stage
+
+ZERO_FILLED_COLUMNS = ("power", "global_irradiance")
+
+
+@dataclass
+class PvgisSet:
+    """The PVGIS series of several cities, `values[column]` is a `(cities, hours)` array."""
+
+    cities: List[str]
+    timestamps: pd.DatetimeIndex
+    values: Dict[str, np.ndarray]
+    # (cities, hours) hours missing in the series of a city
+    missing: np.ndarray
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[column]
+
+    def city_index(self, city: str) -> int:
+        return self.cities.index(city)
+
+    def days(self, start_hour: int = 0) -> pd.DatetimeIndex:
+        """Timestamps of the full days (starting at `start_hour`) covered by the series."""
+        return self.timestamps[start_hour::24][: (len(self.timestamps) - start_hour) // 24]
+
+
+def load_pvgis(
+    data_package,
+    columns: Iterable[str] = ("power",),
+    cities: Iterable[str] | None = None,
+    max_workers: int | None = None,
+) -> PvgisSet:
+    """
+    Reads the PVGIS csv files (plain or compressed) of the given cities, all cities by default.
+
+    Args:
+        data_package: The `EnergyAwareSchedulingDataPackage`.
+        columns: The columns to load, see `NormalizedPVGISSchema` in `1_pv_energy_aware_production.py`.
+        cities: The cities to load, defaults to `data_package.pvgis_cities()`.
+        max_workers: Number of threads reading files in parallel.
+    """
+    columns = list(columns)
+    cities = list(data_package.pvgis_cities() if cities is None else cities)
+    if not cities:
+        raise ValueError("No PVGIS data found")
+
+    def read(city: str) -> pd.DataFrame:
+        frame = pd.read_csv(data_package.open_pvgis_csv(city), usecols=["ds", *columns])
+        return frame.set_index(pd.to_datetime(frame["ds"]))[columns]
+
+    with stage("load_pvgis"), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read, cities))
+
+    timestamps = frames[0].index
+    values = {column: np.empty((len(cities), len(timestamps))) for column in columns}
+    missing = np.zeros((len(cities), len(timestamps)), dtype=bool)
+    for i, frame in enumerate(frames):
+        if not frame.index.equals(timestamps):
+            # series of other lengths are aligned with the first city
+            missing[i] = ~timestamps.isin(frame.index)
+            frame = frame.reindex(timestamps)
+        for column in columns:
+            values[column][i] = frame[column].to_numpy(dtype=np.float64)
+            if column in ZERO_FILLED_COLUMNS:
+                values[column][i, missing[i]] = 0.0
+
+    return PvgisSet(cities=cities, timestamps=timestamps, values=values, missing=missing)
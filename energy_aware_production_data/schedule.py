@@ -0,0 +1,86 @@
+"""
+Array representation of a (solved) schedule.
+
+Times are given in the time unit of the instances (minutes), the power of a task is the energy cost per time
+unit of its chosen speed up (see `Task.speed_up`), i.e. the load of the machine while processing the task.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from energy_aware_production_data.arrays import InstanceArrays
+
+
+@dataclass
+class Schedule:
+    """A schedule as one entry per task, all arrays have the same length."""
+
+    job: np.ndarray
+    stage: np.ndarray
+    machine: np.ndarray
+    start: np.ndarray
+    duration: np.ndarray
+    power: np.ndarray
+
+    @classmethod
+    def from_instance(
+        cls,
+        arrays: InstanceArrays,
+        machine: np.ndarray,
+        start: np.ndarray,
+        speed: np.ndarray | None = None,
+    ) -> "Schedule":
+        """
+        Creates the schedule of an instance from `(jobs, stages)` arrays of machine ids, start times and the chosen
+        speed up option (position in the speed up table, `0` is the nominal speed).
+        """
+        jobs, stages = np.indices(arrays.processing_times.shape)
+        speed = np.zeros_like(jobs) if speed is None else np.asarray(speed)
+        return cls(
+            job=jobs.ravel(),
+            stage=stages.ravel(),
+            machine=np.asarray(machine).ravel(),
+            start=np.asarray(start).ravel(),
+            duration=arrays.speed_up_times[jobs, stages, speed].ravel(),
+            power=arrays.speed_up_power[jobs, stages, speed].ravel(),
+        )
+
+    def __len__(self) -> int:
+        return len(self.job)
+
+    @property
+    def end(self) -> np.ndarray:
+        return self.start + self.duration
+
+    @property
+    def makespan(self) -> float:
+        return float(self.end.max()) if len(self) else 0.0
+
+    @property
+    def energy(self) -> float:
+        return float(np.sum(self.duration * self.power))
+
+    def power_profile(self, resolution: int = 1, horizon: int | None = None) -> np.ndarray:
+        """
+        The average power of all machines per time slot of `resolution` time units, starting at time 0. Fractional
+        start and end times (e.g. of simulated schedules) contribute the overlapping part of their first and last slot.
+
+        Args:
+            resolution: Length of a slot, e.g. 60 to match the hourly PVGIS series.
+            horizon: Number of time units to cover, defaults to the makespan.
+        """
+        horizon = int(np.ceil(self.makespan)) if horizon is None else int(horizon)
+        slots = -(-horizon // resolution)
+
+        # the energy up to the slot boundary k is the sum of `power * (k * resolution - time)` over the starts
+        # minus the same over the ends before the boundary, built from difference arrays of slope and offset
+        energy = np.zeros(slots + 1)
+        for times, sign in ((self.start, 1.0), (self.end, -1.0)):
+            times = np.asarray(times, dtype=np.float64)
+            first = np.minimum(np.ceil(times / resolution), slots + 1).astype(np.int64)
+            power = sign * np.asarray(self.power, dtype=np.float64)
+            offset = np.cumsum(np.bincount(first, power * (first * resolution - times), minlength=slots + 2))
+            slope = np.cumsum(np.bincount(first, power, minlength=slots + 2))
+            energy += (offset + resolution * np.concatenate([[0.0], np.cumsum(slope)[:-1]]))[: slots + 1]
+        return np.diff(energy) / resolution
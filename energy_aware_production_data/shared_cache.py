@@ -0,0 +1,283 @@
+"""
+Node local cache of instances in POSIX shared memory, shared by many solver processes.
+
+Every instance is loaded once into its own shared memory segment in the `InstanceArrays` form. Other processes
+attach to the segment and get read-only numpy views of it, so the memory and load time per node do not grow
+with the number of processes.
+
+The segments are listed in a registry file (JSON, updated under a lock file like the bounds log) together with
+their size and last use. A missing instance is read and written to a segment with a unique name without holding
+the lock, the lock is only taken to register it; if another process registered the instance meanwhile, its
+segment is used and the own one is unlinked. When the total size exceeds the capacity, the least recently used segments are
+unlinked. Processes which are still attached to an evicted segment keep their mapping until they close the
+cache. Segments are not tied to the lifetime of the process which created them (they are unregistered from the
+resource tracker), so the cache survives process churn until `SharedInstanceCache.clear` is called or the
+node is rebooted.
+
+Instances changed on disk are not detected, call `invalidate` after rewriting an instance.
+"""
+
+import dataclasses
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_HEADER_SIZE = np.dtype("<u8").itemsize
+_ALIGNMENT = 64
+# minimum number of seconds between two updates of the last use of an instance by the same process
+_TOUCH_INTERVAL = 1.0
+
+
+def _open_segment(name: str, size: int = 0) -> shared_memory.SharedMemory:
+    """Opens (or creates with `size > 0`) a segment which is not unlinked when this process exits."""
+    try:
+        return shared_memory.SharedMemory(name=name, create=size > 0, size=size, track=False)
+    except TypeError:
+        # before Python 3.13 every segment is registered with the resource tracker, which unlinks it once the
+        # process which created or attached it ends
+        segment = shared_memory.SharedMemory(name=name, create=size > 0, size=size)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def _unlink_segment(name: str):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def _layout(arrays: InstanceArrays) -> Tuple[bytes, List[Tuple[np.ndarray, int]], int]:
+    """The JSON header describing the arrays, the arrays with their offsets and the total size of a segment."""
+    scalars, specs, buffers = {}, {}, []
+    offset = 0
+    for field in dataclasses.fields(arrays):
+        value = getattr(arrays, field.name)
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            specs[field.name] = {"dtype": value.dtype.str, "shape": value.shape, "offset": offset}
+            buffers.append((value, offset))
+            offset += -(-value.nbytes // _ALIGNMENT) * _ALIGNMENT
+        else:
+            scalars[field.name] = value
+    header = json.dumps({"scalars": scalars, "arrays": specs}).encode("utf-8")
+    data_start = -(-(_HEADER_SIZE + len(header)) // _ALIGNMENT) * _ALIGNMENT
+    return header, [(array, data_start + offset) for array, offset in buffers], data_start + max(offset, 1)
+
+
+def _write_segment(name: str, arrays: InstanceArrays) -> int:
+    header, buffers, size = _layout(arrays)
+    try:
+        segment = _open_segment(name, size)
+    except FileExistsError:
+        # left behind without a registry entry, e.g. by a process which crashed before updating the registry
+        _unlink_segment(name)
+        segment = _open_segment(name, size)
+    try:
+        segment.buf[:_HEADER_SIZE] = np.array([len(header)], dtype="<u8").tobytes()
+        segment.buf[_HEADER_SIZE : _HEADER_SIZE + len(header)] = header
+        for array, offset in buffers:
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=offset)
+            target[...] = array
+            del target
+    finally:
+        segment.close()
+    return size
+
+
+def _read_segment(segment: shared_memory.SharedMemory) -> InstanceArrays:
+    header_length = int(np.frombuffer(segment.buf, dtype="<u8", count=1)[0])
+    header = json.loads(bytes(segment.buf[_HEADER_SIZE : _HEADER_SIZE + header_length]))
+    data_start = -(-(_HEADER_SIZE + header_length) // _ALIGNMENT) * _ALIGNMENT
+    values = dict(header["scalars"])
+    for name, spec in header["arrays"].items():
+        view = np.ndarray(
+            tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=segment.buf, offset=data_start + spec["offset"]
+        )
+        view.flags.writeable = False
+        values[name] = view
+    return InstanceArrays(**values)
+
+
+class SharedInstanceCache:
+    """
+    Read-only access to the instances of a data package through the shared memory cache of the node.
+
+    Args:
+        data_package: The data package the instances are loaded from.
+        capacity: Maximum total size of all segments of the data package in bytes.
+        registry: The registry file, by default a file in the temporary directory specific to the data package.
+    """
+
+    def __init__(
+        self,
+        data_package: EnergyAwareSchedulingDataPackage,
+        *,
+        capacity: int = 1 << 30,
+        registry: Path | None = None,
+    ):
+        self.data_package = data_package
+        self.capacity = capacity
+        digest = hashlib.blake2b(str(Path(data_package.root).resolve()).encode(), digest_size=6).hexdigest()
+        self._prefix = f"easd_{digest}_"
+        self.registry = Path(registry or Path(tempfile.gettempdir()) / f"easd_cache_{digest}.json")
+        # segments attached by this process and when their last use was recorded
+        self._attached: Dict[str, Tuple[shared_memory.SharedMemory, InstanceArrays]] = {}
+        self._touched: Dict[str, float] = {}
+
+    @contextmanager
+    def _locked(self) -> Iterator[Dict[str, Dict]]:
+        lock_file = self.registry.with_name(self.registry.name + ".lock")
+        with open(lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = json.loads(self.registry.read_text()) if self.registry.exists() else {}
+                before = dict(entries)
+                yield entries
+                if entries != before:
+                    temporary = self.registry.with_name(self.registry.name + ".tmp")
+                    temporary.write_text(json.dumps(entries))
+                    os.replace(temporary, self.registry)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _segment_name(self, instance_id: str) -> str:
+        return self._prefix + instance_id
+
+    def __contains__(self, instance_id: str) -> bool:
+        with self._locked() as entries:
+            return instance_id in entries
+
+    def __getitem__(self, instance_id: str) -> InstanceArrays:
+        return self.get(instance_id)
+
+    def get(self, instance_id: str) -> InstanceArrays:
+        """The arrays of an instance as read-only views of the shared memory, loading it on first access."""
+        now = time.monotonic()
+        if instance_id in self._attached:
+            if now - self._touched[instance_id] > _TOUCH_INTERVAL:
+                with self._locked() as entries:
+                    if instance_id in entries:
+                        entries[instance_id] = {**entries[instance_id], "last_used": time.time()}
+                self._touched[instance_id] = now
+            return self._attached[instance_id][1]
+
+        with self._locked() as entries:
+            segment = self._attach_registered(instance_id, entries)
+        if segment is None:
+            # the instance is read and copied without holding the lock, so other processes are not blocked by it
+            name = f"{self._segment_name(instance_id)}_{secrets.token_hex(4)}"
+            size = _write_segment(name, self.data_package.read_instance_arrays(instance_id))
+            try:
+                segment = self._register(instance_id, name, size)
+            except BaseException:
+                _unlink_segment(name)
+                raise
+
+        arrays = _read_segment(segment)
+        self._attached[instance_id] = (segment, arrays)
+        self._touched[instance_id] = now
+        return arrays
+
+    def _attach_registered(self, instance_id: str, entries: Dict[str, Dict]) -> shared_memory.SharedMemory | None:
+        """Opens the registered segment of an instance and records its use, None if there is none."""
+        entry = entries.get(instance_id)
+        if entry is None:
+            return None
+        try:
+            segment = _open_segment(self._entry_segment(instance_id, entry))
+        except FileNotFoundError:
+            # e.g. after a reboot, the registry outlives the segments
+            del entries[instance_id]
+            return None
+        entries[instance_id] = {**entry, "last_used": time.time()}
+        return segment
+
+    def _register(self, instance_id: str, name: str, size: int) -> shared_memory.SharedMemory:
+        """Registers a written segment, unless another process registered the instance in the meantime."""
+        with self._locked() as entries:
+            segment = self._attach_registered(instance_id, entries)
+            if segment is not None:
+                _unlink_segment(name)
+                return segment
+            self._evict(entries, self.capacity - size)
+            segment = _open_segment(name)
+            entries[instance_id] = {"size": size, "segment": name, "last_used": time.time()}
+            return segment
+
+    def _entry_segment(self, instance_id: str, entry: Dict) -> str:
+        # registries written before the segment names got a unique suffix do not store them
+        return entry.get("segment", self._segment_name(instance_id))
+
+    def _evict(self, entries: Dict[str, Dict], capacity: int):
+        total = sum(entry["size"] for entry in entries.values())
+        for instance_id in sorted(entries, key=lambda i: entries[i]["last_used"]):
+            if total <= capacity:
+                break
+            total -= entries[instance_id]["size"]
+            _unlink_segment(self._entry_segment(instance_id, entries.pop(instance_id)))
+
+    def invalidate(self, instance_id: str):
+        """Removes an instance from the cache, it is loaded again on the next access."""
+        with self._locked() as entries:
+            entry = entries.pop(instance_id, None)
+            if entry is not None:
+                _unlink_segment(self._entry_segment(instance_id, entry))
+        self._detach(instance_id)
+
+    def entries(self) -> Dict[str, Dict]:
+        """The cached instances with their `size` (bytes) and `last_used` (unix time)."""
+        with self._locked() as entries:
+            return dict(entries)
+
+    def _detach(self, instance_id: str):
+        attached = self._attached.pop(instance_id, None)
+        self._touched.pop(instance_id, None)
+        if attached is not None:
+            segment, arrays = attached
+            del arrays, attached
+            try:
+                segment.close()
+            except BufferError:
+                # views of the segment are still in use, the mapping is released with them
+                pass
+
+    def close(self):
+        """Detaches this process from all segments, views returned by `get` must not be used afterwards."""
+        for instance_id in list(self._attached):
+            self._detach(instance_id)
+
+    def clear(self):
+        """Unlinks all segments of the data package and removes the registry."""
+        self.close()
+        with self._locked() as entries:
+            for instance_id, entry in entries.items():
+                _unlink_segment(self._entry_segment(instance_id, entry))
+            entries.clear()
+            # segments of processes which died before registering them, only listed on Linux
+            for path in Path("/dev/shm").glob(self._prefix + "*"):
+                _unlink_segment(path.name)
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
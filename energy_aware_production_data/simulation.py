@@ -0,0 +1,233 @@
+"""
+Discrete event simulation of an online version of the scheduling problem.
+
+Jobs of a `ProblemInstance` arrive over time (release times) and are dispatched by a pluggable policy while
+the PV production follows a PVGIS series. Events are kept in a binary heap, so every event costs O(log n) plus
+the work of the policy.
+
+A policy is a callable `policy(state, time, stages)` returning `(job, stage, machine, speed)` tuples to start
+right now. `stages` are the stages whose queue or idle machines changed with the current event. The state offers
+the waiting jobs and idle machines per stage, the current load and the PV power. A policy which holds back jobs
+(e.g. until the PV production rises) asks to be called again with `state.wake_up(time)`, e.g. at
+`state.next_pv_slot(time)`.
+"""
+
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterable, List, Tuple
+
+import numpy as np
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.schedule import Schedule
+
+Dispatch = Tuple[int, int, int, int]
+
+# finished tasks are processed before releases at the same time, so freed machines are available
+_FINISH = 0
+_RELEASE = 1
+_WAKE_UP = 2
+
+
+class SimulationState:
+    """The state visible to a dispatch policy."""
+
+    def __init__(self, arrays: InstanceArrays, pv: np.ndarray | None, pv_resolution: int):
+        self.arrays = arrays
+        self.pv = pv
+        self.pv_resolution = pv_resolution
+        # jobs waiting for each stage in order of arrival
+        self.waiting: List[Deque[int]] = [deque() for _ in range(arrays.number_of_stages)]
+        # idle machine ids for each stage
+        self.idle: List[List[int]] = []
+        machine_id = 0
+        for machines in arrays.machines_per_stage.tolist():
+            self.idle.append(list(range(machine_id + machines - 1, machine_id - 1, -1)))
+            machine_id += machines
+        # current total power of all running tasks
+        self.load = 0.0
+        # times the policy asked to be called again, collected by `simulate` after every call
+        self.wake_ups: List[float] = []
+
+    def wake_up(self, time: float):
+        """Calls the policy again at the given (future) time with all stages, even if no other event happens."""
+        self.wake_ups.append(float(time))
+
+    def next_pv_slot(self, time: float) -> float:
+        """Start of the PV slot after the one containing `time`."""
+        return (time // self.pv_resolution + 1) * self.pv_resolution
+
+    def pv_power(self, time: float) -> float:
+        """PV power at the given time (0 outside of the series)."""
+        if self.pv is None:
+            return 0.0
+        slot = int(time // self.pv_resolution)
+        return float(self.pv[slot]) if 0 <= slot < len(self.pv) else 0.0
+
+
+def fifo_policy(speed: int = 0) -> Callable[[SimulationState, float, Iterable[int]], List[Dispatch]]:
+    """Starts waiting jobs in order of arrival on any idle machine with a fixed speed up option."""
+
+    def policy(state: SimulationState, time: float, stages: Iterable[int]) -> List[Dispatch]:
+        dispatches = []
+        for stage in stages:
+            waiting, idle = state.waiting[stage], state.idle[stage]
+            while waiting and idle:
+                dispatches.append((waiting.popleft(), stage, idle.pop(), speed))
+        return dispatches
+
+    return policy
+
+
+def pv_surplus_policy() -> Callable[[SimulationState, float, Iterable[int]], List[Dispatch]]:
+    """
+    Starts waiting jobs in order of arrival and picks the fastest speed up whose additional power is still covered
+    by the PV surplus (PV power minus current load), otherwise the nominal speed.
+    """
+
+    def policy(state: SimulationState, time: float, stages: Iterable[int]) -> List[Dispatch]:
+        dispatches = []
+        power_table = state.arrays.speed_up_power
+        surplus = state.pv_power(time) - state.load
+        for stage in stages:
+            waiting, idle = state.waiting[stage], state.idle[stage]
+            while waiting and idle:
+                job = waiting.popleft()
+                power = power_table[job, stage]
+                affordable = np.flatnonzero(power <= surplus)
+                speed = int(affordable[-1]) if len(affordable) else 0
+                surplus -= power[speed]
+                dispatches.append((job, stage, idle.pop(), speed))
+        return dispatches
+
+    return policy
+
+
+def poisson_release_times(number_of_jobs: int, mean_interarrival: float, seed: int | None = None) -> np.ndarray:
+    """Release times of a Poisson arrival process, the first job arrives at time 0."""
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(mean_interarrival, number_of_jobs)
+    gaps[0] = 0.0
+    return np.cumsum(gaps)
+
+
+@dataclass
+class SimulationResult:
+    schedule: Schedule
+    release_times: np.ndarray
+    number_of_events: int
+    # energy of the load covered by PV and bought from the grid in Wh (only with a PV series)
+    pv_covered_energy: float
+    grid_energy: float
+
+    @property
+    def makespan(self) -> float:
+        return self.schedule.makespan
+
+    @property
+    def flow_times(self) -> np.ndarray:
+        """Time from release to completion of each job."""
+        completion = np.zeros(len(self.release_times))
+        np.maximum.at(completion, self.schedule.job, self.schedule.end)
+        return completion - self.release_times
+
+
+def simulate(
+    arrays: InstanceArrays,
+    release_times: np.ndarray | None = None,
+    policy: Callable[[SimulationState, float, Iterable[int]], List[Dispatch]] | None = None,
+    *,
+    pv: np.ndarray | None = None,
+    pv_resolution: int = 60,
+) -> SimulationResult:
+    """
+    Simulates the online processing of an instance.
+
+    Args:
+        arrays: The instance in array form.
+        release_times: Arrival time of each job, all jobs are available at time 0 by default.
+        policy: The dispatch policy, defaults to `fifo_policy()`.
+        pv: PV power in W per `pv_resolution` time units, e.g. a PVGIS `power` series times the `PvScalingFactor`.
+        pv_resolution: Time units per PV value, 60 for the hourly PVGIS data.
+
+    Returns:
+        The resulting schedule and its PV usage.
+    """
+    J, S = arrays.processing_times.shape
+    release_times = np.zeros(J) if release_times is None else np.asarray(release_times, dtype=np.float64)
+    if len(release_times) != J:
+        raise ValueError(f"Expected {J} release times, got {len(release_times)}")
+    policy = fifo_policy() if policy is None else policy
+
+    state = SimulationState(arrays, pv, pv_resolution)
+    durations = arrays.speed_up_times.tolist()
+    powers = arrays.speed_up_power.tolist()
+    machine = np.full((J, S), -1, dtype=np.int64)
+    start = np.zeros((J, S))
+    speed = np.zeros((J, S), dtype=np.int64)
+
+    events = [(float(t), _RELEASE, j, -1, -1) for j, t in enumerate(release_times.tolist())]
+    heapq.heapify(events)
+    push, pop = heapq.heappush, heapq.heappop
+    waiting, idle = state.waiting, state.idle
+    all_stages = tuple(range(S))
+    wake_up_times = set()
+    number_of_events = 0
+
+    while events:
+        time, kind, job, stage, machine_id = pop(events)
+        number_of_events += 1
+
+        if kind == _RELEASE:
+            waiting[0].append(job)
+            changed = (0,)
+        elif kind == _WAKE_UP:
+            wake_up_times.discard(time)
+            changed = all_stages
+        else:
+            idle[stage].append(machine_id)
+            state.load -= powers[job][stage][speed[job, stage]]
+            if stage + 1 < S:
+                waiting[stage + 1].append(job)
+                changed = (stage, stage + 1)
+            else:
+                changed = (stage,)
+
+        for job_started, stage_started, machine_started, speed_started in policy(state, time, changed):
+            if machine[job_started, stage_started] >= 0:
+                raise RuntimeError(f"Task of job {job_started} at stage {stage_started} was dispatched twice")
+            machine[job_started, stage_started] = machine_started
+            start[job_started, stage_started] = time
+            speed[job_started, stage_started] = speed_started
+            state.load += powers[job_started][stage_started][speed_started]
+            end = time + durations[job_started][stage_started][speed_started]
+            push(events, (end, _FINISH, job_started, stage_started, machine_started))
+
+        for wake_up in state.wake_ups:
+            if wake_up <= time:
+                raise ValueError(f"A wake up has to be in the future, got {wake_up} at time {time}")
+            if wake_up not in wake_up_times:
+                wake_up_times.add(wake_up)
+                push(events, (wake_up, _WAKE_UP, -1, -1, -1))
+        state.wake_ups.clear()
+
+    if (machine < 0).any():
+        raise RuntimeError("The policy did not dispatch all tasks, a policy holding back jobs has to use wake_up")
+
+    schedule = Schedule.from_instance(arrays, machine, start, speed)
+    covered, grid = 0.0, schedule.energy / 60
+    if pv is not None:
+        # energy per PV slot in Wh (power in W, time units are minutes)
+        slots = min(len(pv), -(-int(np.ceil(schedule.makespan)) // pv_resolution))
+        load = schedule.power_profile(pv_resolution, horizon=max(slots, 1) * pv_resolution)[:slots]
+        covered = float(np.minimum(load, np.asarray(pv[:slots])).sum() * pv_resolution / 60)
+        grid = schedule.energy / 60 - covered
+
+    return SimulationResult(
+        schedule=schedule,
+        release_times=release_times,
+        number_of_events=number_of_events,
+        pv_covered_energy=covered,
+        grid_energy=grid,
+    )
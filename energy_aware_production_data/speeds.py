@@ -0,0 +1,322 @@
+"""
+Choosing the speed up option of every task for a fixed machine assignment and sequence.
+
+With the sequence fixed, the tasks form a DAG (job order over the stages and task order on each machine) and the
+speeds have to minimize the energy while the longest path (makespan) stays within a limit. This is a discrete time
+cost trade-off problem:
+
+- `assign_speeds` bisects a Lagrange multiplier `λ` on the duration: every task independently picks the
+  option minimizing `energy + λ * duration`, which is one vectorized `argmin` over the padded speed up tables,
+  followed by a level-wise longest path. The smallest feasible `λ` is refined by handing the slack of every task
+  (in reverse topological order) to its cheapest fitting option. If the nominal speeds already meet the limit, the
+  result is optimal; a lower bound from the critical path is available on request.
+- If the tasks form a single chain (e.g. a single machine or job), `chain_speeds` solves it exactly by dynamic
+  programming over the integer time budget. It is only used on request (`exact_chains`), as it is pseudo-polynomial.
+
+An evaluation costs `O(tasks * options)` plus one numpy operation per topological level, so the routine can be
+called inside outer search loops. The dynamic program (exact chains and the optional lower bound) costs
+`O(tasks * makespan limit * options)` instead.
+
+Power is only capped per task (`task_power_limit`): options above the cap are never chosen. A limit on the total
+power of all machines at a moment is not supported, it would also depend on the start times of the tasks.
+"""
+
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.schedule import Schedule
+
+
+class TaskGraph:
+    """
+    The precedence graph of a fixed sequence. Tasks are addressed by their position in the schedule, every task
+    has at most one job and one machine predecessor (and successor), `-1` if there is none.
+    """
+
+    def __init__(self, job_predecessor: np.ndarray, machine_predecessor: np.ndarray, order: np.ndarray):
+        n = len(job_predecessor)
+        self.number_of_tasks = n
+        self.job_predecessor = job_predecessor
+        self.machine_predecessor = machine_predecessor
+        self.job_successor = np.full(n, -1, dtype=np.int64)
+        self.machine_successor = np.full(n, -1, dtype=np.int64)
+        has_job, has_machine = job_predecessor >= 0, machine_predecessor >= 0
+        self.job_successor[job_predecessor[has_job]] = np.flatnonzero(has_job)
+        self.machine_successor[machine_predecessor[has_machine]] = np.flatnonzero(has_machine)
+
+        # topological levels: the number of tasks on the longest chain ending in a task
+        level = np.zeros(n, dtype=np.int64)
+        job_predecessor_list, machine_predecessor_list = job_predecessor.tolist(), machine_predecessor.tolist()
+        level_list = level.tolist()
+        for task in order.tolist():
+            jp, mp = job_predecessor_list[task], machine_predecessor_list[task]
+            level_list[task] = 1 + max(level_list[jp] if jp >= 0 else -1, level_list[mp] if mp >= 0 else -1)
+        level = np.array(level_list, dtype=np.int64)
+        by_level = np.argsort(level, kind="stable")
+        bounds = np.searchsorted(level[by_level], np.arange(level.max() + 2 if n else 1))
+        self.levels: List[np.ndarray] = [by_level[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+        # predecessors and successors per level, missing ones point to the sentinel at position n
+        def sentinel(indices):
+            return np.where(indices >= 0, indices, n)
+
+        self._forward = [
+            (tasks, sentinel(job_predecessor[tasks]), sentinel(machine_predecessor[tasks])) for tasks in self.levels
+        ]
+        self._backward = [
+            (tasks, sentinel(self.job_successor[tasks]), sentinel(self.machine_successor[tasks]))
+            for tasks in reversed(self.levels)
+        ]
+
+    @classmethod
+    def from_schedule(cls, schedule: Schedule) -> "TaskGraph":
+        """The graph of the job order and the order of the tasks on each machine (by start time) of a schedule."""
+        n = len(schedule)
+        # sorting by (start, stage, job) is a topological order, also for tasks of zero duration
+        order = np.lexsort((schedule.job, schedule.stage, schedule.start))
+
+        by_job = np.lexsort((schedule.stage, schedule.job))
+        job_predecessor = np.full(n, -1, dtype=np.int64)
+        same_job = schedule.job[by_job][1:] == schedule.job[by_job][:-1]
+        job_predecessor[by_job[1:][same_job]] = by_job[:-1][same_job]
+
+        by_machine = order[np.argsort(schedule.machine[order], kind="stable")]
+        machine_predecessor = np.full(n, -1, dtype=np.int64)
+        same_machine = schedule.machine[by_machine][1:] == schedule.machine[by_machine][:-1]
+        machine_predecessor[by_machine[1:][same_machine]] = by_machine[:-1][same_machine]
+        return cls(job_predecessor, machine_predecessor, order)
+
+    @property
+    def is_chain(self) -> bool:
+        """Whether the tasks form a single chain, i.e. every level holds exactly one task."""
+        return all(len(tasks) == 1 for tasks in self.levels)
+
+    def chain_order(self) -> np.ndarray:
+        return np.concatenate(self.levels) if self.levels else np.empty(0, dtype=np.int64)
+
+    def earliest_starts(self, durations: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Earliest start of every task and the makespan for the given durations."""
+        end = np.zeros(self.number_of_tasks + 1)
+        start = np.zeros(self.number_of_tasks)
+        for tasks, job_predecessor, machine_predecessor in self._forward:
+            level_start = np.maximum(end[job_predecessor], end[machine_predecessor])
+            start[tasks] = level_start
+            end[tasks] = level_start + durations[tasks]
+        return start, float(end[:-1].max()) if self.number_of_tasks else 0.0
+
+    def critical_path(self, durations: np.ndarray) -> np.ndarray:
+        """The tasks of a longest path, in order."""
+        start, _ = self.earliest_starts(durations)
+        end = start + durations
+        task = int(np.argmax(end))
+        path = [task]
+        while True:
+            candidates = [p for p in (self.job_predecessor[task], self.machine_predecessor[task]) if p >= 0]
+            candidates = [p for p in candidates if np.isclose(start[p] + durations[p], start[task])]
+            if not candidates:
+                break
+            task = int(candidates[0])
+            path.append(task)
+        return np.array(path[::-1], dtype=np.int64)
+
+
+@dataclass
+class SpeedAssignment:
+    # (tasks,) chosen option of every task (position in the speed up table)
+    speed: np.ndarray
+    duration: np.ndarray
+    power: np.ndarray
+    start: np.ndarray
+    makespan: float
+    energy: float
+    feasible: bool
+    # lower bound of the energy within the makespan limit, only if requested (`nan` otherwise)
+    lower_bound: float = np.nan
+
+    def apply(self, schedule: Schedule) -> Schedule:
+        """The schedule with the chosen speeds and the resulting earliest start times."""
+        return Schedule(
+            job=schedule.job,
+            stage=schedule.stage,
+            machine=schedule.machine,
+            start=self.start,
+            duration=self.duration,
+            power=self.power,
+        )
+
+
+def task_tables(arrays: InstanceArrays, schedule: Schedule) -> Tuple[np.ndarray, np.ndarray]:
+    """The `(tasks, options)` durations and powers of the tasks of a schedule."""
+    return arrays.speed_up_times[schedule.job, schedule.stage], arrays.speed_up_power[schedule.job, schedule.stage]
+
+
+def _choose(energies: np.ndarray, durations: np.ndarray, multiplier: float) -> np.ndarray:
+    return np.argmin(energies + multiplier * durations, axis=1)
+
+
+def chain_speeds(durations: np.ndarray, energies: np.ndarray, limit: int) -> Tuple[np.ndarray, float]:
+    """
+    Exact minimum energy choice for tasks processed one after the other within `limit` time units
+    (`durations` are integers, infeasible options have infinite energy).
+
+    The dynamic program keeps one entry per task and time unit of the budget, it takes `O(tasks * limit * options)`
+    time and `O(tasks * limit)` memory, i.e. it is pseudo-polynomial and not meant for long chains with large limits.
+
+    Returns:
+        The chosen options and the energy, `inf` if the limit can not be met.
+    """
+    n, options = durations.shape
+    limit = int(limit)
+    durations = durations.astype(np.int64)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), 0.0
+    if durations.min(axis=1).sum() > limit:
+        return np.argmin(durations, axis=1), np.inf
+
+    # best[t] is the minimum energy of the tasks so far finishing within t
+    best = np.zeros(limit + 1)
+    choices = np.empty((n, limit + 1), dtype=np.int8 if options < 128 else np.int64)
+    for task in range(n):
+        candidates = np.full((options, limit + 1), np.inf)
+        for option in range(options):
+            duration = durations[task, option]
+            if duration <= limit:
+                candidates[option, duration:] = best[: limit + 1 - duration] + energies[task, option]
+        choices[task] = np.argmin(candidates, axis=0)
+        best = candidates[choices[task], np.arange(limit + 1)]
+
+    speed = np.empty(n, dtype=np.int64)
+    budget = limit
+    for task in range(n - 1, -1, -1):
+        speed[task] = choices[task, budget]
+        budget -= durations[task, speed[task]]
+    return speed, float(best[limit])
+
+
+def _reclaim_slack(
+    graph: TaskGraph, durations: np.ndarray, energies: np.ndarray, speed: np.ndarray, limit: float
+) -> np.ndarray:
+    """Gives every task (in reverse topological order) the cheapest option fitting into its slack."""
+    rows = np.arange(graph.number_of_tasks)
+    start, _ = graph.earliest_starts(durations[rows, speed])
+    speed = speed.copy()
+    latest_start = np.full(graph.number_of_tasks + 1, float(limit))
+    for tasks, job_successor, machine_successor in graph._backward:
+        latest_finish = np.minimum(latest_start[job_successor], latest_start[machine_successor])
+        fits = durations[tasks] <= (latest_finish - start[tasks])[:, None] + 1e-9
+        cost = np.where(fits, energies[tasks], np.inf)
+        better = np.argmin(cost, axis=1)
+        keep = ~np.isfinite(cost[np.arange(len(tasks)), better])
+        speed[tasks] = np.where(keep, speed[tasks], better)
+        latest_start[tasks] = latest_finish - durations[tasks, speed[tasks]]
+    return speed
+
+
+def assign_speeds(
+    graph: TaskGraph,
+    durations: np.ndarray,
+    power: np.ndarray,
+    makespan_limit: float | None,
+    *,
+    task_power_limit: float | None = None,
+    iterations: int = 40,
+    lower_bound: bool = False,
+    exact_chains: bool = False,
+) -> SpeedAssignment:
+    """
+    Chooses a speed up option for every task minimizing the energy within the makespan limit.
+
+    Args:
+        graph: The precedence graph of the fixed sequence.
+        durations: `(tasks, options)` processing time of every option, e.g. from `task_tables`.
+        power: `(tasks, options)` power of every option.
+        makespan_limit: The longest path must not exceed this limit, `None` for no limit (only the cap on the power
+            of the tasks applies).
+        task_power_limit: Cap on the power of every single task, options with a higher power are not used. This is
+            not a limit on the total power of all machines at a moment.
+        iterations: Number of bisection steps of the Lagrange multiplier.
+        lower_bound: Also calculate a lower bound of the energy (DP on the critical path, pseudo-polynomial).
+        exact_chains: Solve chains exactly with `chain_speeds` (pseudo-polynomial) instead of the Lagrangian.
+
+    Returns:
+        The assignment, if the limit can not be met the fastest assignment with `feasible=False`.
+    """
+    durations = np.asarray(durations)
+    energies = durations * np.asarray(power, dtype=np.float64)
+    allowed = np.ones(durations.shape, dtype=bool) if task_power_limit is None else power <= task_power_limit
+    if not allowed.any(axis=1).all():
+        raise ValueError("The task power limit excludes every option of a task")
+    energies = np.where(allowed, energies, np.inf)
+    # ties between options of equal duration are resolved towards the cheaper one
+    fastest = np.argmin(
+        np.where(allowed, durations + energies / (1 + np.abs(np.where(allowed, energies, 0.0)).max()), np.inf), axis=1
+    )
+
+    def result(speed: np.ndarray, feasible: bool) -> SpeedAssignment:
+        rows = np.arange(len(speed))
+        duration = durations[rows, speed]
+        start, makespan = graph.earliest_starts(duration)
+        return SpeedAssignment(
+            speed=speed,
+            duration=duration,
+            power=np.asarray(power)[rows, speed],
+            start=start,
+            makespan=makespan,
+            energy=float(energies[rows, speed].sum()),
+            feasible=feasible,
+        )
+
+    rows = np.arange(graph.number_of_tasks)
+    cheapest = _choose(energies, durations, 0.0)
+    if makespan_limit is None:
+        return result(cheapest, True)
+
+    if exact_chains and graph.is_chain and float(makespan_limit).is_integer():
+        order = graph.chain_order()
+        speed = np.empty(graph.number_of_tasks, dtype=np.int64)
+        speed[order], energy = chain_speeds(durations[order], energies[order], int(makespan_limit))
+        if not np.isfinite(energy):
+            return result(fastest, False)
+        assignment = result(speed, True)
+        if lower_bound:
+            assignment.lower_bound = energy
+        return assignment
+
+    if graph.earliest_starts(durations[rows, cheapest])[1] <= makespan_limit:
+        assignment = result(cheapest, True)
+        if lower_bound:
+            assignment.lower_bound = assignment.energy
+        return assignment
+    if graph.earliest_starts(durations[rows, fastest])[1] > makespan_limit:
+        return result(fastest, False)
+
+    # bisection of the multiplier, a higher multiplier means shorter durations
+    finite = energies[np.isfinite(energies)]
+    low, high = 0.0, 1.0 + 2 * float(finite.max() - finite.min()) if len(finite) else 1.0
+    best = fastest
+    for _ in range(iterations):
+        multiplier = (low + high) / 2
+        speed = _choose(energies, durations, multiplier)
+        if graph.earliest_starts(durations[rows, speed])[1] <= makespan_limit:
+            high, best = multiplier, speed
+        else:
+            low = multiplier
+
+    assignment = result(_reclaim_slack(graph, durations, energies, best, makespan_limit), True)
+    if lower_bound:
+        assignment.lower_bound = _lower_bound(graph, durations, energies, assignment, makespan_limit)
+    return assignment
+
+
+def _lower_bound(
+    graph: TaskGraph, durations: np.ndarray, energies: np.ndarray, assignment: SpeedAssignment, limit: float
+) -> float:
+    # the tasks of any path have to meet the limit on their own, all others need at least their minimum energy
+    path = graph.critical_path(assignment.duration)
+    others = np.ones(graph.number_of_tasks, dtype=bool)
+    others[path] = False
+    _, path_energy = chain_speeds(durations[path], energies[path], int(np.floor(limit)))
+    return float(path_energy + energies[others].min(axis=1).sum())
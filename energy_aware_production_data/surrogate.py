@@ -0,0 +1,223 @@
+"""
+Approximate PV coverage of power profiles with a rigorous error bound, to screen many candidates cheaply.
+
+Every day of the PVGIS series of a city is assigned to one of a few typical days (k-means centroids of the daily
+PV curves, see `build_pv_basis`). A profile is split into day blocks and the covered energy of every block is
+computed once against every centroid, so the estimate for a start day is a sum of table lookups, one per block,
+independent of the length of the series.
+
+Since `|min(l, a) - min(l, b)| <= min(|a - b|, l)` for every hour, the error of a block is at most the L1 distance
+of the real day to its centroid (times the scaling factor) and at most the energy of the load in the block. The
+sum over the blocks bounds the error of the estimate, so `shortlist` can discard start days without ever losing
+one of the exact best ones. `compare` reports the actual error against `pv_coverage`.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from energy_aware_production_data.coverage import CoverageMatrix
+from energy_aware_production_data.pvgis import PvgisSet
+
+
+def kmeans(values: np.ndarray, clusters: int, *, iterations: int = 50, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lloyd's algorithm with k-means++ initialization.
+
+    Returns:
+        The `(clusters, features)` centroids and the cluster of every row of `values`.
+    """
+    rng = np.random.default_rng(seed)
+    clusters = min(clusters, len(values))
+    squared_norms = np.einsum("ij,ij->i", values, values)
+
+    def distances(centroids):
+        return np.maximum(squared_norms[:, None] - 2 * values @ centroids.T + (centroids**2).sum(axis=1), 0.0)
+
+    centroids = values[[rng.integers(len(values))]]
+    while len(centroids) < clusters:
+        nearest = distances(centroids).min(axis=1)
+        if nearest.sum() == 0:
+            break
+        centroids = np.vstack([centroids, values[rng.choice(len(values), p=nearest / nearest.sum())]])
+
+    labels = np.full(len(values), -1)
+    for _ in range(iterations):
+        new_labels = distances(centroids).argmin(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=len(centroids))
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, values)
+        # empty clusters keep their centroid
+        centroids = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centroids)
+    return centroids, labels
+
+
+@dataclass
+class CoverageEstimate(CoverageMatrix):
+    """Estimated coverage metrics, the real `covered_energy` lies within `± error_bound`."""
+
+    error_bound: np.ndarray
+
+    @property
+    def lower(self) -> np.ndarray:
+        return np.maximum(self.covered_energy - self.error_bound, 0.0)
+
+    @property
+    def upper(self) -> np.ndarray:
+        return self.covered_energy + self.error_bound
+
+    def shortlist(self, top: int) -> np.ndarray:
+        """
+        Start days which can be among the `top` days with the most covered energy of each profile (over all cities),
+        a `(profiles, cities, start days)` mask. Only these need an exact evaluation.
+        """
+        profiles = len(self.covered_energy)
+        lower = self.lower.reshape(profiles, -1)
+        top = min(top, lower.shape[1])
+        if top == 0:
+            return np.zeros(self.covered_energy.shape, dtype=bool)
+        threshold = -np.partition(-lower, top - 1, axis=1)[:, top - 1]
+        return self.upper >= threshold[:, None, None]
+
+
+@dataclass
+class PvBasis:
+    """Typical days of the PVGIS power of every city, built by `build_pv_basis`."""
+
+    cities: List[str]
+    start_hour: int
+    # timestamps of the day blocks, the last one may be incomplete
+    days: pd.DatetimeIndex
+    # (cities, clusters, 24) centroids of the 1 kWp PV power
+    centroids: np.ndarray
+    # (cities, days) centroid of every day
+    labels: np.ndarray
+    # (cities, days) L1 distance (Wh) of every day to its centroid
+    residual: np.ndarray
+    # (cities, hours + 1) prefix sums of the PV power, for the exact PV energy
+    prefix: np.ndarray
+
+    def estimate(self, profiles: np.ndarray, *, scaling_factor: float = 1.0) -> CoverageEstimate:
+        """
+        Estimates the coverage of hourly power profiles for every city and start day, like `pv_coverage`.
+
+        Args:
+            profiles: `(hours,)` or `(profiles, hours)` average power in W, e.g. `Schedule.power_profile(60)`.
+            scaling_factor: Factor applied to the (1 kWp) PV power, e.g. the `PvScalingFactor` of the instance.
+        """
+        profiles = np.atleast_2d(np.asarray(profiles, dtype=np.float64))
+        hours = profiles.shape[1]
+        cities = len(self.cities)
+        days = max(0, (self.prefix.shape[1] - 1 - hours) // 24 + 1)
+        blocks = -(-hours // 24)
+
+        # padding the profiles with 0 load does not change the covered energy
+        padded = np.zeros((len(profiles), blocks, 24))
+        padded.reshape(len(profiles), -1)[:, :hours] = profiles
+        block_energy = padded.sum(axis=2)
+        centroids = self.centroids * scaling_factor
+
+        windows = np.arange(days)[:, None] + np.arange(blocks)
+        labels = self.labels[:, windows]
+        residual = self.residual[:, windows] * scaling_factor
+        city_index = np.arange(cities)[:, None, None]
+        block_index = np.arange(blocks)[None, None, :]
+
+        covered = np.empty((len(profiles), cities, days))
+        error_bound = np.empty((len(profiles), cities, days))
+        for p in range(len(profiles)):
+            # (cities, blocks, clusters) covered energy of every block against every centroid
+            table = np.minimum(padded[p][None, :, None, :], centroids[:, None, :, :]).sum(axis=3)
+            covered[p] = table[city_index, block_index, labels].sum(axis=2)
+            error_bound[p] = np.minimum(residual, block_energy[p]).sum(axis=2)
+
+        starts = np.arange(days) * 24
+        pv_energy = (self.prefix[:, starts + hours] - self.prefix[:, starts]) * scaling_factor
+        return CoverageEstimate(
+            cities=list(self.cities),
+            start_days=self.days[:days],
+            load_energy=profiles.sum(axis=1),
+            covered_energy=covered,
+            pv_energy=np.broadcast_to(pv_energy, covered.shape),
+            error_bound=error_bound,
+        )
+
+
+def build_pv_basis(pvgis: PvgisSet, *, clusters: int = 16, start_hour: int = 0, seed: int = 0) -> PvBasis:
+    """
+    Clusters the days (starting at `start_hour`) of the PVGIS `power` of every city into typical days.
+
+    Args:
+        pvgis: The PVGIS series of the cities, see `load_pvgis`.
+        clusters: Number of typical days per city, more give smaller errors and slower estimates.
+        start_hour: Hour of the day the profiles start at.
+        seed: Seed of the k-means initialization.
+    """
+    pv = pvgis["power"][:, start_hour:]
+    days = -(-pv.shape[1] // 24)
+    daily = np.zeros((len(pv), days * 24))
+    daily[:, : pv.shape[1]] = pv
+    daily = daily.reshape(len(pv), days, 24)
+
+    centroids = np.zeros((len(pv), min(clusters, days), 24))
+    labels = np.zeros((len(pv), days), dtype=np.int64)
+    for c in range(len(pv)):
+        city_centroids, labels[c] = kmeans(daily[c], clusters, seed=seed)
+        centroids[c, : len(city_centroids)] = city_centroids
+    residual = np.abs(daily - np.take_along_axis(centroids, labels[:, :, None], axis=1)).sum(axis=2)
+
+    return PvBasis(
+        cities=list(pvgis.cities),
+        start_hour=start_hour,
+        days=pvgis.timestamps[start_hour::24][:days],
+        centroids=centroids,
+        labels=labels,
+        residual=residual,
+        prefix=np.concatenate([np.zeros((len(pv), 1)), np.cumsum(pv, axis=1)], axis=1),
+    )
+
+
+@dataclass
+class SurrogateAccuracy:
+    # absolute errors of the covered energy (Wh)
+    max_error: float
+    mean_error: float
+    # mean of the error bounds (Wh)
+    mean_bound: float
+    # share of the estimates within their bound, 1 unless the estimate and the exact result differ in their setup
+    within_bound: float
+    # Spearman rank correlation of the estimated and exact covered energy per profile
+    rank_correlation: np.ndarray
+
+
+def compare(estimate: CoverageEstimate, exact: CoverageMatrix) -> SurrogateAccuracy:
+    """Measures the accuracy of an estimate against the exact evaluation (`pv_coverage`) of the same profiles."""
+    if estimate.covered_energy.shape != exact.covered_energy.shape:
+        raise ValueError(f"Shapes differ: {estimate.covered_energy.shape} != {exact.covered_energy.shape}")
+    error = np.abs(estimate.covered_energy - exact.covered_energy)
+    profiles = len(error)
+
+    def ranks(values):
+        # ties (e.g. start days without any PV) share their average rank
+        return rankdata(values.reshape(profiles, -1), axis=1)
+
+    estimated_ranks, exact_ranks = ranks(estimate.covered_energy), ranks(exact.covered_energy)
+    estimated_ranks -= estimated_ranks.mean(axis=1, keepdims=True)
+    exact_ranks -= exact_ranks.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (estimated_ranks * exact_ranks).sum(axis=1) / np.sqrt(
+            (estimated_ranks**2).sum(axis=1) * (exact_ranks**2).sum(axis=1)
+        )
+    return SurrogateAccuracy(
+        max_error=float(error.max()) if error.size else 0.0,
+        mean_error=float(error.mean()) if error.size else 0.0,
+        mean_bound=float(estimate.error_bound.mean()) if error.size else 0.0,
+        within_bound=float((error <= estimate.error_bound + 1e-6).mean()) if error.size else 1.0,
+        rank_correlation=correlation,
+    )
@@ -14,10 +14,12 @@ from adjustText import adjust_text
 from matplotlib import pyplot as plt
 from shapely import Point
 
+from energy_aware_production_data.aggregates import build_pv_aggregates
 from energy_aware_production_data.data_package import (
     EnergyAwareSchedulingDataPackage,
     LocalPaths,
 )
+from energy_aware_production_data.profiling import Profiler, stage
 
 # %% [markdown]
 # # Energy Aware Production
@@ -73,7 +75,8 @@ def filter_mastr(mastr_solar_path: Path, target_path: Path) -> pd.DataFrame:
     # - Must be a rooftop or facade installation
     # - kwP must be over 0 and below the 95% quantile
     # - Must have a valid orientation and inclination
-    mastr = pd.read_csv(mastr_solar_path, low_memory=False)
+    with stage("read"):
+        mastr = pd.read_csv(mastr_solar_path, low_memory=False)
 
     mastr = mastr[mastr["Lage"] == "Bauliche Anlagen (Hausdach, Gebäude und Fassade)"]
 
@@ -128,13 +131,17 @@ def filter_mastr(mastr_solar_path: Path, target_path: Path) -> pd.DataFrame:
         inplace=True,
     )
 
-    mastr.to_csv(target_path)
+    with stage("write"):
+        mastr.to_csv(target_path)
 
     return target_path
 
 
 # %%
-file_name = filter_mastr(dp.pv_mastr_column_filtered, dp.pv_mastr_industrial_solar)
+# the time and memory spent per stage is reported in `profile.json` next to `parameters.json`
+with Profiler("filter_mastr", trace_memory=True) as profiler, stage("filter_mastr"):
+    file_name = filter_mastr(dp.pv_mastr_column_filtered, dp.pv_mastr_industrial_solar)
+profiler.write(dp.scheduling_profile_json)
 industial_data = pd.read_csv(dp.pv_mastr_industrial_solar, low_memory=False)
 
 # %%
@@ -366,18 +373,23 @@ for index, meta in industrial_cities.iterrows():
 
 
 pvgis_final = []
-for city, config in pvgis_configs:
-    raw_data = query_pvgis(config)
-    # normalize dataframe to standard structure
-    data = pd.json_normalize(raw_data["outputs"]["hourly"])
-    data = data.rename(columns=map_pvgis_raw_to_normalized).assign(
-        ds=lambda df: pd.to_datetime(df["ds"], format="%Y%m%d:%H%M")
-    )
-
-    # normalize the city name (replace Umlauts, replace spaces with _, remove dots)
-    city = city.replace(" ", "_").replace(".", "").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
-    data.to_csv(base_path / f"{city}.csv")
-    pvgis_final.append({"city": city, **config})
+with Profiler("pvgis", trace_memory=True) as profiler:
+    for city, config in pvgis_configs:
+        with stage("query"):
+            raw_data = query_pvgis(config)
+        # normalize dataframe to standard structure
+        with stage("normalize"):
+            data = pd.json_normalize(raw_data["outputs"]["hourly"])
+            data = data.rename(columns=map_pvgis_raw_to_normalized).assign(
+                ds=lambda df: pd.to_datetime(df["ds"], format="%Y%m%d:%H%M")
+            )
+
+        # normalize the city name (replace Umlauts, replace spaces with _, remove dots)
+        city = city.replace(" ", "_").replace(".", "").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
+        with stage("write"):
+            data.to_csv(base_path / f"{city}.csv")
+        pvgis_final.append({"city": city, **config})
+profiler.write(dp.scheduling_profile_json)
 
 
 # %%
@@ -427,7 +439,11 @@ plt.tight_layout()
 plt.show()
 
 # %%
-monthly_data = data["power"].resample("M").sum()
+# daily, weekly and monthly aggregates of all cities, built once and stored in `pvgis_aggregates.npz`
+aggregates = build_pv_aggregates(dp)
+
+# %%
+monthly_data = aggregates.query("month", "power", "sum", cities=[city])[city]
 
 # Convert to DataFrame for seaborn compatibility
 monthly_df = monthly_data.reset_index()
@@ -456,7 +472,7 @@ plt.show()
 
 # %%
 # Resample to daily
-daily_power = data["power"].resample("D").sum()
+daily_power = aggregates.query("day", "power", "sum", cities=[city])[city]
 mean_power = daily_power.mean()
 median_power = daily_power.median()
 
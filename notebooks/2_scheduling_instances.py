@@ -6,16 +6,23 @@ from typing import Dict, Generator, List
 import numpy as np
 from matplotlib import pyplot as plt
 
+from energy_aware_production_data.bounds import BoundsRegistry
 from energy_aware_production_data.data_package import (
     EnergyAwareSchedulingDataPackage,
-    Job,
     LocalPaths,
+)
+from energy_aware_production_data.instancia import (
+    instance_id_from_path,
+    parse_instancia,
+)
+from energy_aware_production_data.models import (
+    Job,
     Machine,
     ProblemInstance,
     Stage,
     Task,
 )
-from energy_aware_production_data.helper import read_makespan_file
+from energy_aware_production_data.profiling import Profiler, stage
 
 # %% [markdown]
 # # Scheduling Instances
@@ -28,7 +35,7 @@ dp = EnergyAwareSchedulingDataPackage(LocalPaths.data)
 # %% [markdown]
 # First we read the best known makespans from a file
 # Lookup table for best known makespan
-BEST_KNOWN_MAKESPANS = read_makespan_file(dp.scheduling_bounds)
+BEST_KNOWN_MAKESPANS = BoundsRegistry(dp.scheduling_bounds)
 
 
 # %%
@@ -89,24 +96,19 @@ def transform_input_to_json(
     beta: float = 2.0,
     input_energy_coverage: float = 0.8,
 ) -> str:
-    lines = input_str.strip().split("\n")
-
-    # Read Number of Jobs and Number of Stages
-    num_jobs, num_stages = map(int, lines[0].split())
-
-    # Read number of machines per stage
-    machines_per_stage = list(map(int, lines[1].split()))
-
-    # Read processing times for jobs
-    # processing_times = [list(map(int, line.split())) for line in lines[2:]]
-    processing_times = np.array([list(map(int, line.split())) for line in lines[2:]]).T
+    with stage("parse"):
+        raw = parse_instancia(input_str, source=instance_id)
+    num_jobs, num_stages = raw.number_of_jobs, raw.number_of_stages
+    machines_per_stage = raw.machines_per_stage.tolist()
+    # (jobs, stages), the raw input lists the processing times per stage
+    processing_times = raw.processing_times
 
     # Define speed range using numpy for better precision
     v_range = np.round(np.arange(v_min, v_max + v_step, v_step), 2).tolist()
 
     # Retrieve known makespan from lookup table
-    best_known_makespan = BEST_KNOWN_MAKESPANS.get(tuple(instance_id.split("_")), -1)
-    if best_known_makespan == -1:
+    best_known_makespan = BEST_KNOWN_MAKESPANS.makespan(*map(int, instance_id.split("_")))
+    if best_known_makespan is None:
         raise ValueError(f"Best known makespan not found for instance {instance_id}")
 
     best_known_energy = best_known_makespan * alpha
@@ -115,38 +117,44 @@ def transform_input_to_json(
     amplifiers = calculate_amplifiers(v_range, alpha, beta)
 
     # Construct the JSON structure
-    machine_id = 0
-    stage_list = []
-    for stage_number, num_machines in enumerate(machines_per_stage):
-        machines = [Machine(machine_id=machine_id + i, stage_number=stage_number) for i in range(num_machines)]
-        stage_list.append(Stage(machines=machines))
-        machine_id += num_machines
-
-    task_id = 0
-    job_list = []
-    for job_id, job_times in enumerate(processing_times):
-        tasks = []
-        for stage, time in enumerate(job_times):
-            tasks.append(
-                Task(
-                    id=task_id, stage=stage, processing_time=time, speed_up=calculate_speedup_for_task(amplifiers, time)
+    with stage("stages"):
+        machine_id = 0
+        stage_list = []
+        for stage_number, num_machines in enumerate(machines_per_stage):
+            machines = [Machine(machine_id=machine_id + i, stage_number=stage_number) for i in range(num_machines)]
+            stage_list.append(Stage(machines=machines))
+            machine_id += num_machines
+
+    with stage("speed_up"):
+        speed_ups = [
+            [calculate_speedup_for_task(amplifiers, time) for time in job_times] for job_times in processing_times
+        ]
+
+    with stage("tasks"):
+        task_id = 0
+        job_list = []
+        for job_id, job_times in enumerate(processing_times):
+            tasks = []
+            for stage_number, time in enumerate(job_times):
+                tasks.append(
+                    Task(id=task_id, stage=stage_number, processing_time=time, speed_up=speed_ups[job_id][stage_number])
                 )
-            )
-            task_id += 1
-        job_list.append(Job(id=job_id, tasks=tasks))
-
-    return ProblemInstance(
-        number_of_jobs=num_jobs,
-        number_of_stages=num_stages,
-        instance=instance_id.split("_")[-1],
-        best_known_makespan=best_known_makespan,
-        best_known_energy=best_known_energy,
-        stage_list=stage_list,
-        job_list=job_list,
-        amplifiers=amplifiers,
-        alpha=alpha,
-        beta=beta,
-    )
+                task_id += 1
+            job_list.append(Job(id=job_id, tasks=tasks))
+
+    with stage("validation"):
+        return ProblemInstance(
+            number_of_jobs=num_jobs,
+            number_of_stages=num_stages,
+            instance=instance_id.split("_")[-1],
+            best_known_makespan=best_known_makespan,
+            best_known_energy=best_known_energy,
+            stage_list=stage_list,
+            job_list=job_list,
+            amplifiers=amplifiers,
+            alpha=alpha,
+            beta=beta,
+        )
 
 
 # %% [markdown]
@@ -159,20 +167,23 @@ parameters = dict(
     beta=2.0,
 )
 # %%
-# Example usage
+# Example usage, the time and memory spent per stage is reported in `profile.json` next to `parameters.json`
 schema = None
-for index, (filename, content) in enumerate(load_text_files_from_directory(dp.scheduling_instances), start=1):
-    instance_id = filename.name.replace("instancia_", "").replace(".txt", "")
-    instance = transform_input_to_json(content, instance_id, **parameters)
-
-    if schema is None:
-        schema = instance.model_json_schema()
-
-    stringified = json.dumps(instance.model_dump(by_alias=True))
-    # save to file
-    target_path = (dp.scheduling_json_instances / instance_id).with_suffix(".json")
-    with open(target_path, "w") as file:
-        file.write(stringified)
+with Profiler("scheduling_instances", trace_memory=True) as profiler:
+    for index, (filename, content) in enumerate(load_text_files_from_directory(dp.scheduling_instances), start=1):
+        instance_id = instance_id_from_path(filename)
+        with stage("transform"):
+            instance = transform_input_to_json(content, instance_id, **parameters)
+
+        if schema is None:
+            schema = instance.model_json_schema()
+
+        with stage("write"):
+            stringified = json.dumps(instance.model_dump(by_alias=True))
+            # save to file
+            target_path = (dp.scheduling_json_instances / instance_id).with_suffix(".json")
+            with open(target_path, "w") as file:
+                file.write(stringified)
 
 # save the schema to a file
 with open(dp.scheduling_schema_json, "w") as file:
@@ -181,9 +192,11 @@ with open(dp.scheduling_schema_json, "w") as file:
 with open(dp.scheduling_parameters_json, "w+") as file:
     json.dump(parameters, file, indent=4)
 
+profiler.write(dp.scheduling_profile_json)
+
 # %%
 # extract values
-values = list(BEST_KNOWN_MAKESPANS.values())
+values = BEST_KNOWN_MAKESPANS.makespans
 
 # calculate mean and median
 mean_value = np.mean(values)
@@ -200,11 +213,8 @@ plt.show()
 # %%
 # group data by the task size
 grouped_data = {}
-for key, value in BEST_KNOWN_MAKESPANS.items():
-    group = int(key[0])
-    if group not in grouped_data:
-        grouped_data[group] = []
-    grouped_data[group].append(value)
+for group, number_of_stages in BEST_KNOWN_MAKESPANS.size_classes():
+    grouped_data.setdefault(group, []).extend(BEST_KNOWN_MAKESPANS.size_class(group, number_of_stages).makespans)
 
 # calculate the average makespan for each group
 average_makespans = {group: np.mean(values) for group, values in grouped_data.items()}
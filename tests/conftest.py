@@ -0,0 +1,103 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage
+
+# (number of jobs, number of stages, instance, machines per stage)
+INSTANCES = [
+    (4, 2, 1, [1, 2]),
+    (4, 2, 2, [2, 1]),
+    (6, 3, 1, [1, 2, 1]),
+    (6, 3, 2, [2, 2, 1]),
+    (8, 2, 1, [2, 3]),
+    (8, 2, 2, [1, 1]),
+    (10, 3, 1, [3, 1, 2]),
+    (10, 3, 2, [2, 2, 2]),
+]
+ALPHA = 1000
+BETA = 2.0
+
+
+def build_instance(number_of_jobs: int, number_of_stages: int, instance: int, machines_per_stage, seed: int = 0):
+    """Builds an instance dict the same way `2_scheduling_instances.py` does."""
+    rng = random.Random(seed)
+    v_range = [round(1 + 0.1 * i, 2) for i in range(11)]
+    amplifiers = {v: round(v**BETA * ALPHA, 2) for v in v_range}
+
+    stage_list = []
+    machine_id = 0
+    for stage_number, num_machines in enumerate(machines_per_stage):
+        machines = [{"MachineId": machine_id + i, "StageNumber": stage_number} for i in range(num_machines)]
+        stage_list.append({"Machines": machines})
+        machine_id += num_machines
+
+    job_list = []
+    task_id = 0
+    for job_id in range(number_of_jobs):
+        tasks = []
+        for stage in range(number_of_stages):
+            processing_time = rng.randint(5, 99)
+            speed_up = {}
+            for divisor, factor in amplifiers.items():
+                pt_speedup = round(processing_time / divisor, 3)
+                speed_up[str(int(pt_speedup))] = int(round(processing_time * factor / pt_speedup, 3))
+            tasks.append({"Id": task_id, "Stage": stage, "ProcessingTime": processing_time, "SpeedUp": speed_up})
+            task_id += 1
+        job_list.append({"Id": job_id, "Tasks": tasks})
+
+    best_known_makespan = 100 * number_of_jobs
+    return {
+        "NumberOfJobs": number_of_jobs,
+        "NumberOfStages": number_of_stages,
+        "Instance": instance,
+        "Amplifiers": {str(k): v for k, v in amplifiers.items()},
+        "Alpha": ALPHA,
+        "Beta": BETA,
+        "PvScalingFactor": None,
+        "BestKnownMakespan": best_known_makespan,
+        "BestKnownEnergy": best_known_makespan * ALPHA,
+        "StageList": stage_list,
+        "JobList": job_list,
+    }
+
+
+def write_pvgis_csv(path: Path, days: int, seed: int = 0):
+    """Writes a normalized PVGIS csv with a simple day/night power curve."""
+    rng = random.Random(seed)
+    lines = [",ds,power,global_irradiance,sun_height,temperature_at_2_m,wind_speed_at_10_m,is_reconstructed"]
+    for hour in range(days * 24):
+        hour_of_day = hour % 24
+        daylight = max(0.0, 1 - abs(hour_of_day - 12) / 6)
+        cloudiness = rng.uniform(0.3, 1.0)
+        power = round(1000 * daylight * cloudiness, 2)
+        day, hod = divmod(hour, 24)
+        timestamp = f"2005-01-{day + 1:02d} {hod:02d}:10:00"
+        lines.append(
+            f"{hour},{timestamp},{power},{power * 1.1:.2f},{daylight * 60:.2f},{rng.uniform(-5, 25):.2f},1.0,0"
+        )
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def data_package(tmp_path: Path) -> EnergyAwareSchedulingDataPackage:
+    """A tiny but complete data package with a couple of instances and PVGIS series."""
+    dp = EnergyAwareSchedulingDataPackage(tmp_path)
+    dp.scheduling_json_instances.mkdir(parents=True)
+    dp.scheduling_instances.mkdir(parents=True)
+    dp.pv_pvgis_data.mkdir(parents=True)
+
+    bounds = []
+    for seed, (jobs, stages, instance, machines) in enumerate(INSTANCES):
+        data = build_instance(jobs, stages, instance, machines, seed=seed)
+        (dp.scheduling_json_instances / f"{jobs}_{stages}_{instance}.json").write_text(json.dumps(data))
+        bounds.append(f"{jobs} {stages} {instance} {data['BestKnownMakespan']}")
+    dp.scheduling_bounds.write_text("\n".join(bounds) + "\n")
+    dp.scheduling_parameters_json.write_text(json.dumps({"v_min": 1, "v_max": 2.0, "v_step": 0.1, "alpha": ALPHA}))
+
+    for seed, city in enumerate(["Linz", "Wien", "Graz"]):
+        write_pvgis_csv(dp.pv_pvgis_data / f"{city}.csv", days=14, seed=seed)
+
+    return dp
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from energy_aware_production_data.aggregates import (
+    STATISTICS,
+    build_pv_aggregates,
+    load_pv_aggregates,
+)
+from energy_aware_production_data.pvgis import load_pvgis
+from tests.conftest import write_pvgis_csv
+
+
+def test_aggregates_match_resampling(data_package):
+    aggregates = build_pv_aggregates(data_package)
+    stored = load_pv_aggregates(data_package.pv_pvgis_aggregates)
+    assert stored.cities == ["Graz", "Linz", "Wien"]
+
+    wien = pd.read_csv(data_package.pv_pvgis_data / "Wien.csv", parse_dates=["ds"]).set_index("ds")
+    for resolution, rule in [("day", "D"), ("week", "W-SUN"), ("month", "MS")]:
+        expected = wien["power"].resample(rule, label="left" if rule == "MS" else "right").agg(["sum", "min", "max"])
+        for statistic in ("sum", "min", "max"):
+            result = stored.query(resolution, "power", statistic)["Wien"]
+            assert np.allclose(result.to_numpy(), expected[statistic].to_numpy())
+            assert result.equals(aggregates.query(resolution, "power", statistic)["Wien"])
+
+    # weeks start on Monday, the series starts on Saturday 2005-01-01
+    weeks = stored.query("week", "temperature_at_2_m", "mean", cities=["Linz"])
+    assert list(weeks.index.day_name()) == ["Monday"] * 3
+    assert list(stored.query("week", statistic="count")["Graz"]) == [48, 168, 120]
+
+    days = stored.query("day", "global_irradiance", "max", start="2005-01-03", end="2005-01-05")
+    assert list(days.index) == [pd.Timestamp("2005-01-03"), pd.Timestamp("2005-01-04")]
+    assert days.shape == (2, 3)
+
+
+def test_missing_hours_are_left_out(data_package):
+    # Wien lacks the second week, Graz sets the timestamps
+    write_pvgis_csv(data_package.pv_pvgis_data / "Wien.csv", days=7, seed=1)
+    pvgis = load_pvgis(data_package, columns=["power", "temperature_at_2_m"])
+    wien = pvgis.city_index("Wien")
+    assert pvgis.missing[wien].sum() == 7 * 24 and not pvgis.missing[pvgis.city_index("Graz")].any()
+    assert (pvgis["power"][wien, 7 * 24 :] == 0).all()
+    assert np.isnan(pvgis["temperature_at_2_m"][wien, 7 * 24 :]).all()
+
+    aggregates = build_pv_aggregates(data_package, save=False)
+    counts = aggregates.query("week", "temperature_at_2_m", "count")
+    assert list(counts["Graz"]) == [48, 168, 120]
+    assert list(counts["Wien"]) == [48, 120, 0]
+
+    temperature = pd.read_csv(data_package.pv_pvgis_data / "Wien.csv")["temperature_at_2_m"]
+    weeks = {statistic: aggregates.query("week", "temperature_at_2_m", statistic)["Wien"] for statistic in STATISTICS}
+    assert np.isclose(weeks["min"].iloc[1], temperature[48:].min())
+    assert np.isclose(weeks["mean"].iloc[1], temperature[48:].mean())
+    assert np.isnan([weeks["min"].iloc[2], weeks["max"].iloc[2], weeks["mean"].iloc[2]]).all()
+    assert weeks["sum"].iloc[2] == 0
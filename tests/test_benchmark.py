@@ -0,0 +1,82 @@
+import sys
+import time
+
+import numpy as np
+
+from energy_aware_production_data.benchmark import ResultStore, run_benchmark
+from energy_aware_production_data.simulation import simulate
+
+
+def fifo(arrays, time_limit):
+    return simulate(arrays).schedule
+
+
+def slow_or_greedy(arrays, time_limit):
+    if arrays.number_of_jobs == 4:
+        time.sleep(10)
+    if arrays.number_of_jobs == 6:
+        np.ones(1 << 28)
+    if arrays.number_of_jobs == 8:
+        raise RuntimeError("no schedule found")
+    return {"makespan": float(arrays.best_known_makespan), "energy": None}
+
+
+def test_runs_are_stored_and_resumed(data_package):
+    results = run_benchmark(data_package, fifo, name="fifo", instances=lambda i: i.startswith("4_"), max_workers=2)
+    assert sorted(results["instance_id"]) == ["4_2_1", "4_2_2"]
+    assert (results["status"] == "ok").all()
+    row = results.set_index("instance_id").loc["4_2_1"]
+    expected = simulate(data_package.read_instance_arrays("4_2_1")).schedule
+    assert row["makespan"] == expected.makespan
+    assert np.isclose(row["makespan_gap"], (expected.makespan - 400) / 400)
+
+    store = ResultStore(data_package.scheduling_benchmarks)
+    parts = store.parts()
+    results = run_benchmark(data_package, fifo, name="fifo", instances=["4_2_1", "6_3_1"], repeats=2)
+    assert len(store.parts()) == len(parts) + 1
+    assert sorted(zip(results["instance_id"], results["repeat"])) == [
+        ("4_2_1", 0),
+        ("4_2_1", 1),
+        ("4_2_2", 0),
+        ("6_3_1", 0),
+        ("6_3_1", 1),
+    ]
+
+
+def test_limits(data_package):
+    started = time.perf_counter()
+    results = run_benchmark(
+        data_package,
+        slow_or_greedy,
+        name="limits",
+        instances=["4_2_1", "6_3_1", "8_2_1", "10_3_1"],
+        time_limit=0.5,
+        kill_grace=0.5,
+        memory_limit=1 << 30,
+    ).set_index("instance_id")
+    assert time.perf_counter() - started < 5
+    assert results.loc["4_2_1", "status"] == "timeout"
+    assert results.loc["6_3_1", "status"] == "memory_limit"
+    assert results.loc["8_2_1", "status"] == "error"
+    assert "no schedule found" in results.loc["8_2_1", "error"]
+    assert results.loc["10_3_1", "makespan_gap"] == 0.0
+    assert np.isnan(results.loc["10_3_1", "energy_gap"])
+
+
+def test_command_solver(data_package):
+    script = "import json, sys; data = json.load(open(sys.argv[1])); print(json.dumps({'makespan': data['BestKnownMakespan'] * 1.5, 'energy': data['BestKnownEnergy']}))"
+    results = run_benchmark(
+        data_package, [sys.executable, "-c", script, "{instance}"], name="command", instances=["6_3_2", "8_2_2"]
+    )
+    assert (results["status"] == "ok").all()
+    assert np.allclose(results["makespan_gap"], 0.5)
+    assert np.allclose(results["energy_gap"], 0.0)
+    assert (results["max_rss"] > 0).all()
+
+
+def test_command_memory_limit(data_package):
+    script = "data = bytearray(4 << 30)"
+    results = run_benchmark(
+        data_package, [sys.executable, "-c", script], name="command_memory", instances=["4_2_1"], memory_limit=1 << 30
+    )
+    assert results.loc[0, "status"] == "memory_limit"
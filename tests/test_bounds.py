@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from energy_aware_production_data.bounds import BoundsRegistry
+
+
+def _report(args):
+    bounds_file, log_file, makespan = args
+    registry = BoundsRegistry(bounds_file, log_file)
+    return registry.report(4, 2, 1, makespan=makespan, energy=makespan * 1000.0)
+
+
+def test_lookup_and_size_classes(data_package):
+    registry = BoundsRegistry.from_data_package(data_package)
+
+    assert len(registry) == 8
+    assert registry.makespan(4, 2, 1) == 400
+    assert registry.energy(4, 2, 1) is None
+    assert registry.makespan(99, 2, 1) is None
+    assert registry.size_classes() == [(4, 2), (6, 3), (8, 2), (10, 3)]
+
+    size_class = registry.size_class(10, 3)
+    assert size_class.instances.tolist() == [1, 2]
+    assert size_class.makespans.tolist() == [1000, 1000]
+
+
+def test_malformed_lines_are_reported(data_package):
+    data_package.scheduling_bounds.write_text("4 2 1 400\n4 2 x 400\n")
+    with pytest.raises(ValueError, match="best_makespans.txt:2"):
+        BoundsRegistry(data_package.scheduling_bounds)
+
+    data_package.scheduling_bounds.write_text("4 2 1 400\n")
+    registry = BoundsRegistry.from_data_package(data_package)
+    registry.report(4, 2, 1, makespan=390)
+    registry.report(4, 2, 1, makespan=380)
+    registry.refresh()
+    with open(data_package.scheduling_bounds_log, "a") as log:
+        log.write("4 2 1 x\n")
+    # the line number counts from the start of the log, not from the last read position
+    with pytest.raises(ValueError, match="best_bounds.log:3"):
+        registry.refresh()
+
+
+def test_concurrent_reports_and_compaction(data_package):
+    makespans = list(range(399, 300, -1))
+    args = [(data_package.scheduling_bounds, data_package.scheduling_bounds_log, m) for m in makespans]
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(_report, args))
+    # the workers race, any of them may be the first to improve the literature bound
+    assert any(results)
+
+    registry = BoundsRegistry.from_data_package(data_package)
+    assert registry.makespan(4, 2, 1) == 301
+    assert registry.energy(4, 2, 1) == 301000.0
+    assert not registry.report(4, 2, 1, makespan=350)
+
+    other = BoundsRegistry.from_data_package(data_package)
+    registry.compact()
+    assert data_package.scheduling_bounds_log.read_text() == "4 2 1 301 301000.0\n"
+
+    assert other.report(6, 3, 2, energy=5.0)
+    assert registry.refresh() > 0
+    assert registry.makespan(4, 2, 1) == 301
+    assert registry.energy(6, 3, 2) == 5.0
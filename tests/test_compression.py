@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from energy_aware_production_data.compression import (
+    ZstdArchive,
+    compress_data_package,
+    write_archive,
+)
+
+
+@pytest.mark.parametrize("layout", ["files", "archive"])
+def test_compressed_layouts_are_read_transparently(data_package, layout):
+    expected_ids = data_package.instance_ids()
+    expected = {instance_id: data_package.read_instance_bytes(instance_id) for instance_id in expected_ids}
+    expected_csv = pd.read_csv(data_package.open_pvgis_csv("Wien"))
+
+    compress_data_package(data_package, layout=layout, remove_source=True)
+    assert not list(data_package.scheduling_json_instances.glob("*_*.json"))
+
+    assert data_package.instance_ids() == expected_ids
+    for instance_id, content in expected.items():
+        assert data_package.read_instance_bytes(instance_id) == content
+    assert data_package.read_instance(expected_ids[0]).number_of_jobs > 0
+
+    assert data_package.pvgis_cities() == ["Graz", "Linz", "Wien"]
+    pd.testing.assert_frame_equal(pd.read_csv(data_package.open_pvgis_csv("Wien")), expected_csv)
+
+
+def test_archive_random_access(tmp_path):
+    members = [(f"{i}.json", f'{{"Id": {i}, "SpeedUp": {{"10": 1000}}}}'.encode()) for i in range(20)]
+    path = write_archive(tmp_path / "test.zpack", members)
+
+    with ZstdArchive(path) as archive:
+        assert len(archive) == 20
+        assert archive.read("13.json") == members[13][1]
+        with pytest.raises(KeyError):
+            archive.read("missing.json")
+
+
+def test_archive_rejects_foreign_files(tmp_path):
+    path = tmp_path / "foreign.zpack"
+    path.write_bytes(b"not an archive at all, definitely not")
+    with pytest.raises(ValueError):
+        ZstdArchive(path)
+
+
+@pytest.mark.parametrize("layout", ["files", "archive"])
+def test_profiling_reports_are_not_compressed(data_package, layout):
+    report = '{"run": {}}'
+    data_package.scheduling_profile_json.write_text(report)
+    compress_data_package(data_package, layout=layout, remove_source=True)
+    assert data_package.scheduling_profile_json.read_text() == report
+    assert "profile" not in data_package.instance_ids()
+
+
+def test_rebuilding_an_archive_keeps_its_members(data_package):
+    expected_ids = data_package.instance_ids()
+    compress_data_package(data_package, layout="archive", remove_source=True)
+    # the archive is opened and cached before it is rebuilt
+    assert data_package.read_instance_bytes(expected_ids[1]) is not None
+
+    updated = data_package.read_instance_bytes(expected_ids[0]).replace(b"{", b"{ ", 1)
+    data_package.write_instance_bytes(expected_ids[0], updated)
+    compress_data_package(data_package, layout="archive", remove_source=True)
+
+    assert data_package.instance_ids() == expected_ids
+    assert not (data_package.scheduling_json_instances / f"{expected_ids[0]}.json").exists()
+    assert data_package.read_instance_bytes(expected_ids[0]) == updated
+    with ZstdArchive(data_package.scheduling_instances_archive) as archive:
+        assert sorted(name[: -len(".json")] for name in archive.names()) == expected_ids
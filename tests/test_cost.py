@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_aware_production_data.cost import load_energy_prices, pv_for_prices
+from energy_aware_production_data.profiles import sliding_covered
+from energy_aware_production_data.schedule import Schedule
+
+
+@pytest.fixture
+def prices(data_package):
+    # quarter hourly export, similar to the APG imbalance prices
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range("2024-02-27", periods=4 * 24 * 5, freq="15min")
+    frame = pd.DataFrame({"Time from": timestamps.astype(str), "Price [EUR/MWh]": rng.normal(80, 40, len(timestamps))})
+    frame.to_csv(data_package.pv_energy_prices, index=False)
+    return load_energy_prices(data_package)
+
+
+def test_prices_are_resampled_to_hours(prices):
+    assert len(prices) == 24 * 5
+    assert prices.step == pd.Timedelta("1h")
+    assert prices.index_of("2024-02-28 01:30") == 25
+    assert prices.window_cost(3, 4, power=2000) == pytest.approx(2000 * prices.prices[3:7].sum() / 1e6)
+
+
+def test_costs_by_offset_match_direct_evaluation(data_package, prices):
+    arrays = data_package.read_instance_arrays("6_3_1")
+    pvgis = pd.read_csv(data_package.open_pvgis_csv("Wien"))
+    pvgis["ds"] = pd.to_datetime(pvgis["ds"]) + pd.DateOffset(months=1, days=26)
+    pv = pv_for_prices(pvgis, prices, year=2005, scaling_factor=3)
+    assert pv[24 * 2 + 12] > 0  # the 29th of February is mapped to the 28th
+
+    # all jobs one after another on the first machine of each stage
+    durations = arrays.processing_times
+    job_start = np.concatenate([[0], np.cumsum(durations.sum(axis=1))[:-1]])
+    start = job_start[:, None] + np.cumsum(durations, axis=1) - durations
+    schedule = Schedule.from_instance(arrays, np.zeros_like(durations), start)
+    hourly = schedule.power_profile(60)
+
+    # the first profile has few distinct levels, the second one many
+    for profile in (np.round(hourly, -3), hourly):
+        costs = prices.costs_by_offset(profile, pv)
+        expected = [prices.profile_cost(profile, s, pv) for s in range(len(prices) - len(profile) + 1)]
+        np.testing.assert_allclose(costs, expected, rtol=1e-7, atol=1e-9)
+
+        timestamp, cost = prices.cheapest_start(profile, pv)
+        assert cost == pytest.approx(min(expected))
+        assert prices.profile_cost(profile, prices.index_of(timestamp), pv) == pytest.approx(cost)
+
+
+def test_sliding_covered_strategies_agree():
+    rng = np.random.default_rng(1)
+    load = rng.integers(0, 4, 50) * 250.0
+    supply = rng.random(500) * 1000
+    weights = rng.normal(size=500)
+
+    layered = sliding_covered(load, supply, weights)
+    windows = sliding_covered(load, supply, weights, max_levels=0)
+    expected = [np.dot(weights[s : s + 50], np.minimum(load, supply[s : s + 50])) for s in range(451)]
+    np.testing.assert_allclose(layered, expected, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(windows, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_power_profile_splits_fractional_times():
+    schedule = Schedule(
+        job=np.array([0, 1]),
+        stage=np.array([0, 0]),
+        machine=np.array([0, 1]),
+        start=np.array([0.5, 2.0]),
+        duration=np.array([1.25, 59.5]),
+        power=np.array([4.0, 60.0]),
+    )
+    assert np.allclose(schedule.power_profile(1)[:3], [2.0, 3.0, 60.0])
+    assert schedule.power_profile(1).sum() == pytest.approx(schedule.energy)
+    assert np.allclose(schedule.power_profile(60) * 60, [schedule.energy - 60.0 * 1.5, 60.0 * 1.5])
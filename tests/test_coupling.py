@@ -0,0 +1,37 @@
+import json
+
+import pandas as pd
+
+from energy_aware_production_data.coupling import couple_with_pv
+
+
+def test_coupling_updates_instances_and_stats(data_package):
+    stats = couple_with_pv(data_package, typical_amplifiers=["1.8", "2.0"], assumed_Wp_of_pv=[1000, 500], max_workers=2)
+    assert len(stats) == 4 * len(data_package.instance_ids())
+
+    row = stats.query(
+        "number_of_jobs == 4 and instance == 1 and typical_amplifier == '1.8' and assumed_Wp_of_pv == 1000"
+    )
+    instance = json.loads(data_package.read_instance_bytes("4_2_1"))
+    total_processing_time = sum(t["ProcessingTime"] for job in instance["JobList"] for t in job["Tasks"])
+    expected = instance["Amplifiers"]["1.8"] * total_processing_time / instance["BestKnownMakespan"] / 1000
+    assert row["total_processing_time"].item() == total_processing_time
+    assert row["pv_scaling_factor"].item() == expected
+    assert instance["PvScalingFactor"] == round(expected, 3)
+    assert pd.read_csv(data_package.scheduling_stats_csv, index_col=0).shape[0] == len(stats)
+
+
+def test_coupling_only_rewrites_changes(data_package):
+    couple_with_pv(data_package, max_workers=1)
+    instance_path = data_package.scheduling_json_instances / "4_2_1.json"
+    instance_mtime = instance_path.stat().st_mtime_ns
+    stats_mtime = data_package.scheduling_stats_csv.stat().st_mtime_ns
+
+    couple_with_pv(data_package, max_workers=1)
+    assert instance_path.stat().st_mtime_ns == instance_mtime
+    assert data_package.scheduling_stats_csv.stat().st_mtime_ns == stats_mtime
+
+    # a new combination only adds rows, the stored scaling factor is kept
+    stats = couple_with_pv(data_package, typical_amplifiers=["1.8", "1.5"], max_workers=1)
+    assert len(stats) == 2 * len(data_package.instance_ids())
+    assert instance_path.stat().st_mtime_ns == instance_mtime
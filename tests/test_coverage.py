@@ -0,0 +1,26 @@
+import numpy as np
+
+from energy_aware_production_data.coverage import pv_coverage
+from energy_aware_production_data.pvgis import load_pvgis
+
+
+def test_coverage_matrix_matches_direct_evaluation(data_package):
+    pvgis = load_pvgis(data_package)
+    assert pvgis.cities == ["Graz", "Linz", "Wien"]
+    assert pvgis["power"].shape == (3, 14 * 24)
+
+    rng = np.random.default_rng(0)
+    profiles = rng.random((2, 30)) * 1500
+    result = pv_coverage(profiles, pvgis, scaling_factor=2.0, start_hour=6)
+    assert result.covered_energy.shape == (2, 3, 13)
+    assert result.start_days[0].hour == 6
+
+    c, d = pvgis.city_index("Wien"), 4
+    pv = pvgis["power"][c, 6 + 24 * d : 6 + 24 * d + 30] * 2.0
+    covered = np.minimum(profiles[1], pv).sum()
+    assert np.isclose(result.covered_energy[1, c, d], covered)
+    assert np.isclose(result.grid_import[1, c, d], profiles[1].sum() - covered)
+    assert np.isclose(result.self_consumption[1, c, d], covered / pv.sum())
+
+    frame = result.to_frame(profile=1)
+    assert np.isclose(frame.loc[("Wien", result.start_days[d]), "covered_energy"], covered)
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.features import (
+    FEATURE_NAMES,
+    compute_features,
+    instance_features,
+)
+
+
+def test_instance_features(data_package):
+    arrays = data_package.read_instance_arrays("4_2_1")
+    features = dict(zip(FEATURE_NAMES, instance_features(arrays)))
+
+    assert features["number_of_jobs"] == 4
+    assert features["number_of_machines"] == arrays.machines_per_stage.sum()
+    stage_load = arrays.processing_times.sum(axis=0) / arrays.machines_per_stage
+    assert features["stage_load_max"] == stage_load.max()
+    assert features["bottleneck_position"] == np.argmax(stage_load)
+    assert features["lower_bound"] >= stage_load.max()
+    assert features["amplifier_log_slope"] > 0
+    assert np.isnan(features["pv_scaling_factor"])
+
+
+def test_compute_features_recalculates_changed_instances(data_package):
+    features = compute_features(data_package, max_workers=2, chunk_size=3)
+    assert list(features.index) == data_package.instance_ids()
+    assert list(features.columns) == ["signature", *FEATURE_NAMES]
+
+    cached = compute_features(data_package, max_workers=1)
+    assert cached.equals(features)
+
+    instance = json.loads(data_package.read_instance_bytes("4_2_1"))
+    instance["PvScalingFactor"] = 0.5
+    data_package.write_instance_bytes("4_2_1", json.dumps(instance).encode())
+
+    updated = compute_features(data_package, max_workers=1)
+    assert updated.loc["4_2_1", "pv_scaling_factor"] == 0.5
+    assert updated.loc["4_2_1", "signature"] != features.loc["4_2_1", "signature"]
+    unchanged = features.index != "4_2_1"
+    assert updated[unchanged].equals(features[unchanged])
+    expected = instance_features(InstanceArrays.from_json(data_package.read_instance_bytes("4_2_1")))
+    assert np.allclose(updated.loc["4_2_1", FEATURE_NAMES].to_numpy(dtype=float), expected, equal_nan=True)
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+
+def test_paths_and_arrays_do_not_import_pydantic():
+    code = (
+        "import sys\n"
+        "import energy_aware_production_data as package\n"
+        "from energy_aware_production_data.data_package import EnergyAwareSchedulingDataPackage, LocalPaths\n"
+        "from energy_aware_production_data.arrays import InstanceArrays\n"
+        "assert package.EnergyAwareSchedulingDataPackage is EnergyAwareSchedulingDataPackage\n"
+        "assert 'pydantic' not in sys.modules\n"
+        "from energy_aware_production_data.data_package import ProblemInstance\n"
+        "from energy_aware_production_data.models import ProblemInstance as Model\n"
+        "assert ProblemInstance is Model and package.ProblemInstance is Model\n"
+        "import energy_aware_production_data.data_package as data_package\n"
+        "assert vars(data_package)['ProblemInstance'] is Model and vars(package)['ProblemInstance'] is Model\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from energy_aware_production_data.instancia import (
+    RawInstance,
+    format_instancia,
+    instance_id_from_path,
+    parse_instancia,
+    read_instancia,
+)
+
+
+def test_processing_times_are_transposed(tmp_path):
+    path = tmp_path / "instancia_3_2_7.txt"
+    path.write_text("3 2\n1 2\n10 20 30\n 4 5 6 \n\n")
+    raw = read_instancia(path)
+    assert instance_id_from_path(path) == "3_2_7"
+    assert list(raw.machines_per_stage) == [1, 2]
+    assert raw.processing_times.tolist() == [[10, 4], [20, 5], [30, 6]]
+
+    rng = np.random.default_rng(0)
+    synthetic = RawInstance(500, 40, rng.integers(1, 5, 40), rng.integers(1, 99, (500, 40)))
+    parsed = parse_instancia(format_instancia(synthetic))
+    assert np.array_equal(parsed.processing_times, synthetic.processing_times)
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("3 2\n1 2\n10 20 30\n4 5\n", "expected 2 x 3 processing times"),
+        ("3 2\n1\n10 20 30\n4 5 6\n", "machines of 2 stages"),
+        ("3 2\n1 2\n10 20 30\n4 5 x\n", "have to be integers"),
+        ("3\n1 2\n10 20 30\n4 5 6\n", "number of jobs and stages"),
+        # jobs x stages instead of stages x jobs
+        ("3 2\n1 2\n10 20\n30 4\n5 6\n", r"2 rows of 3 processing times, got rows of \[2, 2, 2\]"),
+        ("3 2\n1 2\n10 20 30 4\n5 6\n", r"got rows of \[4, 2\]"),
+    ],
+)
+def test_malformed_instances(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_instancia(text)
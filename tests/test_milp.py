@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.milp import build_milp
+from tests.conftest import build_instance
+
+
+def schedule_makespan(model, x, arrays):
+    """Checks the precedences of a solution and returns its makespan."""
+    z = model.variable("z", x).round()
+    start = model.variable("S", x)
+    durations = (z * arrays.speed_up_times).sum(axis=2)
+    finish = start + durations
+    assert np.all(start[:, 1:] >= finish[:, :-1] - 1e-6)
+    return finish[:, -1].max()
+
+
+def test_makespan_model_is_solved(data_package):
+    arrays = InstanceArrays.from_dict(build_instance(4, 2, 1, [1, 2], seed=3))
+    model = build_milp(arrays)
+    result = model.solve(time_limit=30)
+
+    assert result.success
+    makespan = schedule_makespan(model, result.x, arrays)
+    assert makespan == pytest.approx(result.fun)
+    # all tasks at full speed on the single machine of stage 0 is a lower bound
+    assert result.fun >= arrays.speed_up_times[:, 0, -1].sum()
+
+
+def test_energy_model_respects_makespan_limit():
+    arrays = InstanceArrays.from_dict(build_instance(3, 2, 1, [1, 1], seed=5))
+    fastest = build_milp(arrays).solve(time_limit=30)
+    limit = fastest.fun * 1.3
+
+    model = build_milp(arrays, makespan_weight=0, energy_weight=1, makespan_limit=limit)
+    result = model.solve(time_limit=30)
+    assert result.success
+    assert schedule_makespan(model, result.x, arrays) <= limit + 1e-6
+    # relaxing the makespan can only save energy compared to running everything at full speed
+    assert result.fun <= arrays.speed_up_energy[:, :, -1].sum() + 1e-6
+
+
+def test_mps_export(tmp_path):
+    arrays = InstanceArrays.from_dict(build_instance(4, 2, 1, [1, 2], seed=3))
+    model = build_milp(arrays, energy_weight=0.001)
+    path = tmp_path / "model.mps"
+    model.write_mps(path)
+
+    highspy = pytest.importorskip("highspy")
+    solver = highspy.Highs()
+    solver.silent()
+    solver.readModel(str(path))
+    solver.run()
+    assert solver.getInfo().objective_function_value == pytest.approx(model.solve(time_limit=30).fun, rel=1e-6)
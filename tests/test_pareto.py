@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from energy_aware_production_data.pareto import (
+    ParetoFront2D,
+    ParetoFrontND,
+    hypervolume,
+    hypervolume_2d,
+    hypervolume_3d,
+    load_pareto_archive,
+)
+
+
+def brute_force_front(points: np.ndarray) -> np.ndarray:
+    unique = np.unique(points, axis=0)
+    keep = [not np.any(np.all(unique <= p, axis=1) & np.any(unique < p, axis=1)) for p in unique]
+    return unique[keep]
+
+
+def sorted_rows(points: np.ndarray) -> np.ndarray:
+    return points[np.lexsort(points.T[::-1])]
+
+
+@pytest.mark.parametrize("dimensions", [2, 3, 4])
+def test_archives_match_brute_force(dimensions):
+    rng = np.random.default_rng(dimensions)
+    # integer objectives produce plenty of ties and duplicates
+    points = rng.integers(0, 40, size=(600, dimensions)).astype(float)
+
+    archives = [ParetoFrontND(dimensions, max_leaf_size=4)]
+    if dimensions == 2:
+        archives.extend([ParetoFront2D(), ParetoFront2D(block_size=2)])
+
+    expected = sorted_rows(brute_force_front(points))
+    for archive in archives:
+        for point in points:
+            archive.insert(point)
+        np.testing.assert_array_equal(sorted_rows(archive.points()), expected)
+        assert len(archive) == len(expected)
+        assert all(archive.dominated(p) for p in points)
+
+
+def test_hypervolume():
+    assert hypervolume_2d(np.array([[1, 3], [2, 2], [3, 1]]), (4, 4)) == 6.0
+    assert hypervolume_3d(np.array([[0, 0, 0]]), (1, 2, 3)) == 6.0
+
+    rng = np.random.default_rng(0)
+    points = rng.random((50, 3))
+    # monte carlo estimate of the dominated volume in the unit cube
+    samples = rng.random((100_000, 3))
+    dominated = np.zeros(len(samples), dtype=bool)
+    for p in points:
+        dominated |= np.all(samples >= p, axis=1)
+    assert hypervolume_3d(points, (1, 1, 1)) == pytest.approx(dominated.mean(), abs=0.01)
+
+
+def test_hypervolume_of_more_objectives():
+    rng = np.random.default_rng(1)
+    points = rng.random((8, 4))
+    # inclusion-exclusion over all subsets, the intersection of boxes is the box of their maximum
+    expected = 0.0
+    for mask in range(1, 2 ** len(points)):
+        subset = points[[i for i in range(len(points)) if mask >> i & 1]]
+        expected += (-1) ** (len(subset) + 1) * np.prod(1 - subset.max(axis=0))
+    assert hypervolume(points, (1, 1, 1, 1)) == pytest.approx(expected)
+    assert ParetoFrontND(4, points).hypervolume((1, 1, 1, 1)) == pytest.approx(expected)
+    assert hypervolume(points[:, :3], (1, 1, 1)) == hypervolume_3d(points[:, :3], (1, 1, 1))
+    assert hypervolume(np.zeros((1, 5)), (1, 2, 3, 4, 5)) == 120.0
+
+
+def test_save_and_load(data_package):
+    front = ParetoFront2D([(10, 5), (5, 10), (12, 12)])
+    path = data_package.scheduling_fronts / "4_2_1.npz"
+    front.save(path, objectives=["makespan", "energy"])
+
+    loaded, objectives = load_pareto_archive(path)
+    assert objectives == ["makespan", "energy"]
+    np.testing.assert_array_equal(loaded.points(), front.points())
@@ -0,0 +1,58 @@
+import matplotlib
+import numpy as np
+from matplotlib import pyplot as plt
+
+from energy_aware_production_data.plotting import (
+    gantt_collection,
+    minmax_downsample,
+    plot_schedule,
+)
+from energy_aware_production_data.schedule import Schedule
+
+matplotlib.use("Agg")
+
+
+def test_minmax_downsample_keeps_extremes():
+    rng = np.random.default_rng(0)
+    y = rng.random(10_001)
+    x = np.arange(len(y))
+    dx, dy = minmax_downsample(x, y, 100)
+    assert len(dy) <= 200
+    assert np.all(np.diff(dx) >= 0)
+    assert dy.max() == y.max() and dy.min() == y.min()
+    assert np.array_equal(y[dx], dy)
+    _, small_y = minmax_downsample(x[:150], y[:150], 100)
+    assert np.array_equal(small_y, y[:150])
+
+
+def test_plot_schedule_uses_a_single_collection():
+    rng = np.random.default_rng(1)
+    tasks = 20_000
+    schedule = Schedule(
+        job=np.arange(tasks) // 4,
+        stage=np.arange(tasks) % 4,
+        machine=rng.integers(0, 40, tasks),
+        start=rng.integers(0, 100_000, tasks),
+        duration=rng.integers(1, 100, tasks),
+        power=rng.random(tasks) * 1000,
+    )
+    fig = plot_schedule(schedule, pv=rng.random(2000) * 5000, color_by="power")
+    gantt, power = fig.axes
+    assert len(gantt.collections) == 1 and len(gantt.patches) == 0
+    assert len(gantt.collections[0].get_paths()) == tasks
+    assert all(len(line.get_xdata()) <= 2 * fig.get_figwidth() * fig.dpi for line in power.lines)
+    fig.canvas.draw()
+
+
+def test_stages_get_distinct_colors():
+    schedule = Schedule(
+        job=np.zeros(3, dtype=int),
+        stage=np.arange(3),
+        machine=np.arange(3),
+        start=np.arange(3) * 10,
+        duration=np.full(3, 10),
+        power=np.ones(3),
+    )
+    collection = gantt_collection(schedule)
+    colors = collection.get_cmap()(collection.norm(collection.get_array()))
+    assert np.allclose(colors, np.c_[plt.get_cmap("tab20").colors[:3], np.ones(3)])
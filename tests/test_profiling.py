@@ -0,0 +1,53 @@
+import json
+
+from energy_aware_production_data.coupling import couple_with_pv
+from energy_aware_production_data.profiling import (
+    Profiler,
+    active_profiler,
+    profiled,
+    stage,
+)
+
+
+@profiled()
+def allocate(size):
+    with stage("inner"):
+        return bytearray(size)
+
+
+def test_stages_are_only_recorded_with_an_active_profiler():
+    assert active_profiler() is None
+    assert stage("a") is stage("b")
+    allocate(10)
+
+    with Profiler("test", trace_memory=True) as profiler:
+        assert active_profiler() is profiler
+        with stage("outer"):
+            allocate(1_000_000)
+        allocate(10)
+    assert active_profiler() is None
+
+    assert set(profiler.stages) == {"outer", "outer/allocate", "outer/allocate/inner", "allocate", "allocate/inner"}
+    assert profiler.stages["outer/allocate"].calls == 1
+    assert profiler.stages["outer"].peak_memory >= 1_000_000
+    assert profiler.stages["outer/allocate/inner"].allocated_memory >= 1_000_000
+    assert profiler.stages["outer"].wall_time >= profiler.stages["outer/allocate"].wall_time
+
+
+def test_coupling_report(data_package):
+    with Profiler("coupling") as profiler:
+        couple_with_pv(data_package, max_workers=2)
+    with Profiler("serial") as serial:
+        couple_with_pv(data_package, max_workers=1)
+
+    instances = len(data_package.instance_ids())
+    assert profiler.stages["coupling/read"].calls == instances
+    assert profiler.stages["coupling/write"].calls == instances
+    assert serial.stages["coupling/read"].calls == instances
+    assert "coupling/write" not in serial.stages
+
+    profiler.write(data_package.scheduling_profile_json)
+    reports = serial.write(data_package.scheduling_profile_json)
+    assert set(reports) == {"coupling", "serial"}
+    assert json.loads(data_package.scheduling_profile_json.read_text()) == reports
+    assert len(data_package.instance_ids()) == instances
@@ -0,0 +1,90 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from energy_aware_production_data.shared_cache import SharedInstanceCache
+
+
+def _load(args):
+    data_package, registry, instance_id = args
+    cache = SharedInstanceCache(data_package, registry=registry)
+    arrays = cache.get(instance_id)
+    return int(arrays.processing_times.sum())
+
+
+@pytest.fixture
+def cache(data_package, tmp_path):
+    cache = SharedInstanceCache(data_package, registry=tmp_path / "registry.json")
+    yield cache
+    cache.clear()
+
+
+def test_instances_are_shared_read_only(data_package, cache):
+    arrays = cache.get("6_3_1")
+    expected = data_package.read_instance_arrays("6_3_1")
+    assert np.array_equal(arrays.speed_up_power, expected.speed_up_power)
+    assert arrays.best_known_makespan == expected.best_known_makespan
+    with pytest.raises(ValueError):
+        arrays.processing_times[0, 0] = 1
+
+    # the segment survives the processes which attached to it
+    args = [(data_package, cache.registry, "6_3_1")] * 4
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert set(executor.map(_load, args)) == {int(expected.processing_times.sum())}
+    assert list(cache.entries()) == ["6_3_1"]
+    assert cache.get("6_3_1") is arrays
+
+
+def test_least_recently_used_instances_are_evicted(data_package, cache):
+    cache.get("4_2_1")
+    size = cache.entries()["4_2_1"]["size"]
+    cache.capacity = 2 * size + 100
+
+    cache.get("4_2_2")
+    cache.invalidate("4_2_1")
+    cache.get("4_2_1")
+    cache.get("8_2_1")
+    # 4_2_2 is the least recently used instance
+    assert "4_2_2" not in cache
+    assert "8_2_1" in cache
+
+    other = SharedInstanceCache(data_package, registry=cache.registry)
+    assert np.array_equal(
+        other.get("4_2_2").processing_times, data_package.read_instance_arrays("4_2_2").processing_times
+    )
+    assert "4_2_2" in cache
+    other.close()
+
+
+def test_orphaned_segments_are_replaced(data_package, cache):
+    cache.get("4_2_1")
+    cache.close()
+    # the registry is lost while the segment persists
+    cache.registry.unlink()
+    assert "4_2_1" not in cache
+    arrays = cache.get("4_2_1")
+    assert np.array_equal(arrays.processing_times, data_package.read_instance_arrays("4_2_1").processing_times)
+    cache.clear()
+    assert not list(Path("/dev/shm").glob(cache._prefix + "*"))
+
+
+def test_instances_are_read_without_holding_the_lock(data_package, cache, monkeypatch):
+    read_instance_arrays = data_package.read_instance_arrays
+    other = SharedInstanceCache(data_package, registry=cache.registry)
+
+    def read_while_another_process_registers(instance_id):
+        # the other cache reads through the original method, it blocks if the registry lock is held
+        monkeypatch.setattr(data_package, "read_instance_arrays", read_instance_arrays)
+        other.get(instance_id)
+        return read_instance_arrays(instance_id)
+
+    monkeypatch.setattr(data_package, "read_instance_arrays", read_while_another_process_registers)
+    arrays = cache.get("4_2_1")
+    assert np.array_equal(arrays.processing_times, read_instance_arrays("4_2_1").processing_times)
+    # the segment registered first is used by both, the other one is unlinked
+    segment = cache.entries()["4_2_1"]["segment"]
+    assert cache._attached["4_2_1"][0].name.lstrip("/") == segment.lstrip("/")
+    assert [path.name for path in Path("/dev/shm").glob(cache._prefix + "*")] in ([], [segment])
+    other.close()
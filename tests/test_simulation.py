@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.simulation import (
+    fifo_policy,
+    poisson_release_times,
+    pv_surplus_policy,
+    simulate,
+)
+from tests.conftest import build_instance
+
+
+def assert_feasible(result, arrays):
+    schedule = result.schedule
+    start = schedule.start.reshape(arrays.processing_times.shape)
+    end = schedule.end.reshape(arrays.processing_times.shape)
+    assert np.all(start[:, 0] >= result.release_times)
+    assert np.all(start[:, 1:] >= end[:, :-1])
+    for machine in np.unique(schedule.machine):
+        on_machine = schedule.machine == machine
+        order = np.argsort(schedule.start[on_machine])
+        assert np.all(schedule.start[on_machine][order][1:] >= schedule.end[on_machine][order][:-1])
+
+
+def test_fifo_permutation_flow_shop():
+    arrays = InstanceArrays.from_dict(build_instance(10, 3, 1, [1, 1, 1], seed=2))
+    result = simulate(arrays)
+    assert_feasible(result, arrays)
+    assert result.number_of_events == 10 + 30
+
+    # the classic permutation flow shop recursion
+    completion = np.zeros((11, 4))
+    for j in range(10):
+        for s in range(3):
+            completion[j + 1, s + 1] = max(completion[j, s + 1], completion[j + 1, s]) + arrays.processing_times[j, s]
+    assert result.makespan == completion[-1, -1]
+    assert np.isclose(result.grid_energy, result.schedule.energy / 60)
+
+
+def test_pv_surplus_policy_uses_pv():
+    arrays = InstanceArrays.from_dict(build_instance(10, 3, 1, [3, 1, 2], seed=1))
+    release_times = poisson_release_times(10, mean_interarrival=30, seed=0)
+    pv = np.full(100, 5000.0)
+
+    result = simulate(arrays, release_times, pv_surplus_policy(), pv=pv)
+    assert_feasible(result, arrays)
+    assert result.schedule.power.max() > arrays.speed_up_power[:, :, 0].max()
+    assert 0 < result.pv_covered_energy <= result.schedule.energy / 60
+    assert np.isclose(result.pv_covered_energy + result.grid_energy, result.schedule.energy / 60)
+
+
+def test_policy_waiting_for_pv_is_woken_up():
+    arrays = InstanceArrays.from_dict(build_instance(6, 2, 1, [1, 1], seed=3))
+    # no PV in the first 3 hours
+    pv = np.concatenate([np.zeros(3), np.full(100, 5000.0)])
+
+    def wait_for_pv(state, time, stages):
+        if state.pv_power(time) == 0:
+            state.wake_up(state.next_pv_slot(time))
+            return []
+        return fifo_policy()(state, time, stages)
+
+    result = simulate(arrays, policy=wait_for_pv, pv=pv)
+    assert_feasible(result, arrays)
+    assert result.schedule.start.min() == 180
+    assert result.grid_energy < result.schedule.energy / 60
+
+    with pytest.raises(ValueError, match="future"):
+        simulate(arrays, policy=lambda state, time, stages: state.wake_up(time) or [], pv=pv)
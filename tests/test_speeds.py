@@ -0,0 +1,129 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from energy_aware_production_data.arrays import InstanceArrays
+from energy_aware_production_data.schedule import Schedule
+from energy_aware_production_data.speeds import (
+    TaskGraph,
+    assign_speeds,
+    chain_speeds,
+    task_tables,
+)
+from tests.conftest import build_instance
+
+
+def _flow_shop(number_of_jobs, machines_per_stage, seed=0):
+    arrays = InstanceArrays.from_dict(
+        build_instance(number_of_jobs, len(machines_per_stage), 1, machines_per_stage, seed)
+    )
+    offsets = np.concatenate([[0], np.cumsum(machines_per_stage)[:-1]])
+    jobs, stages = np.indices(arrays.processing_times.shape)
+    machine = offsets[stages] + jobs % np.array(machines_per_stage)[stages]
+    # any start times ordering the jobs by id on every machine
+    start = jobs * 1000 + stages * 100
+    schedule = Schedule.from_instance(arrays, machine, start)
+    return arrays, schedule, TaskGraph.from_schedule(schedule)
+
+
+def _brute_force(graph, durations, energies, limit):
+    best = np.inf
+    rows = np.arange(len(durations))
+    for speed in itertools.product(range(durations.shape[1]), repeat=len(durations)):
+        speed = np.array(speed)
+        if graph.earliest_starts(durations[rows, speed])[1] <= limit:
+            best = min(best, energies[rows, speed].sum())
+    return best
+
+
+def test_task_graph_of_a_flow_shop():
+    _, schedule, graph = _flow_shop(4, [2, 1])
+    start, makespan = graph.earliest_starts(schedule.duration)
+    # one machine in the second stage processes the jobs in order after their first stage
+    second = np.flatnonzero(schedule.stage == 1)
+    assert np.all(np.diff(start[second]) > 0)
+    assert makespan == pytest.approx((start + schedule.duration).max())
+    assert not graph.is_chain
+    critical = graph.critical_path(schedule.duration)
+    assert schedule.duration[critical].sum() == pytest.approx(makespan)
+
+
+def test_chain_speeds_is_exact():
+    rng = np.random.default_rng(0)
+    durations = np.sort(rng.integers(1, 20, (5, 4)), axis=1)[:, ::-1]
+    energies = np.sort(rng.random((5, 4)) * 100, axis=1)
+    limit = int(durations.sum(axis=1).mean() * 0.8)
+    speed, energy = chain_speeds(durations, energies, limit)
+    best = min(
+        energies[np.arange(5), s].sum()
+        for s in map(np.array, itertools.product(range(4), repeat=5))
+        if durations[np.arange(5), s].sum() <= limit
+    )
+    assert energy == pytest.approx(best)
+    assert durations[np.arange(5), speed].sum() <= limit
+    assert chain_speeds(durations, energies, int(durations.min(axis=1).sum()) - 1)[1] == np.inf
+
+
+def test_assign_speeds_meets_the_limit_and_brackets_the_optimum():
+    arrays, schedule, graph = _flow_shop(3, [2, 1])
+    durations, power = task_tables(arrays, schedule)
+    options = [0, 5, 10]
+    durations, power = durations[:, options], power[:, options]
+    nominal = graph.earliest_starts(durations[:, 0])[1]
+    fastest = graph.earliest_starts(durations[:, -1])[1]
+    limit = (nominal + fastest) / 2
+
+    assignment = assign_speeds(graph, durations, power, limit, lower_bound=True)
+    assert assignment.feasible and assignment.makespan <= limit
+    optimum = _brute_force(graph, durations, durations * power, limit)
+    assert assignment.lower_bound <= optimum + 1e-6 <= assignment.energy + 2e-6
+    assert assignment.apply(schedule).energy == pytest.approx(assignment.energy)
+
+    relaxed = assign_speeds(graph, durations, power, nominal)
+    assert np.all(relaxed.speed == 0) and relaxed.energy == pytest.approx(schedule.energy)
+    assert not assign_speeds(graph, durations, power, fastest - 1).feasible
+
+
+def test_assign_speeds_respects_the_power_limit():
+    arrays, schedule, graph = _flow_shop(6, [2, 2, 1])
+    durations, power = task_tables(arrays, schedule)
+    limit = graph.earliest_starts(durations[:, 0])[1] * 0.85
+    task_power_limit = np.percentile(power[:, 4], 50)
+    assignment = assign_speeds(graph, durations, power, limit, task_power_limit=task_power_limit)
+    assert np.all(assignment.power <= task_power_limit)
+    if assignment.feasible:
+        assert assignment.makespan <= limit
+    with pytest.raises(ValueError):
+        assign_speeds(graph, durations, power, limit, task_power_limit=power.min() / 2)
+
+
+def test_ties_prefer_the_cheaper_option_under_a_power_limit():
+    graph = TaskGraph(np.array([-1, -1]), np.array([-1, -1]), np.array([0, 1]))
+    durations = np.array([[10, 5, 5, 3], [10, 5, 5, 3]])
+    power = np.array([[1.0, 4.0, 2.0, 100.0], [1.0, 2.0, 4.0, 100.0]])
+    # the limit can not be met without the excluded option, so the fastest allowed options are returned
+    assignment = assign_speeds(graph, durations, power, 4, task_power_limit=50)
+    assert not assignment.feasible
+    assert assignment.speed.tolist() == [2, 1]
+
+
+def test_chains_are_solved_exactly_on_request():
+    arrays, schedule, graph = _flow_shop(5, [1])
+    assert graph.is_chain
+    durations, power = task_tables(arrays, schedule)
+    limit = int(graph.earliest_starts(durations[:, 0])[1] * 0.8)
+    exact = assign_speeds(graph, durations, power, limit, exact_chains=True)
+    _, optimum = chain_speeds(durations[graph.chain_order()], (durations * power)[graph.chain_order()], limit)
+    assert exact.feasible and exact.makespan <= limit
+    assert exact.energy == pytest.approx(optimum)
+    heuristic = assign_speeds(graph, durations, power, limit)
+    assert heuristic.feasible and heuristic.energy >= exact.energy - 1e-6
+
+
+def test_without_makespan_limit_only_the_task_power_limit_applies():
+    arrays, schedule, graph = _flow_shop(4, [2, 1])
+    durations, power = task_tables(arrays, schedule)
+    assignment = assign_speeds(graph, durations, power, None, task_power_limit=np.max(power[:, 3]))
+    assert assignment.feasible
+    assert assignment.energy == pytest.approx(np.min(durations * power, axis=1).sum())
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import spearmanr
+
+from energy_aware_production_data.coverage import CoverageMatrix, pv_coverage
+from energy_aware_production_data.pvgis import load_pvgis
+from energy_aware_production_data.surrogate import (
+    CoverageEstimate,
+    build_pv_basis,
+    compare,
+    kmeans,
+)
+
+
+def test_kmeans_separates_clusters():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(0, 0.1, (50, 3)), rng.normal(5, 0.1, (50, 3))])
+    centroids, labels = kmeans(values, 2)
+    assert len(np.unique(labels[:50])) == 1 and len(np.unique(labels[50:])) == 1
+    assert labels[0] != labels[-1]
+    assert np.allclose(np.sort(centroids[:, 0]), [0, 5], atol=0.1)
+
+
+def test_estimate_is_within_its_bound(data_package):
+    pvgis = load_pvgis(data_package)
+    rng = np.random.default_rng(0)
+    profiles = rng.random((3, 30)) * 1500
+    exact = pv_coverage(profiles, pvgis, scaling_factor=2.0, start_hour=6)
+
+    basis = build_pv_basis(pvgis, clusters=4, start_hour=6)
+    estimate = basis.estimate(profiles, scaling_factor=2.0)
+    assert estimate.covered_energy.shape == exact.covered_energy.shape
+    assert estimate.start_days.equals(exact.start_days)
+    assert np.allclose(estimate.pv_energy, exact.pv_energy)
+    accuracy = compare(estimate, exact)
+    assert accuracy.within_bound == 1.0
+    assert accuracy.max_error <= estimate.error_bound.max()
+
+    # the shortlist keeps the exact best start days
+    shortlist = estimate.shortlist(3)
+    for p in range(len(profiles)):
+        best = np.argsort(exact.covered_energy[p].ravel())[-3:]
+        assert shortlist[p].ravel()[best].all()
+
+    # one cluster per day reproduces the exact result
+    exact_basis = build_pv_basis(pvgis, clusters=15, start_hour=6)
+    assert np.allclose(exact_basis.estimate(profiles, scaling_factor=2.0).covered_energy, exact.covered_energy)
+
+
+def test_rank_correlation_handles_ties():
+    exact_energy = np.array([0.0, 0.0, 0.0, 0.0, 5.0, 7.0, 9.0])
+    estimated_energy = np.array([0.5, 0.0, 0.2, 0.1, 5.0, 9.0, 7.0])
+    shape = (1, 1, len(exact_energy))
+    start_days = pd.date_range("2005-01-01", periods=len(exact_energy), freq="D")
+    exact = CoverageMatrix(["Linz"], start_days, np.ones(1), exact_energy.reshape(shape), np.ones(shape))
+    estimate = CoverageEstimate(
+        ["Linz"], start_days, np.ones(1), estimated_energy.reshape(shape), np.ones(shape), np.ones(shape)
+    )
+    accuracy = compare(estimate, exact)
+    assert np.isclose(accuracy.rank_correlation[0], spearmanr(estimated_energy, exact_energy).statistic)